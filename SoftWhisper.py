@@ -6,29 +6,46 @@ import tkinter as tk
 from tkinter import filedialog, scrolledtext, messagebox, ttk
 import threading
 import os
-import tempfile
 import sys
 import queue
-import time
 import json
+import multiprocessing
 import psutil
-import urllib.request
-import re
 from diarization_gui import DiarizationOption
 
 # Import media player module
 from media_player import MediaPlayer, MediaPlayerUI
 
-# Import our simplest SRT functions
-from subtitles import save_whisper_as_srt, whisper_to_srt
+# Segments of a transcription, rendered into every view
+from segment_store import SegmentStore, store_from_result
 
 # Import export button creation from file_export.py
 from file_export import create_export_button
 
+# GUI-independent transcription core
+from transcriber import (transcribe_with_cache, get_result_cache,
+                         get_default_whisper_cpp_path, resolve_whisper_executable, DEFAULT_ADVANCED_SETTINGS)
+
+# Resident whisper.cpp server backend
+from whisper_server import shutdown_servers
+
+# Model file bookkeeping and page-cache warm-up
+from model_manager import ModelManager
+
+# Resumable, checksum-verified model downloads
+from model_download import download_model
+
+# Batched console output and progress updates for the GUI
+from console_sink import ConsoleSink, ConsoleLog, LatestProgress
+from console_view import ConsoleView
+
+# Background queue of transcription jobs
+from job_queue import JobScheduler
+from job_queue_gui import JobQueueWindow, render_job_output
+
 import subprocess
 import io
 import signal
-from pydub import AudioSegment
 
 _app = None
 
@@ -39,16 +56,8 @@ def debug_print(msg):
     sys.__stdout__.flush()
     # Also write to the console queue if available
     global _app
-    if _app is not None and hasattr(_app, 'console_queue'):
-        _app.console_queue.put({'type': 'append', 'content': f"DEBUG: {msg}\n"})
-
-def get_default_whisper_cpp_path():
-    program_dir = os.path.dirname(os.path.abspath(__file__))
-    if os.name == "nt":
-        # Default Windows path: a directory; we'll later append the executable name.
-        return os.path.join(program_dir, "Whisper_win-x64")
-    else:
-        return os.path.join(program_dir, "Whisper_lin-x64")
+    if _app is not None and hasattr(_app, 'console_sink'):
+        _app.console_sink.write(f"DEBUG: {msg}\n")
 
 # Allowed model filenames for automatic download.
 ALLOWED_MODELS = [
@@ -63,167 +72,10 @@ ALLOWED_MODELS = [
 
 CONFIG_FILE = 'config.json'
 
-# Maximum duration per chunk in seconds
-MAX_CHUNK_DURATION = 120  
-
 # Redirect stdout and stderr to the UI console
-def set_console_redirect(console_queue):
-    sys.stdout = ConsoleRedirector(console_queue)
-    sys.stderr = ConsoleRedirector(console_queue)
-
-# The transcribe_audio function with built-in logic to parse timestamps from
-# Whisper.cpp JSON lines.
-def transcribe_audio(file_path, options, progress_callback=None, status_callback=None, stop_event=None):
-    file_path = os.path.abspath(file_path)
-    debug_print(f"transcribe_audio() => Processing file: {file_path}")
-    model_name = options.get('model_name', 'base')
-    model_path = os.path.abspath(os.path.join("models", "whisper", f"ggml-{model_name}.bin"))
-    language = options.get('language', 'auto')
-    beam_size = min(int(options.get('beam_size', 5)), 8)
-    task = options.get('task', 'transcribe')
-
-    audio = AudioSegment.from_file(file_path)
-    audio_length = len(audio) / 1000.0
-
-    # Parse start/end directly from options and clamp to audio duration
-    start_text = options.get('start_time', '').strip()
-    end_text = options.get('end_time', '').strip()
-
-    def _s_to_sec(txt):
-        # Minimal inline parser supporting "HH:MM:SS", "MM:SS", or "SS"
-        if not txt:
-            return None
-        parts = txt.split(':')
-        try:
-            if len(parts) == 3:
-                h, m, s = parts
-                return int(h) * 3600 + int(m) * 60 + float(s)
-            elif len(parts) == 2:
-                m, s = parts
-                return int(m) * 60 + float(s)
-            else:
-                return float(parts[0])
-        except Exception:
-            return None
-
-    start_override = _s_to_sec(start_text) or 0.0
-    end_override = _s_to_sec(end_text) if end_text else None
-    if end_override is None or end_override <= 0:
-        end_override = audio_length
-
-    start_sec = max(0.0, min(start_override, audio_length))
-    end_sec = max(start_sec, min(end_override, audio_length))
-
-    # Zero-length guard to avoid loops/hangs on empty intervals
-    if end_sec - start_sec <= 0.001:
-        return {
-            'raw': "",
-            'text': "",
-            'segments': [],
-            'audio_length': audio_length,
-            'stderr': "",
-            'cancelled': bool(stop_event and stop_event.is_set())
-        }
-
-    trimmed_audio = audio[int(start_sec * 1000):int(end_sec * 1000)]
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        trimmed_audio.export(tmp.name, format="wav")
-        temp_audio_path = tmp.name
-
-    cmd = [
-        options['whisper_executable'], "-m", model_path,
-        "-f", temp_audio_path, "-bs", str(beam_size), "-pp",
-        "-l", language, "-oj", "--prompt", "Always use punctuation. Do not use dashes to indicate dialog. Do not censor any words."
-    ]
-    if task == "translate":
-        cmd.append("-translate")
-
-    debug_print(f"Running Whisper.cpp with command: {' '.join(cmd)}")
-    env = os.environ.copy()
-
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        encoding='utf-8',
-        errors='replace',
-        bufsize=1,
-        env=env
-    )
-
-    stderr_data = []
-    threading.Thread(
-        target=lambda: [stderr_data.append(line) for line in iter(process.stderr.readline, "")],
-        daemon=True
-    ).start()
-
-    stdout_lines = []
-    last_output_time = time.time()
-    STALL_TIMEOUT = 60  # seconds without output -> consider stalled
-
-    while process.poll() is None:
-        if stop_event and stop_event.is_set():
-            try:
-                psutil.Process(process.pid).kill()
-            except Exception:
-                pass
-            break
-
-        line = process.stdout.readline()
-        if line:
-            last_output_time = time.time()
-            stdout_lines.append(line)
-            match = re.search(r'\[(\d{2}:\d{2}:\d{2}\.\d{3}) -->', line)
-            if match and progress_callback:
-                h, m, s_ms = match.group(1).split(':')
-                s, ms = s_ms.split('.')
-                current = int(h) * 3600 + int(m) * 60 + int(s) + float(ms) / 1000
-                den = max(0.001, (end_sec - start_sec))
-                progress = int(max(0.0, min(100.0, (current / den) * 100)))
-                progress_callback(progress, f"Transcribing: {progress}%")
-        else:
-            if time.time() - last_output_time > STALL_TIMEOUT:
-                debug_print("Whisper.cpp appears stalled; terminating process to avoid hang.")
-                try:
-                    psutil.Process(process.pid).kill()
-                except Exception:
-                    pass
-                break
-            time.sleep(0.05)
-
-    if progress_callback:
-        progress_callback(100, "Transcribing: 100%")
-
-    raw = "".join(stdout_lines).strip()
-    segments, plain_text = [], ""
-    if raw:
-        try:
-            data = json.loads(raw)
-            segments = data.get("segments", [])
-            plain_text = " ".join(seg.get("text", "").strip() for seg in segments)
-        except json.JSONDecodeError as e:
-            debug_print(f"JSON parse error (fallback): {e}")
-            lines = raw.splitlines()
-            cleaned = [re.sub(r'^\[[^\]]+\]\s*', "", l) for l in lines if l.strip()]
-            plain_text = " ".join(cleaned)
-
-    result = {
-        'raw': raw,
-        'text': plain_text,
-        'segments': segments,
-        'audio_length': audio_length,
-        'stderr': "".join(stderr_data),
-        'cancelled': bool(stop_event and stop_event.is_set()),
-        'temp_audio_path': temp_audio_path
-    }
-
-    try:
-        os.remove(temp_audio_path)
-    except:
-        pass
-
-    return result
-
+def set_console_redirect(console_sink):
+    sys.stdout = ConsoleRedirector(console_sink)
+    sys.stderr = ConsoleRedirector(console_sink)
 
 class CustomProgressBar(tk.Canvas):
     def __init__(self, master, width, height, bg_color="#E0E0E0", fill_color="#4CAF50"):
@@ -239,13 +91,13 @@ class CustomProgressBar(tk.Canvas):
         self.update_idletasks()
 
 class ConsoleRedirector:
-    def __init__(self, console_queue):
-        self.console_queue = console_queue
+    def __init__(self, console_sink):
+        self.console_sink = console_sink
 
     def write(self, message):
         if message and message.strip():
-            # Queue the message for display in the UI
-            self.console_queue.put({'type': 'append', 'content': message})
+            # Buffer the message for the next console redraw
+            self.console_sink.write(message)
             # Also write to the original stderr for debugging in terminal
             sys.__stderr__.write(f"REDIRECT: {message}")
             sys.__stderr__.flush()
@@ -295,23 +147,43 @@ class SoftWhisper:
         # Store final segments & text
         self.current_segments = None
         self.current_text = None
+        # Last finished transcription result, re-rendered when the view options change
+        self.last_result = None
+        # Text appended to the transcription box while Whisper.cpp is running, and the
+        # view ("srt" or "plain") it was rendered in
+        self.streamed_parts = []
+        self.streamed_view = None
 
         self.WHISPER_CPP_PATH = tk.StringVar(value=get_default_whisper_cpp_path())
 
+        # Advanced settings (only editable through config.json)
+        self.advanced_settings = dict(DEFAULT_ADVANCED_SETTINGS)
+
         # Ensure last_dir is always initialized
         self.last_dir = os.getcwd()
 
+        # Model files: sizes, checksums, warm-up and memory use
+        self.model_manager = ModelManager()
+
         num_cores = psutil.cpu_count(logical=True)
         self.num_threads = max(1, int(num_cores * 0.8))
         debug_print(f"Using {self.num_threads} threads (logical cores * 0.8)")
 
     def setup_queues(self):
         debug_print("Setting up queues")
-        self.console_queue = queue.Queue()
-        self.progress_queue = queue.Queue()
+        # Console history in memory, with the full log written to disk
+        self.console_log = ConsoleLog()
+        self.console_sink = ConsoleSink(log=self.console_log)
+        # Only the latest progress update is drawn
+        self.progress_queue = LatestProgress()
+        self.shown_progress = (None, None)
         self.transcription_queue = queue.Queue()
+        self.job_events_queue = queue.Queue()
+        self.job_scheduler = JobScheduler(self._run_job, self.job_events_queue,
+                                          max_concurrent=self.advanced_settings.get('job_concurrency', 1))
+        self.job_window = None
         # Redirect stdout and stderr immediately and keep it redirected
-        set_console_redirect(self.console_queue)
+        set_console_redirect(self.console_sink)
 
     def create_widgets(self):
         debug_print("Creating widgets")
@@ -364,6 +236,9 @@ class SoftWhisper:
         self.select_file_button = tk.Button(media_frame, text="Select Audio/Video File",
                                             command=self.select_file, font=("Arial", 12))
         self.select_file_button.pack(pady=10)
+        self.job_queue_button = tk.Button(media_frame, text="Job Queue...",
+                                          command=self.open_job_queue, font=("Arial", 12))
+        self.job_queue_button.pack(pady=5)
 
         buttons_frame = tk.Frame(media_frame)
         buttons_frame.pack(pady=5)
@@ -385,8 +260,8 @@ class SoftWhisper:
 
         console_frame = tk.LabelFrame(right_frame, text="Console Output", padx=10, pady=10, font=("Arial", 12))
         console_frame.pack(padx=10, pady=10, fill="x")
-        self.console_output_box = scrolledtext.ScrolledText(console_frame, wrap="word", width=80, height=5,
-                                                            state=tk.DISABLED, font=("Courier New", 10))
+        self.console_output_box = ConsoleView(console_frame, self.console_log, height=5, width=80,
+                                              font=("Courier New", 10))
         self.console_output_box.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
         console_frame.rowconfigure(0, weight=1)
         console_frame.columnconfigure(0, weight=1)
@@ -495,17 +370,12 @@ class SoftWhisper:
         self.export_button.config(state=tk.DISABLED)
         self.current_segments = None
         self.current_text = None
+        self.last_result = None
         self.update_status(status_message, status_color)
 
     def _resolve_whisper_executable(self, path_value):
         # Ensure executable path is absolute and points to the binary
-        exe_path = path_value
-        if os.path.isdir(exe_path):
-            if os.name == "nt":
-                exe_path = os.path.join(exe_path, "whisper-cli.exe")
-            else:
-                exe_path = os.path.join(exe_path, "whisper-cli")
-        return os.path.abspath(exe_path)
+        return resolve_whisper_executable(path_value)
 
     def _ensure_model_file(self, selected_model, progress_queue):
         # Ensure model file exists, download if allowed and missing
@@ -515,70 +385,88 @@ class SoftWhisper:
         if not os.path.exists(model_path):
             if model_filename in ALLOWED_MODELS:
                 debug_print(f"Model file not found, attempting download for {model_filename}...")
-                whisper_folder = os.path.join("models", "whisper")
-                if not os.path.exists(whisper_folder):
-                    os.makedirs(whisper_folder)
-                url = f"https://huggingface.co/ggerganov/whisper.cpp/resolve/main/{model_filename}"
-                debug_print(f"Downloading model from {url}")
-
-                def download_reporthook(block_num, block_size, total_size):
-                    downloaded = block_num * block_size
-                    percentage = int(downloaded / total_size * 100) if total_size > 0 else 0
-                    progress_message = f"Downloading {model_filename}: {percentage}%"
-                    progress_queue.put((percentage, progress_message))
-
-                urllib.request.urlretrieve(url, model_path, reporthook=download_reporthook)
+                # Downloads into a .part file that is resumed on retry and only renamed
+                # into place once complete and verified
+                download_model(model_filename, os.path.join("models", "whisper"),
+                               mirror_dir=self.advanced_settings.get('model_mirror_dir') or None,
+                               progress_callback=lambda percentage, message: progress_queue.put((percentage, message)))
                 debug_print("Download successful.")
-                progress_queue.put((100, f"Download of {model_filename} complete"))
             else:
                 raise Exception(f"Model file {model_path} not found and automatic download is not supported for this model.")
         return model_path
 
-    def _format_and_display_transcription(self, result):
-        # Format and display transcription based on options and diarization
+    def _format_and_display_transcription(self, result, diarization_future=None):
+        # Format and display transcription based on options and diarization.
+        # diarization_future holds speaker segments being computed alongside Whisper (pipeline mode).
         if self.transcription_stop_event.is_set() or result.get('cancelled', False):
             return
 
-        raw_output = result.get('raw', '')
+        # Every view is rendered from the segments parsed once by the transcriber
+        store = store_from_result(result)
+
+        # Segments already streamed into the box in the selected view need no final redraw
+        streamed = self.streamed_view is not None and self.streamed_view == self._current_view()
+        self.streamed_view = None
 
         if hasattr(self, 'diarization_option') and self.diarization_option.is_enabled():
-            self.current_text = raw_output
-            debug_print("Converting to SRT format for diarization")
-            srt_content = whisper_to_srt(self.current_text)
-            from diarization_gui import merge_diarization
+            from diarization_gui import merge_diarization, diarize_file
 
             def diarization_progress_callback(progress, message):
                 if self.transcription_stop_event.is_set():
                     return
                 self.progress_queue.put((progress, message))
 
+            # Speaker segments depend only on the audio, so they are cached separately
+            cache = get_result_cache(self.advanced_settings)
+            if diarization_future is not None:
+                if not diarization_future.done():
+                    diarization_progress_callback(50, "Waiting for speaker identification to finish...")
+                try:
+                    diarization_segments = diarization_future.result()
+                except BaseException as e:
+                    raise RuntimeError(f"Speaker identification failed: {e}") from e
+                if cache:
+                    cache.put_diarization(self.file_path, diarization_segments)
+            else:
+                diarization_segments = cache.get_diarization(self.file_path) if cache else None
+            if diarization_segments is None:
+                diarization_progress_callback(0, "Identifying speakers...")
+                diarization_segments = diarize_file(
+                    self.file_path,
+                    workers=self.advanced_settings.get('diarization_workers'),
+                    exact_clustering_limit=self.advanced_settings.get('diarization_exact_limit'),
+                    audio_cache_max_mb=self.advanced_settings.get('audio_cache_max_mb'))
+                if cache:
+                    cache.put_diarization(self.file_path, diarization_segments)
+
             diarized_text = merge_diarization(
                 self.file_path,
-                srt_content,
+                None,
                 remove_timestamps=not self.srt_var.get(),
-                progress_callback=diarization_progress_callback
+                progress_callback=diarization_progress_callback,
+                diarization_segments=diarization_segments,
+                store=store
             )
             self.current_text = diarized_text
             self.display_transcription(diarized_text)
+        elif streamed:
+            debug_print("Transcription was streamed into the display; no final redraw needed")
+            self.current_text = "".join(self.streamed_parts)
         elif self.srt_var.get():
-            self.current_text = raw_output
-            debug_print("Converting to proper SRT format for display")
-            srt_content = whisper_to_srt(self.current_text)
-            self.current_text = srt_content
-            self.display_transcription(srt_content)
+            debug_print("Rendering SRT format for display")
+            self.current_text = store.to_srt()
+            self.display_transcription(self.current_text)
         else:
-            lines = raw_output.splitlines()
-            plain_lines = [re.sub(r'^\[[^\]]+\]\s*', '', line) for line in lines if line.strip()]
-            plain_text = " ".join(plain_lines)
-            self.current_text = plain_text
-            self.display_transcription(plain_text)
+            self.current_text = store.to_plain()
+            self.display_transcription(self.current_text)
 
-        self.current_segments = result.get('segments', [])
+        self.current_segments = store
+        self.last_result = result
         if len(self.current_text.strip()) > 0:
             self.export_button.config(state=tk.NORMAL)
 
         self.update_status("Transcription completed.", "green")
-        self.console_queue.put({'type': 'append', 'content': "Transcription process complete.\n"})
+        self.console_sink.write("Transcription process complete.\n")
 
     def browse_whisper_executable(self):
         current_path = self.WHISPER_CPP_PATH.get()
@@ -604,6 +492,9 @@ class SoftWhisper:
                 self.WHISPER_CPP_PATH.set(config.get('WHISPER_CPP_PATH', get_default_whisper_cpp_path()))
                 # Restore last‑opened folder (fallback to already-set self.last_dir)
                 self.last_dir = config.get('last_dir', self.last_dir)
+                # Restore advanced settings, keeping defaults for missing keys
+                self.advanced_settings.update(config.get('advanced', {}))
+                self.job_scheduler.set_max_concurrent(self.advanced_settings.get('job_concurrency', 1))
                 debug_print(f"Configuration loaded: {config}")
             except Exception as e:
                 debug_print(f"Error loading config: {e}")
@@ -614,7 +505,8 @@ class SoftWhisper:
         config = {
             'beam_size': self.beam_size_var.get(),
             'WHISPER_CPP_PATH': self.WHISPER_CPP_PATH.get(),
-            'last_dir': self.last_dir
+            'last_dir': self.last_dir,
+            'advanced': self.advanced_settings
         }
         try:
             with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
@@ -626,8 +518,31 @@ class SoftWhisper:
         debug_print("Setting up callbacks")
         self.model_var.trace("w", self.save_config)
         self.beam_size_var.trace("w", self.save_config)
+        self.srt_var.trace("w", self.on_view_option_change)
+        self.diarization_option.var.trace("w", self.on_view_option_change)
         self.check_queues()
 
+    def _current_view(self):
+        # The view the transcription box shows for the current options
+        if self.diarization_option.is_enabled():
+            return "diarized"
+        return "srt" if self.srt_var.get() else "plain"
+
+    def on_view_option_change(self, *args):
+        # Re-render the last result in the newly selected view (SRT, plain or diarized)
+        # without transcribing again; diarization segments come from the result cache.
+        if self.last_result is None:
+            return
+        if self.transcription_thread and self.transcription_thread.is_alive():
+            return
+        debug_print("View options changed; re-rendering the last transcription")
+        result = self.last_result
+        self.streamed_view = None
+        self.clear_transcription_box()
+        self.transcription_thread = threading.Thread(
+            target=self._format_and_display_transcription, args=(result,), daemon=True)
+        self.transcription_thread.start()
+
     def load_model(self):
         debug_print("Entering load_model()")
         selected_model = self.model_var.get()
@@ -640,14 +555,22 @@ class SoftWhisper:
             self.progress_queue.put((100, f"Model '{selected_model}' is ready (Whisper.cpp)"))
             debug_print("Model loaded successfully.")
             self.root.after(0, self.enable_buttons)
+            if self.advanced_settings.get('model_warmup', True):
+                # Read the model into the page cache while the user picks a file
+                self.model_manager.warm(selected_model, done_callback=self._report_model_memory)
         except Exception as e:
             self.progress_queue.put((0, f"Error: {str(e)}"))
-            self.console_queue.put({'type': 'append', 'content': f"Error loading model: {str(e)}\n"})
+            self.console_sink.write(f"Error loading model: {str(e)}\n")
             messagebox.showerror("Model Loading Error", f"Failed to load model '{selected_model}'.\nError: {str(e)}")
             self.model_var.set(self.previous_model if hasattr(self, 'previous_model') else "base")
             self.root.after(0, self.enable_buttons)
             debug_print("load_model() encountered an error.")
 
+    def _report_model_memory(self, model_name=None):
+        # Log how much of each model is held in RAM
+        for line in self.model_manager.describe_memory():
+            debug_print(f"Model memory: {line}")
+
     def on_model_change(self, event):
         debug_print("Model change requested")
         selected_model = self.model_var.get()
@@ -696,6 +619,7 @@ class SoftWhisper:
             self.clear_console_output()
             self.current_segments = None
             self.current_text = None
+            self.last_result = None
             self.export_button.config(state=tk.DISABLED)
 
             if self.model_loaded:
@@ -737,29 +661,32 @@ class SoftWhisper:
         self.stop_button.config(state=tk.DISABLED)
         self.root.after(0, self.enable_buttons)
 
+    def collect_options(self):
+        # Snapshot of the transcription options currently selected in the window
+        options = {
+            'model_name': self.model_var.get(),
+            'task': self.task_var.get(),
+            'language': self.language_var.get().strip().lower() or "auto",
+            'beam_size': self.beam_size_var.get(),
+            'start_time': self.start_time_var.get().strip(),
+            'end_time': self.end_time_var.get().strip(),
+            'generate_srt': self.srt_var.get(),
+            'diarization': self.diarization_option.is_enabled(),
+            'whisper_executable': self._resolve_whisper_executable(self.WHISPER_CPP_PATH.get()),
+            'threads': self.num_threads
+        }
+        options.update(self.advanced_settings)
+        return options
+
     def transcribe_file(self, file_path: str):
         debug_print(f"transcribe_file() => {file_path}")
-        set_console_redirect(self.console_queue)
+        set_console_redirect(self.console_sink)
 
         try:
-            lang = self.language_var.get().strip().lower() or "auto"
-            debug_print(f"Language setting: '{lang}'")
-
-            options = {
-                'model_name': self.model_var.get(),
-                'task': self.task_var.get(),
-                'language': lang,
-                'beam_size': self.beam_size_var.get(),
-                'start_time': self.start_time_var.get().strip(),
-                'end_time': self.end_time_var.get().strip(),
-                'generate_srt': self.srt_var.get(),
-                'parent_window': self.root,
-                'whisper_executable': self.WHISPER_CPP_PATH.get()
-            }
-
-            # Resolve executable path
-            executable_abs = self._resolve_whisper_executable(options['whisper_executable'])
-            options['whisper_executable'] = executable_abs
+            options = self.collect_options()
+            options['parent_window'] = self.root
+            executable_abs = options['whisper_executable']
+            debug_print(f"Language setting: '{options['language']}'")
             debug_print(f"Using Whisper executable: {executable_abs}")
 
             # Absolute path for the input file
@@ -767,57 +694,166 @@ class SoftWhisper:
 
             # Build a rough command template for debugging purposes
             model_abs = os.path.abspath(os.path.join("models", "whisper", f"ggml-{options['model_name']}.bin"))
-            whisper_cmd = f"{executable_abs} -m {model_abs} -f {file_path} -l {options['language']} -bs {options['beam_size']}"
+            whisper_cmd = f"{executable_abs} -m {model_abs} -f {file_path} -l {options['language']} -bs {options['beam_size']} -t {options['threads']}"
             if options['task'] == 'translate':
                 whisper_cmd += " -translate"
             whisper_cmd += " -oj"
             debug_print(f"Command template: {whisper_cmd}")
 
-            # Define callbacks for progress and status updates
-            def progress_callback(progress, message):
+            cache = get_result_cache(options)
+
+            # Pipeline mode: identify speakers on the same file while Whisper.cpp runs,
+            # unless the speaker segments are already cached.
+            diarization_future = None
+            if self.diarization_option.is_enabled() and options.get('diarization_pipeline', True):
+                if not (cache and cache.get_diarization(file_path) is not None):
+                    from diarization_gui import diarize_in_background
+                    debug_print("Starting speaker identification alongside transcription")
+                    diarization_future = diarize_in_background(
+                        file_path,
+                        workers=options.get('diarization_workers'),
+                        exact_clustering_limit=options.get('diarization_exact_limit'),
+                        audio_cache_max_mb=options.get('audio_cache_max_mb'),
+                        progress_callback=lambda progress, message: report_stage("speakers", progress, f"Speakers: {message}")
+                    )
+
+            # Progress of the running stages (Whisper, and speakers in pipeline mode) shares the bar
+            stages = ["whisper", "speakers"] if diarization_future is not None else ["whisper"]
+            stage_progress = {}
+            stage_lock = threading.Lock()
+
+            def report_stage(stage, progress, message):
                 if self.transcription_stop_event.is_set():
                     return
-                self.progress_queue.put((progress, message))
+                with stage_lock:
+                    stage_progress[stage] = (progress, message)
+                    overall = sum(stage_progress.get(name, (0, ""))[0] for name in stages) / len(stages)
+                    text = " | ".join(stage_progress[name][1] for name in stages if name in stage_progress)
+                self.progress_queue.put((overall, text))
+
+            # Define callbacks for progress and status updates
+            def progress_callback(progress, message):
+                report_stage("whisper", progress, message)
 
             def status_callback(message, color):
                 self.update_status(message, color)
 
+            # Show each segment as soon as Whisper.cpp prints it. With diarization enabled
+            # the plain text is a preview that is replaced by the diarized text at the end.
+            view = "srt" if self.srt_var.get() and not self.diarization_option.is_enabled() else "plain"
+            self.streamed_parts = []
+            self.streamed_view = view
+            streamed_store = SegmentStore()
+
+            def segment_callback(line):
+                if self.transcription_stop_event.is_set():
+                    return
+                if not streamed_store.add_whisper_line(line):
+                    return
+                index = len(streamed_store) - 1
+                if view == "srt":
+                    part = streamed_store.srt_entry(index)
+                else:
+                    part = (" " if index else "") + streamed_store.texts[index]
+                self.streamed_parts.append(part)
+                self.transcription_queue.put({'type': 'append', 'text': part})
+
             debug_print("Calling transcribe_audio()...")
             if not self.transcription_stop_event.is_set():
-                result = transcribe_audio(
+                result = transcribe_with_cache(
                     file_path=file_path,
                     options=options,
+                    cache=cache,
                     progress_callback=progress_callback,
                     status_callback=status_callback,
-                    stop_event=self.transcription_stop_event
+                    stop_event=self.transcription_stop_event,
+                    segment_callback=segment_callback
                 )
+                if result.get('cached'):
+                    # Cached results are rendered whole
+                    self.streamed_view = None
                 debug_print("Transcription completed or cancelled")
 
                 if (not self.transcription_stop_event.is_set()) and not result.get('cancelled', False):
-                    self._format_and_display_transcription(result)
+                    self._format_and_display_transcription(result, diarization_future)
                 elif result.get('cancelled', False):
                     self.update_status("Transcription cancelled by user.", "red")
                 else:
                     self.update_status("Transcription aborted.", "red")
-
-                if result.get('temp_audio_path') and os.path.exists(result['temp_audio_path']):
-                    try:
-                        os.remove(result['temp_audio_path'])
-                    except Exception:
-                        pass
             else:
                 self.update_status("Transcription aborted.", "red")
         except Exception as e:
             import traceback
             error_msg = str(e)
             stack_trace = traceback.format_exc()
-            self.console_queue.put({'type': 'append', 'content': f"Error during transcription: {error_msg}\n{stack_trace}\n"})
+            self.console_sink.write(f"Error during transcription: {error_msg}\n{stack_trace}\n")
             self.progress_queue.put((0, f"Error during transcription: {error_msg}"))
             messagebox.showerror("Transcription Error", f"Failed to transcribe the audio/video file.\nError: {error_msg}")
             debug_print(f"Transcription error: {error_msg}")
         finally:
             self.root.after(100, self.enable_buttons)
 
+    # ---------------------------
+    # Job queue
+    # ---------------------------
+    def open_job_queue(self):
+        debug_print("Opening job queue window")
+        if self.job_window is not None:
+            self.job_window.window.lift()
+            return
+        if not self.model_loaded:
+            messagebox.showwarning("Model Not Ready", "Please wait until the Whisper.cpp model is ready.")
+            return
+        self.job_window = JobQueueWindow(self)
+
+    def _run_job(self, job, report):
+        # Runs on a scheduler thread: transcribe one queued file with the options it was queued with
+        options = dict(job.options)
+        # Concurrent jobs share the cores
+        options['threads'] = max(1, self.num_threads // self.job_scheduler.max_concurrent)
+        self._ensure_model_file(options['model_name'], queue.Queue())
+        cache = get_result_cache(options)
+
+        result = transcribe_with_cache(
+            job.file_path, options, cache=cache,
+            progress_callback=report, stop_event=job.stop_event
+        )
+        if result.get('cancelled') or job.stop_event.is_set():
+            return None
+
+        diarization_segments = None
+        if options.get('diarization'):
+            from diarization_gui import diarize_file
+            diarization_segments = cache.get_diarization(job.file_path) if cache else None
+            if diarization_segments is None:
+                report(100, "Identifying speakers...")
+                try:
+                    diarization_segments = diarize_file(
+                        job.file_path,
+                        workers=options.get('diarization_workers'),
+                        exact_clustering_limit=options.get('diarization_exact_limit'),
+                        audio_cache_max_mb=options.get('audio_cache_max_mb'))
+                except BaseException as e:
+                    raise RuntimeError(f"Speaker identification failed: {e}") from e
+                if cache:
+                    cache.put_diarization(job.file_path, diarization_segments)
+
+        return {
+            'result': result,
+            'text': render_job_output(result, options, diarization_segments),
+        }
+
+    def show_job_result(self, job):
+        # Show a finished job's transcription in the main window, where it can be exported as usual
+        self.file_path = job.file_path
+        self.current_text = job.result['text']
+        self.current_segments = store_from_result(job.result['result'])
+        self.last_result = None
+        self.streamed_view = None
+        self.display_transcription(job.result['text'])
+        self.export_button.config(state=tk.NORMAL)
+        self.update_status(f"Showing job {job.id}: {os.path.basename(job.file_path)}", "blue")
+
     def disable_buttons(self):
         self._set_buttons_state(
             select=False, start=False, stop=False, play=False, pause=False, stop_media=False
@@ -842,35 +878,26 @@ class SoftWhisper:
         # Flag to determine if we need to update the UI
         needs_update = False
 
-        # Process progress queue
-        try:
-            while True:
-                progress, status_message = self.progress_queue.get_nowait()
+        # Draw the latest progress update, if it differs from the one shown
+        update = self.progress_queue.take()
+        if update is not None and update != self.shown_progress:
+            progress, status_message = update
+            if progress != self.shown_progress[0]:
                 self.progress_bar.set_progress(progress)
-                if status_message:
-                    self.update_status(status_message, "blue")
-                needs_update = True
-        except queue.Empty:
-            pass
-
-        # Process console queue
-        try:
-            while True:
-                message_data = self.console_queue.get_nowait()
-                self.console_output_box.config(state=tk.NORMAL)
-
-                if message_data['type'] == 'append':
-                    self.console_output_box.insert(tk.END, message_data['content'])
-                    if float(self.console_output_box.index(tk.END)) > 1000:
-                        self.console_output_box.delete(1.0, "end-500l")
-                    self.console_output_box.see(tk.END)
-                elif message_data['type'] == 'clear':
-                    self.console_output_box.delete(1.0, tk.END)
-
-                self.console_output_box.config(state=tk.DISABLED)
-                needs_update = True
-        except queue.Empty:
-            pass
+            if status_message and status_message != self.shown_progress[1]:
+                self.update_status(status_message, "blue")
+            self.shown_progress = update
+            needs_update = True
+
+        # Add the console output of this tick to the history and redraw the visible lines once
+        batch = self.console_sink.drain()
+        if batch is not None:
+            cleared, lines = batch
+            if cleared:
+                self.console_log.clear()
+            self.console_log.extend(lines)
+            self.console_output_box.refresh()
+            needs_update = True
 
         # Process transcription queue
         try:
@@ -879,8 +906,23 @@ class SoftWhisper:
                 if action['type'] == 'set_text':
                     self.transcription_box.delete(1.0, tk.END)
                     self.transcription_box.insert(tk.END, action['text'])
+                elif action['type'] == 'append':
+                    self.transcription_box.insert(tk.END, action['text'])
+                    self.transcription_box.see(tk.END)
                 elif action['type'] == 'clear':
                     self.transcription_box.delete(1.0, tk.END)
+                # Only edits made by the user count as modifications (see file_export)
+                self.transcription_box.edit_modified(False)
+                needs_update = True
+        except queue.Empty:
+            pass
+
+        # Process job queue events
+        try:
+            while True:
+                event = self.job_events_queue.get_nowait()
+                if event['type'] == 'job' and self.job_window is not None:
+                    self.job_window.update_job(event['job'])
                 needs_update = True
         except queue.Empty:
             pass
@@ -897,10 +939,8 @@ class SoftWhisper:
         self.transcription_queue.put({'type': 'clear'})
 
     def clear_console_output(self):
-        # Clear the console output textbox
-        self.console_output_box.config(state=tk.NORMAL)
-        self.console_output_box.delete(1.0, tk.END)
-        self.console_output_box.config(state=tk.DISABLED)
+        # Clear the console output textbox, with any output not drawn yet
+        self.console_sink.clear()
 
     def display_transcription(self, text):
         # Queue transcription text to be displayed in the textbox
@@ -918,13 +958,19 @@ class SoftWhisper:
     def on_closing(self):
         debug_print("Closing application")
         self.transcription_stop_event.set()
+        self.job_scheduler.shutdown()
         if self.transcription_thread and self.transcription_thread.is_alive():
             self.transcription_thread.join()
         if hasattr(self, 'media_player_ui'):
             self.media_player_ui.cleanup()
+        shutdown_servers()
+        self.console_log.close()
         self.root.destroy()
 
 if __name__ == "__main__":
+    # Diarization embedding workers are spawned processes; in a frozen build they
+    # must not start the GUI again.
+    multiprocessing.freeze_support()
     debug_print("Starting SoftWhisper using Whisper.cpp...")
     root = tk.Tk()
     app = SoftWhisper(root)
@@ -0,0 +1,98 @@
+"""
+audio_cache.py
+
+On-disk cache of media files decoded to 16 kHz mono 16-bit PCM WAV, the format
+both Whisper.cpp and speaker diarization work on.
+
+Entries are keyed by the source file's absolute path, size and modification
+time, so two different files with the same name never collide and an edited
+file is decoded again. A hit is reused without running FFmpeg. The total size
+of the cache folder is capped and the least recently used entries are evicted
+first.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from audio_decode import export_wav_range, WHISPER_SAMPLE_RATE
+from result_cache import evict_lru
+
+AUDIO_CACHE_FOLDER = Path("./audio_cache")
+
+# Default size cap of the cache folder (bytes).
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+ENTRY_SUFFIX = ".16k.wav"
+PARTIAL_SUFFIX = ".part.wav"
+
+# One lock per entry, so concurrent users of the same file (e.g. transcription
+# and diarization in pipeline mode) decode it only once.
+_entry_locks = {}
+_entry_locks_guard = threading.Lock()
+
+
+def _log(message: str):
+    print(f"[DEBUG AudioCache] {message}")
+
+
+def entry_name(file_path):
+    """
+    Returns the cache file name for a media file, e.g. "interview-3f2a9c1e0b7d4a65.16k.wav".
+    """
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    material = f"{file_path}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    key = hashlib.sha1(material.encode('utf-8')).hexdigest()[:16]
+    return f"{Path(file_path).stem}-{key}{ENTRY_SUFFIX}"
+
+
+def find_cached_wav(file_path, folder=AUDIO_CACHE_FOLDER):
+    """
+    Returns the cached WAV copy of `file_path` if one exists, otherwise None.
+    Never decodes anything.
+    """
+    path = Path(folder) / entry_name(file_path)
+    return path if path.exists() else None
+
+
+def cached_wav(file_path, folder=AUDIO_CACHE_FOLDER, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Returns the path of a 16 kHz mono WAV copy of `file_path` in the cache,
+    decoding it with FFmpeg only when no valid entry exists.
+
+    Raises RuntimeError when FFmpeg fails.
+    """
+    folder = Path(folder)
+    name = entry_name(file_path)
+    path = folder / name
+    with _entry_locks_guard:
+        lock = _entry_locks.setdefault(name, threading.Lock())
+
+    with lock:
+        if path.exists():
+            # Refresh the modification time so eviction sees this entry as recently used.
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            _log(f"Reusing decoded audio {path}")
+            return path
+
+        folder.mkdir(parents=True, exist_ok=True)
+        partial_path = folder / (name[:-len(ENTRY_SUFFIX)] + PARTIAL_SUFFIX)
+        _log(f"Decoding {file_path} to {path}...")
+        try:
+            export_wav_range(file_path, 0, None, partial_path, WHISPER_SAMPLE_RATE)
+            os.replace(partial_path, path)
+        finally:
+            try:
+                partial_path.unlink()
+            except OSError:
+                pass
+
+    deleted = evict_lru(folder, max_bytes, "*" + ENTRY_SUFFIX, keep=(name,))
+    if deleted:
+        _log(f"Evicted {deleted} least recently used decoded audio files.")
+    return path
@@ -0,0 +1,216 @@
+"""
+audio_decode.py
+
+Streaming audio decoding through FFmpeg.
+
+Instead of decoding a whole media file into memory, the duration is probed
+from the container and only the requested time range is decoded, using FFmpeg
+input seeking (-ss/-to), straight to the 16 kHz mono 16-bit PCM that
+Whisper.cpp expects. Peak memory therefore does not grow with the length of
+the input file.
+"""
+
+import os
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+
+import numpy as np
+
+FFMPEG = "ffmpeg"
+FFPROBE = "ffprobe"
+
+# Whisper.cpp works on 16 kHz mono audio.
+WHISPER_SAMPLE_RATE = 16000
+
+# RAM-backed directories preferred for temporary WAV files, in order.
+RAM_TEMP_DIRS = ["/dev/shm"]
+
+# Size of the blocks copied from FFmpeg into a pipe (bytes).
+PIPE_BLOCK_SIZE = 64 * 1024
+
+
+def _log(message: str):
+    print(f"[DEBUG Decoder] {message}")
+
+
+def ffmpeg_available():
+    return shutil.which(FFMPEG) is not None
+
+
+def default_temp_dir():
+    """
+    Returns a RAM-backed directory for temporary audio files when one is
+    available, otherwise the regular temporary directory.
+    """
+    for folder in RAM_TEMP_DIRS:
+        if os.path.isdir(folder) and os.access(folder, os.W_OK):
+            return folder
+    return tempfile.gettempdir()
+
+
+def probe_duration(file_path):
+    """
+    Returns the duration of a media file in seconds without decoding it.
+
+    ffprobe is used when it is installed; otherwise the "Duration:" line that
+    ffmpeg prints for its input is parsed.
+    """
+    if shutil.which(FFPROBE):
+        result = subprocess.run(
+            [FFPROBE, "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", str(file_path)],
+            capture_output=True, text=True
+        )
+        try:
+            return float(result.stdout.strip())
+        except ValueError:
+            _log(f"[WARN] ffprobe could not read the duration of {file_path}; falling back to ffmpeg.")
+
+    result = subprocess.run([FFMPEG, "-hide_banner", "-i", str(file_path)], capture_output=True, text=True)
+    match = re.search(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)', result.stderr)
+    if not match:
+        raise RuntimeError(f"Could not determine the duration of {file_path}")
+    h, m, s = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def _range_command(file_path, start_sec, end_sec, sample_rate):
+    # -ss/-to placed before -i seek in the input, so nothing before start_sec is decoded.
+    cmd = [FFMPEG, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if start_sec:
+        cmd.extend(["-ss", f"{start_sec:.3f}"])
+    if end_sec is not None:
+        cmd.extend(["-to", f"{end_sec:.3f}"])
+    cmd.extend(["-i", str(file_path), "-vn", "-ac", "1", "-ar", str(sample_rate)])
+    return cmd
+
+
+def export_wav_range(file_path, start_sec, end_sec, output_path, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Decodes [start_sec, end_sec] of a media file into a 16-bit mono WAV file.
+    """
+    cmd = _range_command(file_path, start_sec, end_sec, sample_rate)
+    cmd.extend(["-acodec", "pcm_s16le", "-y", str(output_path)])
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg failed to decode {file_path}: {result.stderr.strip()}")
+    return output_path
+
+
+def read_pcm(file_path, start_sec, end_sec, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Decodes [start_sec, end_sec] of a media file and returns its mono samples
+    as an int16 numpy array. Only meant for short windows.
+    """
+    cmd = _range_command(file_path, start_sec, end_sec, sample_rate)
+    cmd.extend(["-f", "s16le", "-acodec", "pcm_s16le", "pipe:1"])
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg failed to decode {file_path}: {result.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(result.stdout, dtype='<i2')
+
+
+def wav_header(frame_count, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Returns the 44-byte header of a 16-bit mono PCM WAV file with `frame_count` samples.
+    """
+    data_size = frame_count * 2
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', data_size
+    )
+
+
+def open_wav_pcm16(file_path, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Memory-maps the samples of an uncompressed 16-bit mono WAV file recorded at
+    `sample_rate`, so they can be sliced without reading the whole file.
+
+    Returns an int16 numpy memmap, or None when the file is not such a WAV file.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave_id != b'WAVE':
+                return None
+            fmt = None
+            while True:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    return None
+                chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+                if chunk_id == b'fmt ':
+                    fmt = struct.unpack('<HHIIHH', f.read(16))
+                    f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+                elif chunk_id == b'data':
+                    data_offset = f.tell()
+                    data_size = chunk_size
+                    break
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+
+    if fmt is None:
+        return None
+    audio_format, channels, rate, _, _, bits = fmt
+    if audio_format != 1 or channels != 1 or rate != sample_rate or bits != 16:
+        return None
+    # Headers written to pipes carry a placeholder data size; never read past the file.
+    available = os.path.getsize(file_path) - data_offset
+    if data_size in (0, 0xFFFFFFFF) or data_size > available:
+        data_size = available
+    frame_count = data_size // 2
+    if frame_count <= 0:
+        return None
+    return np.memmap(file_path, dtype='<i2', mode='r', offset=data_offset, shape=(frame_count,))
+
+
+def pipe_wav_range(file_path, start_sec, end_sec, out, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Decodes [start_sec, end_sec] of a media file and writes it to the binary file
+    object `out` as a complete WAV stream, without touching the disk.
+
+    The header is written up front with the exact sample count of the range, so
+    readers that cannot handle the open-ended headers FFmpeg writes to pipes still
+    see a valid file. If FFmpeg delivers slightly fewer samples than expected the
+    stream is padded with silence. `out` is closed when done; a reader that exits
+    early simply ends the copy.
+    """
+    frame_count = int(round((end_sec - start_sec) * sample_rate))
+    remaining = frame_count * 2
+    cmd = _range_command(file_path, start_sec, end_sec, sample_rate)
+    cmd.extend(["-f", "s16le", "-acodec", "pcm_s16le", "pipe:1"])
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        out.write(wav_header(frame_count, sample_rate))
+        while remaining > 0:
+            block = process.stdout.read(min(PIPE_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            out.write(block)
+            remaining -= len(block)
+        # FFmpeg only ends its output early when it is done or has failed.
+        if remaining > 0 and process.wait() != 0:
+            _log(f"[ERROR] FFmpeg failed while streaming {file_path}.")
+            return
+        while remaining > 0:
+            padding = min(PIPE_BLOCK_SIZE, remaining)
+            out.write(b"\0" * padding)
+            remaining -= padding
+    except (BrokenPipeError, OSError):
+        _log("Reader closed the audio pipe early.")
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+        try:
+            out.close()
+        except (BrokenPipeError, OSError):
+            pass
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+"""
+================================================================================
+batch_transcribe.py: Headless batch transcription for SoftWhisper
+================================================================================
+
+Transcribes many files without the GUI, e.g. on servers with no display. Inputs
+may be files, glob patterns or directories (searched for audio/video files).
+Files are processed by a bounded pool of concurrent jobs, sized from the number
+of CPU cores and the memory available for one copy of the model per job. The
+transcription is written as .txt, .srt and/or .json next to each input, or into
+an output directory. Inputs whose outputs are newer than the input are skipped.
+
+Whisper.cpp path and advanced settings default to the ones saved by the GUI in
+config.json.
+
+Usage:
+    python batch_transcribe.py [options] <file|glob|directory> [...]
+    python batch_transcribe.py -m large-v3 -l en -f txt,srt -o out/ recordings/
+================================================================================
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import psutil
+
+from transcriber import (transcribe_with_cache, get_result_cache, get_default_whisper_cpp_path,
+                         resolve_whisper_executable, get_model_path, DEFAULT_ADVANCED_SETTINGS)
+from chunked_transcription import choose_worker_count
+from segment_store import store_from_result
+
+CONFIG_FILE = 'config.json'
+
+# Same extensions as the file picker of the GUI.
+MEDIA_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".wma", ".mp4", ".mov", ".avi", ".mkv"}
+
+OUTPUT_FORMATS = ("txt", "srt", "json")
+
+
+def _log(message: str):
+    print(f"[Batch] {message}", flush=True)
+
+
+def load_gui_config():
+    """
+    Returns the configuration saved by the GUI, or an empty dict.
+    """
+    if not os.path.exists(CONFIG_FILE):
+        return {}
+    try:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        _log(f"Ignoring unreadable {CONFIG_FILE}: {e}")
+        return {}
+
+
+def expand_inputs(inputs, recursive=True):
+    """
+    Expands files, glob patterns and directories into (file_path, root) pairs,
+    where root is the directory that relative output paths are based on.
+    """
+    found = []
+    seen = set()
+
+    def add(path, root):
+        path = os.path.abspath(path)
+        if path not in seen:
+            seen.add(path)
+            found.append((path, root))
+
+    for item in inputs:
+        matches = glob.glob(item, recursive=True) if glob.has_magic(item) else [item]
+        if not matches:
+            _log(f"No match for {item}")
+        for match in sorted(matches):
+            if os.path.isdir(match):
+                root = os.path.abspath(match)
+                for folder, subfolders, files in os.walk(match):
+                    subfolders.sort()
+                    for name in sorted(files):
+                        if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS:
+                            add(os.path.join(folder, name), root)
+                    if not recursive:
+                        break
+            elif os.path.isfile(match):
+                add(match, os.path.dirname(os.path.abspath(match)))
+            else:
+                _log(f"Skipping {match}: not a file or directory")
+    return found
+
+
+def output_base(file_path, root, output_dir=None):
+    """
+    Returns the output path without extension for an input file: next to the
+    input, or at the same relative location inside `output_dir`.
+    """
+    stem = os.path.splitext(file_path)[0]
+    if not output_dir:
+        return stem
+    return os.path.join(os.path.abspath(output_dir), os.path.relpath(stem, root))
+
+
+def is_up_to_date(file_path, base, formats):
+    input_mtime = os.path.getmtime(file_path)
+    for fmt in formats:
+        out_path = f"{base}.{fmt}"
+        if not os.path.exists(out_path) or os.path.getmtime(out_path) < input_mtime:
+            return False
+    return True
+
+
+def _write_atomic(path, content):
+    # Write next to the target and rename, so an interrupted run never leaves
+    # a partial file that would later count as up to date.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_outputs(file_path, base, formats, result, options):
+    store = store_from_result(result)
+    for fmt in formats:
+        if fmt == "txt":
+            content = result.get('text', '')
+        elif fmt == "srt":
+            content = store.to_srt()
+        else:
+            content = json.dumps({
+                'file': file_path,
+                'model': options['model_name'],
+                'language': options['language'],
+                'task': options['task'],
+                'audio_length': result.get('audio_length'),
+                'text': result.get('text', ''),
+                'segments': store.to_records(),
+            }, indent=2, ensure_ascii=False)
+        _write_atomic(f"{base}.{fmt}", content)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Transcribe audio/video files without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="Files, glob patterns or directories")
+    parser.add_argument("-o", "--output-dir", help="Write outputs here instead of next to each input")
+    parser.add_argument("-f", "--formats", default="txt,srt",
+                        help="Comma-separated output formats: txt, srt, json (default: txt,srt)")
+    parser.add_argument("-m", "--model", default="base", help="Whisper model name (default: base)")
+    parser.add_argument("-l", "--language", default="auto", help='Language code or "auto" (default: auto)')
+    parser.add_argument("--task", choices=["transcribe", "translate"], default="transcribe")
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--start-time", default="", help="Start time [hh:mm:ss] for every file")
+    parser.add_argument("--end-time", default="", help="End time [hh:mm:ss] for every file")
+    parser.add_argument("--whisper", help="Whisper.cpp executable, folder or server URL "
+                                          "(default: the one configured in the GUI)")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Concurrent jobs (default: from CPU cores and available memory)")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Split long files into chunks transcribed in parallel")
+    parser.add_argument("--vad", action="store_true",
+                        help="Skip long silences before transcribing")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories")
+    parser.add_argument("--force", action="store_true", help="Transcribe even if outputs are up to date")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    formats = [fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in OUTPUT_FORMATS]
+    if unknown or not formats:
+        _log(f"Unknown output format(s): {', '.join(unknown) or '(none)'}")
+        return 2
+
+    config = load_gui_config()
+    advanced = dict(DEFAULT_ADVANCED_SETTINGS)
+    advanced.update(config.get('advanced', {}))
+    if args.chunked:
+        advanced['chunked'] = True
+    if args.vad:
+        advanced['vad'] = True
+
+    executable = resolve_whisper_executable(
+        args.whisper or config.get('WHISPER_CPP_PATH', get_default_whisper_cpp_path()))
+    model_path = get_model_path(args.model)
+    if not os.path.exists(model_path):
+        _log(f"Model file {model_path} not found. Start the GUI once with this model to download it.")
+        return 2
+
+    jobs = []
+    for file_path, root in expand_inputs(args.inputs, recursive=not args.no_recursive):
+        base = output_base(file_path, root, args.output_dir)
+        if not args.force and is_up_to_date(file_path, base, formats):
+            _log(f"Up to date, skipping: {file_path}")
+            continue
+        jobs.append((file_path, base))
+    if not jobs:
+        _log("Nothing to do.")
+        return 0
+
+    # Size the pool like chunked mode: one model copy and a share of the threads per job.
+    total_threads = max(1, int(psutil.cpu_count(logical=True) * 0.8))
+    workers = choose_worker_count(total_threads, len(jobs), model_path, args.jobs or None)
+    threads_per_job = max(1, total_threads // workers)
+    _log(f"Transcribing {len(jobs)} file(s) with {workers} concurrent job(s) x {threads_per_job} threads.")
+
+    options = {
+        'model_name': args.model,
+        'task': args.task,
+        'language': args.language.strip().lower() or "auto",
+        'beam_size': args.beam_size,
+        'start_time': args.start_time,
+        'end_time': args.end_time,
+        'whisper_executable': executable,
+        'threads': threads_per_job,
+    }
+    options.update(advanced)
+
+    stop_event = threading.Event()
+    cache = get_result_cache(options)
+
+    def run_job(file_path, base):
+        started = time.time()
+        result = transcribe_with_cache(file_path, options, cache=cache, stop_event=stop_event)
+        if result.get('cancelled'):
+            return file_path, None
+        write_outputs(file_path, base, formats, result, options)
+        elapsed = time.time() - started
+        return file_path, (elapsed, result.get('audio_length') or 0.0)
+
+    failures = 0
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(run_job, file_path, base): file_path for file_path, base in jobs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            file_path = futures[future]
+            try:
+                _, timing = future.result()
+            except Exception as e:
+                failures += 1
+                _log(f"[{done}/{len(jobs)}] FAILED {file_path}: {e}")
+                continue
+            if timing is None:
+                _log(f"[{done}/{len(jobs)}] Cancelled {file_path}")
+            else:
+                elapsed, audio_length = timing
+                speed = audio_length / elapsed if elapsed > 0 else 0.0
+                _log(f"[{done}/{len(jobs)}] Done {file_path} ({elapsed:.1f}s, {speed:.1f}x realtime)")
+    except KeyboardInterrupt:
+        _log("Interrupted; stopping running jobs...")
+        stop_event.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        return 130
+    pool.shutdown(wait=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
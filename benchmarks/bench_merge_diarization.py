@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+bench_merge_diarization.py: speaker lookup of merge_diarization() on synthetic data
+
+Compares the original linear scan (first diarization segment containing each
+subtitle's start) with the IntervalIndex maximum-overlap lookup, for growing
+numbers of subtitles (N) and diarization segments (M).
+
+Usage:
+    python benchmarks/bench_merge_diarization.py [--sizes 1000,2000,5000,10000] [--seed 0]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interval_index import IntervalIndex
+
+
+def make_segments(count, rng, speakers=8):
+    # Back-to-back diarization segments with small gaps, like inaSpeechSegmenter output.
+    segments = []
+    t = 0.0
+    for _ in range(count):
+        duration = rng.uniform(0.5, 8.0)
+        segments.append((t, t + duration, rng.randint(1, speakers), "male", "male"))
+        t += duration + rng.uniform(0.0, 0.5)
+    return segments, t
+
+
+def make_entries(count, total, rng):
+    entries = []
+    for _ in range(count):
+        start = rng.uniform(0.0, total)
+        entries.append({'start': start, 'end': start + rng.uniform(0.5, 6.0)})
+    entries.sort(key=lambda e: e['start'])
+    return entries
+
+
+def linear_lookup(entries, segments):
+    # The lookup merge_diarization() used before the interval index.
+    labels = []
+    for entry in entries:
+        label = None
+        for seg_start, seg_end, speaker_num, gender, orig_label in segments:
+            if seg_start <= entry['start'] < seg_end:
+                label = speaker_num
+                break
+        labels.append(label)
+    return labels
+
+
+def indexed_lookup(entries, segments):
+    index = IntervalIndex((seg[0], seg[1], seg[2]) for seg in segments)
+    return [index.best_overlap(entry['start'], entry['end']) for entry in entries]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,2000,5000,10000",
+                        help="Comma-separated sizes; each runs N = M = size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'N x M':>15} {'linear (s)':>12} {'indexed (s)':>12} {'speedup':>9} {'same speaker':>13}")
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        rng = random.Random(args.seed)
+        segments, total = make_segments(size, rng)
+        entries = make_entries(size, total, rng)
+        linear_time, linear_labels = timed(linear_lookup, entries, segments)
+        indexed_time, indexed_labels = timed(indexed_lookup, entries, segments)
+        # The labels differ where a subtitle overlaps another segment more than the one holding its start.
+        same = sum(a == b for a, b in zip(linear_labels, indexed_labels)) / size
+        print(f"{f'{size} x {size}':>15} {linear_time:>12.3f} {indexed_time:>12.4f} "
+              f"{linear_time / indexed_time:>8.0f}x {same:>12.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
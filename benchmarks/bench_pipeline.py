@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+"""
+bench_pipeline.py: stages of the transcription and diarization pipeline on synthetic audio
+
+Generates a recording of the given length with the given number of synthetic
+speakers taking turns, then runs each stage of the pipeline on it and records
+its wall time, peak RSS (this process and its children) and throughput in
+seconds of audio per second:
+
+    decode           AudioSegment.from_file()
+    temp_export      export of the decoded audio to a temporary WAV file
+    whisper          run_whisper() on that file, with fake_whisper_cli.py standing
+                     in for whisper-cli
+    whisper_to_srt   conversion of the segment lines to SRT
+    segment_store    parsing of the segment lines into a SegmentStore and rendering
+                     its plain text and SRT views
+    parse_srt        parsing of that SRT
+    get_embeddings   per-segment speaker embeddings (speaker_tagger)
+    clustering       cluster_embeddings() on those embeddings
+    merge            merge_diarization() of the SRT with the speaker turns
+
+Stages whose dependencies are missing (e.g. inaSpeechSegmenter for the speaker
+stages) are reported as skipped. The results are written as JSON together with
+the current commit, so runs can be compared across commits with --compare.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--duration 600] [--speakers 4] [--output results.json]
+    python benchmarks/bench_pipeline.py --compare old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+import psutil
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+FAKE_WHISPER_CLI = os.path.join(BENCH_DIR, "fake_whisper_cli.py")
+SAMPLE_RATE = 16000
+
+# Interval at which the resident memory is sampled during a stage (seconds).
+RSS_SAMPLE_INTERVAL = 0.01
+
+
+def _log(message: str):
+    print(f"[DEBUG Bench] {message}", file=sys.stderr)
+
+
+# --- Synthetic audio ---
+def speaker_turns(duration, speakers, rng):
+    """
+    Returns (start, end, speaker) turns covering `duration` seconds, with short
+    pauses between them and no speaker talking twice in a row.
+    """
+    turns = []
+    t = 0.0
+    speaker = 0
+    while t < duration:
+        length = min(duration - t, rng.uniform(2.0, 12.0))
+        turns.append((t, t + length, speaker))
+        t += length + rng.uniform(0.1, 0.8)
+        if speakers > 1:
+            speaker = (speaker + rng.integers(1, speakers)) % speakers
+    return turns
+
+
+def synthesize(path, duration, speakers, seed=0):
+    """
+    Writes a 16 kHz mono WAV file in which each speaker is a voice-like harmonic
+    tone with its own pitch and formants, modulated at a syllable rate.
+
+    Returns the speaker turns (see speaker_turns()).
+    """
+    rng = np.random.default_rng(seed)
+    turns = speaker_turns(duration, speakers, rng)
+    pitches = np.linspace(100.0, 260.0, max(1, speakers))
+    total = int(duration * SAMPLE_RATE)
+    with wave.open(path, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        written = 0
+        for start, end, speaker in turns:
+            first, last = int(start * SAMPLE_RATE), min(total, int(end * SAMPLE_RATE))
+            if first > written:
+                out.writeframes((rng.normal(0, 20, first - written)).astype(np.int16).tobytes())
+            t = np.arange(last - first) / SAMPLE_RATE
+            pitch = pitches[speaker] * (1.0 + 0.03 * np.sin(2 * np.pi * 0.7 * t))
+            phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+            voice = sum(np.sin(k * phase) / k ** (1.0 + 0.3 * speaker / max(1, speakers)) for k in range(1, 8))
+            envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4.0 * t + speaker)
+            samples = voice * envelope * 6000 + rng.normal(0, 200, len(t))
+            out.writeframes(np.clip(samples, -32768, 32767).astype(np.int16).tobytes())
+            written = last
+        if total > written:
+            out.writeframes(np.zeros(total - written, dtype=np.int16).tobytes())
+    return turns
+
+
+# --- Measurement ---
+class StageRecorder:
+    """
+    Runs benchmark stages and collects their measurements.
+    """
+    def __init__(self, audio_seconds):
+        self.audio_seconds = audio_seconds
+        self.process = psutil.Process()
+        self.results = []
+
+    def _rss(self):
+        total = 0
+        for process in [self.process] + self.process.children(recursive=True):
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+
+    def run(self, name, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) as stage `name` and returns its result, or
+        None when it failed (the failure is recorded).
+        """
+        peak = [self._rss()]
+        baseline = peak[0]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(RSS_SAMPLE_INTERVAL):
+                peak[0] = max(peak[0], self._rss())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        error = None
+        result = None
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - started
+        done.set()
+        sampler.join()
+        peak[0] = max(peak[0], self._rss())
+
+        entry = {
+            'stage': name,
+            'wall_s': round(elapsed, 4),
+            'peak_rss_mb': round(peak[0] / 1048576, 1),
+            'rss_growth_mb': round((peak[0] - baseline) / 1048576, 1),
+            'audio_s_per_s': round(self.audio_seconds / elapsed, 1) if elapsed > 0 else None,
+        }
+        if error:
+            entry['error'] = error
+            _log(f"[ERROR] Stage {name} failed: {error}")
+        self.results.append(entry)
+        return result
+
+    def skip(self, name, reason):
+        _log(f"Skipping {name}: {reason}")
+        self.results.append({'stage': name, 'skipped': reason})
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+# --- Stages ---
+def run_stages(args, work_dir):
+    audio_path = os.path.join(work_dir, "synthetic.wav")
+    _log(f"Generating {args.duration:.0f}s of audio with {args.speakers} speakers...")
+    turns = synthesize(audio_path, args.duration, args.speakers, args.seed)
+    recorder = StageRecorder(args.duration)
+
+    from pydub import AudioSegment
+    audio = recorder.run("decode", AudioSegment.from_file, audio_path)
+
+    wav_path = os.path.join(work_dir, "export.wav")
+    if audio is not None:
+        recorder.run("temp_export", lambda: audio.export(wav_path, format="wav").close())
+    else:
+        recorder.skip("temp_export", "decode failed")
+    del audio
+
+    from whisper_runner import build_whisper_command, run_whisper
+    cmd = build_whisper_command(sys.executable, "fake-model.bin", wav_path)
+    # Run the stub with this interpreter, whatever the platform.
+    cmd = [sys.executable, FAKE_WHISPER_CLI] + cmd[1:]
+    output = recorder.run("whisper", run_whisper, cmd) if os.path.exists(wav_path) else None
+    raw = "".join(output['stdout_lines']).strip() if output else ""
+
+    from subtitles import whisper_to_srt
+    srt = recorder.run("whisper_to_srt", whisper_to_srt, raw) or ""
+
+    from segment_store import SegmentStore
+
+    def render_views():
+        store = SegmentStore.from_whisper_output(raw)
+        return store.to_plain(), store.to_srt()
+
+    recorder.run("segment_store", render_views)
+
+    segments = [(start, end, speaker + 1, "male", "male") for start, end, speaker in turns]
+    try:
+        from diarization_gui import parse_srt, merge_diarization
+        import speaker_tagger
+    except ImportError as e:
+        for name in ("parse_srt", "get_embeddings", "clustering", "merge"):
+            recorder.skip(name, f"missing dependency: {e}")
+    else:
+        recorder.run("parse_srt", parse_srt, srt)
+        embeddings = recorder.run(
+            "get_embeddings",
+            lambda: np.array([speaker_tagger.get_embeddings(audio_path, start, end, "male")
+                              for start, end, _, _, _ in segments]))
+        if embeddings is not None:
+            from speaker_clustering import cluster_embeddings
+            recorder.run("clustering", cluster_embeddings, embeddings)
+        else:
+            recorder.skip("clustering", "no embeddings")
+        recorder.run("merge", merge_diarization, None, srt, diarization_segments=segments)
+
+    return {
+        'commit': git_commit(),
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': psutil.cpu_count(logical=True),
+        'config': {'duration_s': args.duration, 'speakers': args.speakers, 'seed': args.seed,
+                   'speaker_turns': len(turns), 'subtitles': srt.count(" --> ")},
+        'stages': recorder.results,
+    }
+
+
+# --- Reporting ---
+def print_table(report):
+    print(f"commit {report.get('commit')}, {report['config']['duration_s']:.0f}s of audio, "
+          f"{report['config']['speakers']} speakers")
+    print(f"{'stage':<16} {'wall (s)':>10} {'peak RSS (MB)':>14} {'audio s/s':>11}")
+    for stage in report['stages']:
+        if 'skipped' in stage:
+            print(f"{stage['stage']:<16} skipped ({stage['skipped']})")
+            continue
+        note = "  FAILED" if 'error' in stage else ""
+        print(f"{stage['stage']:<16} {stage['wall_s']:>10.3f} {stage['peak_rss_mb']:>14.1f} "
+              f"{stage['audio_s_per_s'] or 0:>11.1f}{note}")
+
+
+def print_comparison(old, new):
+    print(f"{'stage':<16} {'old (s)':>10} {'new (s)':>10} {'change':>8}  "
+          f"(commit {old.get('commit')} -> {new.get('commit')})")
+    old_stages = {stage['stage']: stage for stage in old['stages'] if 'wall_s' in stage}
+    for stage in new['stages']:
+        before = old_stages.get(stage['stage'])
+        if before is None or 'wall_s' not in stage:
+            continue
+        change = (stage['wall_s'] / before['wall_s'] - 1.0) if before['wall_s'] > 0 else 0.0
+        print(f"{stage['stage']:<16} {before['wall_s']:>10.3f} {stage['wall_s']:>10.3f} {change:>+8.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=600.0, help="Length of the synthetic audio in seconds")
+    parser.add_argument("--speakers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument("--compare", metavar="OLD_JSON",
+                        help="Compare this run (or the --output file, with --no-run) against an earlier one")
+    parser.add_argument("--no-run", action="store_true", help="With --compare, compare --output without running")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"pipeline-{git_commit() or 'unknown'}.json")
+    if args.no_run:
+        with open(output, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    else:
+        with tempfile.TemporaryDirectory(prefix="softwhisper-bench-") as work_dir:
+            report = run_stages(args, work_dir)
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print_table(report)
+        print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
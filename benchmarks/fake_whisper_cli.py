@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+fake_whisper_cli.py: stand-in for whisper-cli used by the benchmarks
+
+Accepts the whisper-cli command line SoftWhisper builds ("-f -" reads a WAV
+stream from stdin), and prints one timestamped segment line per SEGMENT_LENGTH
+seconds of audio, like whisper-cli does. With -of it also writes the segments
+to "<base>.json" in whisper-cli's layout (with per-token probabilities for
+-ojf), and with -pp it prints progress lines to stderr. Set FAKE_WHISPER_RTF
+to a real-time factor (e.g. 0.05) to make it take that long per second of
+audio, imitating a model of a given speed.
+"""
+
+import io
+import json
+import os
+import sys
+import time
+import wave
+
+SEGMENT_LENGTH = 5.0
+
+
+def _timestamp(seconds):
+    ms = int(round(seconds * 1000))
+    hours, rest = divmod(ms, 3600000)
+    minutes, rest = divmod(rest, 60000)
+    secs, ms = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{ms:03d}"
+
+
+def _option(argv, flag):
+    return argv[argv.index(flag) + 1] if flag in argv else None
+
+
+def write_json(path, segments, full):
+    transcription = []
+    for start, end, text in segments:
+        entry = {
+            'timestamps': {'from': _timestamp(start).replace('.', ','), 'to': _timestamp(end).replace('.', ',')},
+            'offsets': {'from': int(round(start * 1000)), 'to': int(round(end * 1000))},
+            'text': f" {text}",
+        }
+        if full:
+            entry['tokens'] = [{'text': f" {word}", 'p': 0.9} for word in text.split()]
+        transcription.append(entry)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'systeminfo': "fake", 'model': {'type': "fake"}, 'params': {},
+                   'result': {'language': "en"}, 'transcription': transcription}, f, indent=2)
+
+
+def main(argv):
+    if "-f" not in argv:
+        sys.stderr.write("error: no input file (-f)\n")
+        return 1
+    audio = argv[argv.index("-f") + 1]
+    source = io.BytesIO(sys.stdin.buffer.read()) if audio == "-" else audio
+    with wave.open(source) as wav:
+        duration = wav.getnframes() / float(wav.getframerate())
+    rtf = float(os.environ.get("FAKE_WHISPER_RTF", "0") or 0)
+
+    sys.stderr.write(f"fake_whisper_cli: processing {duration:.1f}s of audio\n")
+    segments = []
+    start = 0.0
+    while start < duration:
+        end = min(duration, start + SEGMENT_LENGTH)
+        if rtf:
+            time.sleep((end - start) * rtf)
+        text = f"Segment {len(segments) + 1} of the benchmark."
+        segments.append((start, end, text))
+        sys.stdout.write(f"[{_timestamp(start)} --> {_timestamp(end)}]   {text}\n")
+        sys.stdout.flush()
+        if "-pp" in argv:
+            sys.stderr.write(f"whisper_print_progress_callback: progress = {int(100 * end / duration)}%\n")
+        start = end
+
+    output_base = _option(argv, "-of")
+    if output_base:
+        write_json(output_base + ".json", segments, "-ojf" in argv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,216 @@
+"""
+chunked_transcription.py
+
+Parallel chunked transcription for long recordings.
+
+The requested time range is split into chunks of about MAX_CHUNK_DURATION
+seconds. Each split point is moved to the quietest moment shortly before the
+nominal boundary, so that words are not cut in half. The chunks are then
+transcribed by several whisper-cli processes at once, with the available
+threads divided between them, and the segment lines are stitched back together
+in order with their timestamps shifted onto the timeline of the full range.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import psutil
+
+from audio_decode import WHISPER_SAMPLE_RATE, read_pcm
+from whisper_runner import SEGMENT_LINE_PATTERN, shift_segment_line
+
+# Maximum duration per chunk in seconds
+MAX_CHUNK_DURATION = 120
+
+# How far before a nominal chunk boundary to look for a quiet split point (seconds).
+SPLIT_SEARCH_WINDOW = 15.0
+
+# Length of the analysis frames used to find the quietest split point (milliseconds).
+SPLIT_FRAME_MS = 50
+
+# Minimum whisper-cli threads per worker; fewer than this makes each worker too slow.
+MIN_THREADS_PER_WORKER = 4
+
+
+def _log(message: str):
+    print(f"[DEBUG Chunker] {message}")
+
+
+def quietest_time(samples, sample_rate, window_start, frame_ms=SPLIT_FRAME_MS):
+    """
+    Returns the time (in seconds) of the centre of the quietest frame in
+    `samples`, a mono sample array starting at `window_start` seconds. Later
+    frames win ties, which keeps chunks close to their nominal length.
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    frame_count = len(samples) // frame_len
+    if frame_count == 0:
+        return None
+    frames = np.asarray(samples[:frame_count * frame_len], dtype=np.float64).reshape(frame_count, frame_len)
+    energy = np.mean(frames * frames, axis=1)
+    best = frame_count - 1 - int(np.argmin(energy[::-1]))
+    return window_start + (best + 0.5) * frame_len / sample_rate
+
+
+def find_quiet_point(audio, window_start, window_end, frame_ms=SPLIT_FRAME_MS):
+    """
+    Returns the time (in seconds) of the quietest frame of a pydub AudioSegment
+    between `window_start` and `window_end`.
+    """
+    window = audio[int(window_start * 1000):int(window_end * 1000)].set_channels(1)
+    samples = np.array(window.get_array_of_samples())
+    best_time = quietest_time(samples, window.frame_rate, window_start, frame_ms)
+    return window_end if best_time is None else best_time
+
+
+def find_quiet_point_in_file(file_path, window_start, window_end, frame_ms=SPLIT_FRAME_MS):
+    """
+    Same as find_quiet_point(), but decodes only the window from a media file with FFmpeg.
+    """
+    samples = read_pcm(file_path, window_start, window_end)
+    best_time = quietest_time(samples, WHISPER_SAMPLE_RATE, window_start, frame_ms)
+    return window_end if best_time is None else best_time
+
+
+def plan_chunks(start_sec, end_sec, quiet_point=None, max_chunk=MAX_CHUNK_DURATION,
+                search_window=SPLIT_SEARCH_WINDOW):
+    """
+    Splits [start_sec, end_sec] into consecutive (start, end) chunks of at most
+    `max_chunk` seconds.
+
+    Parameters:
+        quiet_point (callable, optional): quiet_point(window_start, window_end) returns
+            the preferred split time inside the window. When omitted, chunks are cut at
+            exactly `max_chunk` seconds.
+    """
+    chunks = []
+    current = start_sec
+    while end_sec - current > max_chunk:
+        nominal = current + max_chunk
+        split = nominal
+        if quiet_point is not None:
+            window_start = max(current + max_chunk / 2, nominal - search_window)
+            split = quiet_point(window_start, nominal)
+            if not (current < split <= nominal):
+                split = nominal
+        chunks.append((current, split))
+        current = split
+    if end_sec > current:
+        chunks.append((current, end_sec))
+    return chunks
+
+
+def choose_worker_count(total_threads, chunk_count, model_path=None, requested=None):
+    """
+    Decides how many whisper-cli processes to run at once.
+
+    Each worker loads its own copy of the model, so the count is also capped by
+    the memory that is currently available.
+    """
+    if requested:
+        workers = int(requested)
+    else:
+        workers = max(1, total_threads // MIN_THREADS_PER_WORKER)
+    if model_path and os.path.exists(model_path):
+        # Leave headroom for the compute buffers allocated next to the weights.
+        per_worker = os.path.getsize(model_path) * 1.5
+        available = psutil.virtual_memory().available
+        workers = min(workers, max(1, int(available // per_worker)))
+    return max(1, min(workers, chunk_count))
+
+
+def transcribe_chunks(chunks, range_start, transcribe_range, workers, total_threads,
+                      progress_callback=None, stop_event=None, segment_callback=None):
+    """
+    Transcribes `chunks` with several whisper-cli workers and stitches the output.
+
+    Parameters:
+        chunks (list): (start, end) pairs in seconds, as returned by plan_chunks().
+        range_start (float): Start of the transcribed range; output timestamps are
+            relative to it, like a single-process run over the whole range.
+        transcribe_range (callable): transcribe_range(start, end, threads, timestamp_callback)
+            runs whisper-cli on one chunk and returns the dict of run_whisper().
+        workers (int): Number of chunks transcribed at once (see choose_worker_count()).
+        total_threads (int): whisper-cli threads to divide between the workers.
+        progress_callback (callable, optional): Called with (progress, message), where
+            progress is combined over all chunks.
+        stop_event (threading.Event, optional): Cancels running and pending chunks.
+        segment_callback (callable, optional): Called with every (shifted) segment line.
+            Chunks finish out of order, so lines are released chunk by chunk once all
+            earlier chunks are done, keeping the callback chronological.
+
+    Returns:
+        dict: 'stdout_lines' (list of str) in chronological order, 'stderr' (str),
+            'returncode' (that of the first failed chunk, else 0) and 'store', the
+            chunks' SegmentStores joined, or None unless every chunk had one.
+    """
+    threads_per_worker = max(1, total_threads // workers)
+    _log(f"Transcribing {len(chunks)} chunks with {workers} workers x {threads_per_worker} threads.")
+
+    total_duration = max(0.001, sum(end - start for start, end in chunks))
+    chunk_progress = [0.0] * len(chunks)
+    progress_lock = threading.Lock()
+
+    def report(index, position):
+        if not progress_callback:
+            return
+        with progress_lock:
+            chunk_progress[index] = position
+            done = sum(chunk_progress)
+        progress = int(max(0.0, min(100.0, done / total_duration * 100)))
+        progress_callback(progress, f"Transcribing: {progress}%")
+
+    finished = {}
+    next_to_release = [0]
+    release_lock = threading.Lock()
+
+    def release(index, lines):
+        if not segment_callback:
+            return
+        with release_lock:
+            finished[index] = lines
+            while next_to_release[0] in finished:
+                for line in finished.pop(next_to_release[0]):
+                    if SEGMENT_LINE_PATTERN.match(line):
+                        segment_callback(line)
+                next_to_release[0] += 1
+
+    def run_chunk(index):
+        chunk_start, chunk_end = chunks[index]
+        if stop_event and stop_event.is_set():
+            release(index, [])
+            return {'stdout_lines': [], 'stderr': "", 'returncode': None}
+        length = chunk_end - chunk_start
+        output = transcribe_range(
+            chunk_start, chunk_end, threads_per_worker,
+            lambda t: report(index, min(t, length))
+        )
+        report(index, length)
+        offset = chunk_start - range_start
+        output['stdout_lines'] = [shift_segment_line(line, offset) for line in output['stdout_lines']]
+        if output.get('store') is not None:
+            output['store'].shift(int(round(offset * 1000)))
+        release(index, output['stdout_lines'])
+        return output
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outputs = list(pool.map(run_chunk, range(len(chunks))))
+
+    stdout_lines = []
+    stderr_parts = []
+    returncode = next((output['returncode'] for output in outputs
+                       if output.get('returncode') not in (0, None)), 0)
+    store = outputs[0].get('store') if outputs else None
+    for index, output in enumerate(outputs):
+        stdout_lines.extend(line if line.endswith("\n") else line + "\n"
+                            for line in output['stdout_lines'])
+        stderr_parts.append(output['stderr'])
+        if index and store is not None:
+            if output.get('store') is None:
+                store = None
+            else:
+                store.extend(output['store'])
+    return {'stdout_lines': stdout_lines, 'stderr': "".join(stderr_parts), 'returncode': returncode,
+            'store': store}
@@ -0,0 +1,238 @@
+"""
+console_sink.py
+
+Batching sink between the threads that print and the GUI console.
+
+Worker threads write console output to a ConsoleSink instead of putting one
+queue item per message. The sink keeps the lines written since the last redraw
+in a bounded buffer; when output arrives faster than the GUI redraws (e.g. the
+per-segment logging of speaker_tagger during diarization), debug lines are
+dropped first and counted, so warnings and errors are never lost to a flood.
+The GUI calls drain() once per tick and inserts everything in one edit, and
+skips the redraw entirely when nothing changed.
+
+LatestProgress does the same for progress updates: only the most recent value
+is kept, so a burst of updates costs one redraw.
+
+ConsoleLog holds the console history: a ring buffer of the last
+HISTORY_CAPACITY lines, which console_view.ConsoleView draws from, while every
+line written to the sink (dropped debug lines included) also goes to a rotating
+log file on disk. Memory use stays flat however long the application runs, and
+the full log is still there after a crash.
+"""
+
+import collections
+import logging
+import sys
+import threading
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+# Lines kept between two redraws before debug lines are dropped.
+PENDING_CAPACITY = 1000
+
+# Lines of console history kept in memory.
+HISTORY_CAPACITY = 5000
+
+LOG_FILE = Path("./logs/softwhisper.log")
+
+# Size at which the log file is rotated (bytes), and the number of old files kept.
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+
+def message_level(text):
+    """
+    Guesses the level of a console message from the markers the modules print
+    ("[DEBUG X] [ERROR] ...", "[WARN] ...", "DEBUG: ...", "Error ..."). Debug
+    lines that merely quote an exception message stay debug lines.
+    """
+    if "[ERROR]" in text or "Traceback" in text or text.startswith("Error"):
+        return ERROR
+    if "[WARN" in text:
+        return WARNING
+    if text.startswith("[DEBUG") or text.startswith("DEBUG:"):
+        return DEBUG
+    return INFO
+
+
+class ConsoleSink:
+    """
+    Thread-safe buffer of console lines waiting to be drawn. With a ConsoleLog,
+    every message is also written to its log file as it arrives.
+    """
+    def __init__(self, capacity=PENDING_CAPACITY, log=None):
+        self.capacity = capacity
+        self.log = log
+        self._lock = threading.Lock()
+        self._pending = []
+        self._cleared = False
+        self._dropped = 0
+
+    def write(self, text, level=None):
+        """
+        Adds a message, as one line. Blank messages are ignored.
+        """
+        if not text or not text.strip():
+            return
+        if level is None:
+            level = message_level(text.lstrip())
+        if not text.endswith("\n"):
+            text += "\n"
+        if self.log is not None:
+            self.log.spill(level, text)
+        with self._lock:
+            if len(self._pending) >= self.capacity:
+                if level <= DEBUG:
+                    self._dropped += 1
+                    return
+                self._make_room()
+            self._pending.append((level, text))
+
+    def _make_room(self):
+        # Drop every pending debug line at once, or the oldest line when there are none.
+        kept = [entry for entry in self._pending if entry[0] > DEBUG]
+        self._dropped += len(self._pending) - len(kept)
+        if len(kept) >= self.capacity:
+            kept.pop(0)
+            self._dropped += 1
+        self._pending = kept
+
+    def clear(self):
+        """
+        Discards the pending lines and asks the GUI to empty the console.
+        """
+        with self._lock:
+            self._pending = []
+            self._dropped = 0
+            self._cleared = True
+
+    def drain(self):
+        """
+        Returns (cleared, lines) with everything written since the last call, or
+        None when nothing changed. `lines` is a list of strings ending in "\\n".
+        """
+        with self._lock:
+            if not self._pending and not self._cleared and not self._dropped:
+                return None
+            pending, self._pending = self._pending, []
+            cleared, self._cleared = self._cleared, False
+            dropped, self._dropped = self._dropped, 0
+        lines = [line for _, line in pending]
+        if dropped:
+            lines.append(f"[{dropped} console messages dropped from the view]\n")
+        return cleared, lines
+
+
+class LatestProgress:
+    """
+    Holds the most recent (percentage, message) progress update. A later update
+    without a message keeps the previous message.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+
+    def put(self, update):
+        percentage, message = update
+        with self._lock:
+            if not message and self._value is not None:
+                message = self._value[1]
+            self._value = (percentage, message)
+
+    def take(self):
+        """
+        Returns the latest update and forgets it, or None when there was none.
+        """
+        with self._lock:
+            value, self._value = self._value, None
+        return value
+
+
+class ConsoleLog:
+    """
+    Console history: the last `capacity` lines in memory, and every line in a
+    rotating log file (none when `log_file` is None).
+
+    Lines are numbered from the start of the session; `start` is the number of
+    the oldest line still in memory and `end` the number after the newest.
+    extend(), clear() and window() are meant for the GUI thread; spill() may be
+    called from any thread.
+    """
+    def __init__(self, capacity=HISTORY_CAPACITY, log_file=LOG_FILE, max_bytes=LOG_MAX_BYTES,
+                 backup_count=LOG_BACKUPS):
+        self._lines = collections.deque(maxlen=capacity)
+        self.start = 0
+        # Changes whenever the history is cleared.
+        self.generation = 0
+        self._logger = None
+        self._spilling = threading.local()
+        if log_file:
+            try:
+                Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                              encoding='utf-8', delay=True)
+            except OSError as e:
+                # Not printed: stdout may already be redirected to the console.
+                sys.__stderr__.write(f"[DEBUG ConsoleLog] [WARN] Not writing a log file: {e}\n")
+            else:
+                handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(message)s"))
+                # Not registered with logging.getLogger(), so other loggers never reach it.
+                self._logger = logging.Logger("softwhisper.console", logging.DEBUG)
+                self._logger.addHandler(handler)
+
+    def __len__(self):
+        return len(self._lines)
+
+    @property
+    def end(self):
+        return self.start + len(self._lines)
+
+    def spill(self, level, text):
+        """
+        Writes a message to the log file.
+        """
+        # A failing handler reports to sys.stderr, which may lead straight back here.
+        if self._logger is None or getattr(self._spilling, 'active', False):
+            return
+        self._spilling.active = True
+        try:
+            self._logger.log(level, text.rstrip("\n"))
+        finally:
+            self._spilling.active = False
+
+    def extend(self, texts):
+        """
+        Adds texts to the history, one entry per line. The oldest lines are
+        forgotten once the buffer is full.
+        """
+        for text in texts:
+            for line in text.splitlines():
+                if len(self._lines) == self._lines.maxlen:
+                    self.start += 1
+                self._lines.append(line)
+
+    def clear(self):
+        self.start = self.end
+        self._lines.clear()
+        self.generation += 1
+
+    def window(self, first, count):
+        """
+        Returns the lines numbered first to first + count - 1 that are still in memory.
+        """
+        first = max(first, self.start)
+        last = min(first + count, self.end)
+        return [self._lines[number - self.start] for number in range(first, last)]
+
+    def close(self):
+        if self._logger is not None:
+            for handler in list(self._logger.handlers):
+                self._logger.removeHandler(handler)
+                handler.close()
+            self._logger = None
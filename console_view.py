@@ -0,0 +1,98 @@
+"""
+console_view.py
+
+Console widget that draws only the visible lines of a ConsoleLog.
+
+The Text widget never holds more than one screen of lines: the scrollbar is
+driven by the position in the ConsoleLog rather than by the widget's contents,
+and scrolling or new output replaces the few lines shown. Drawing therefore
+costs the same with five thousand lines of history as with five, and nothing
+has to be trimmed from the widget. While the view is scrolled to the bottom it
+follows new output; scrolled up, it stays on the lines being read.
+"""
+
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+# Lines moved by one step of the mouse wheel.
+WHEEL_LINES = 3
+
+
+class ConsoleView(tk.Frame):
+    """
+    Read-only, virtualized view of a console_sink.ConsoleLog.
+    """
+    def __init__(self, master, console_log, height=5, width=80, font=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.console_log = console_log
+        self.rows = height
+        # Number of the first line shown, and whether the view follows new output.
+        self.top = 0
+        self.follow = True
+        self._drawn = None
+
+        self.text = tk.Text(self, height=height, width=width, wrap="none", state=tk.DISABLED, font=font)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.xscrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.config(xscrollcommand=self.xscrollbar.set)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.xscrollbar.grid(row=1, column=0, sticky="ew")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self._line_height = max(1, tkfont.Font(font=self.text.cget("font")).metrics("linespace"))
+        self.text.bind("<Configure>", self._on_resize)
+        self.text.bind("<MouseWheel>", self._on_wheel)
+        self.text.bind("<Button-4>", lambda event: self._on_wheel(event, -1))
+        self.text.bind("<Button-5>", lambda event: self._on_wheel(event, 1))
+
+    def refresh(self):
+        """
+        Redraws the view if the lines it should show have changed.
+        """
+        log = self.console_log
+        if self.follow or self.top < log.start:
+            self.top = max(log.start, log.end - self.rows) if self.follow else log.start
+        lines = log.window(self.top, self.rows)
+        total = max(1, len(log))
+        self.scrollbar.set((self.top - log.start) / total, (self.top - log.start + len(lines)) / total)
+
+        drawn = (log.generation, self.top, len(lines))
+        if drawn == self._drawn:
+            return
+        self._drawn = drawn
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.text.config(state=tk.DISABLED)
+
+    def scroll_to(self, top):
+        log = self.console_log
+        last_top = max(log.start, log.end - self.rows)
+        self.top = min(max(log.start, int(top)), last_top)
+        self.follow = self.top >= last_top
+        self.refresh()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(self.console_log.start + float(amount) * len(self.console_log))
+        elif action == tk.SCROLL:
+            step = self.rows if unit == tk.PAGES else 1
+            self.scroll_to(self.top + int(amount) * step)
+
+    def _on_wheel(self, event, direction=None):
+        if direction is None:
+            if not event.delta:
+                return "break"
+            # Windows reports multiples of 120 per notch, macOS small integers.
+            direction = -1 if event.delta > 0 else 1
+        self.scroll_to(self.top + direction * WHEEL_LINES)
+        return "break"
+
+    def _on_resize(self, event):
+        rows = max(1, event.height // self._line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.refresh()
@@ -13,13 +13,23 @@ and speaker_tagger.py.
 """
 
 import re
+import threading
+from concurrent.futures import Future
 from pathlib import Path
 import tkinter as tk
 from tkinter import BooleanVar, Checkbutton
 
 import speaker_tagger  # API for speaker segmentation and clustering
+import speaker_embeddings
+import audio_cache
+from segment_store import SegmentStore
 import diarizer_core_types  # Core types for transcription and subtitles (if needed)
 
+# Tagger reused across files; its segmentation model stays loaded in speaker_tagger.
+# Jobs may run at the same time, so per-job settings are passed to each call
+# rather than set on it.
+_tagger = None
+
 
 class DiarizationOption:
     """
@@ -32,6 +42,13 @@ class DiarizationOption:
         self.var = BooleanVar(value=False)
         self.checkbox = Checkbutton(parent, text="Identify speakers (warning: increases processing time)", variable=self.var, font=("Arial", 10))
         # Do not call pack() here; let the parent manage placement.
+        # Unticking the option frees the segmentation model kept loaded between files.
+        self.var.trace("w", self._on_toggle)
+
+    def _on_toggle(self, *args):
+        if not self.var.get():
+            # A diarization run in progress holds the model; release it once that run ends.
+            threading.Thread(target=release_diarization_model, daemon=True).start()
 
     def is_enabled(self):
         return self.var.get()
@@ -90,75 +107,109 @@ def parse_srt(srt_content):
     return entries
 
 
-def merge_diarization(file_path, srt_content, remove_timestamps=False, progress_callback=None):
+def diarize_file(file_path, workers=None, progress_callback=None, exact_clustering_limit=None,
+                 audio_cache_max_mb=None):
+    """
+    Runs speaker segmentation and clustering on an audio/video file.
+
+    Parameters:
+        workers (int, optional): Number of processes computing speaker embeddings
+            (None or 0 = 80% of the logical cores).
+        progress_callback (callable, optional): Called with (progress, message) as
+            the segmentation, embedding and clustering stages start.
+        exact_clustering_limit (int, optional): Segment count above which speakers
+            are clustered in two stages (default: speaker_clustering.EXACT_LIMIT).
+        audio_cache_max_mb (int, optional): Size cap of the decoded audio cache.
+
+    Returns:
+        list: (start, end, speaker_number, gender, orig_label) tuples.
+    """
+    global _tagger
+    if _tagger is None:
+        _tagger = speaker_tagger.SpeakerTagger()
+    # Work on the cached 16 kHz mono WAV, which is decoded only once per file
+    # and can be memory-mapped for the embeddings.
+    if progress_callback:
+        progress_callback(0, "Decoding audio...")
+    max_bytes = int(audio_cache_max_mb * 1024 * 1024) if audio_cache_max_mb else audio_cache.DEFAULT_MAX_BYTES
+    audio_path = speaker_tagger.extract_audio(Path(file_path), max_bytes)
+    return _tagger.process_audio(audio_path, progress_callback=progress_callback, workers=workers,
+                                 exact_clustering_limit=exact_clustering_limit)
+
+
+def diarize_in_background(file_path, workers=None, progress_callback=None, exact_clustering_limit=None,
+                          audio_cache_max_mb=None):
+    """
+    Starts diarize_file() on a background thread, e.g. while Whisper transcribes
+    the same file, and returns a concurrent.futures.Future for its segments.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(diarize_file(file_path, workers, progress_callback, exact_clustering_limit,
+                                           audio_cache_max_mb))
+        except BaseException as e:
+            # speaker_tagger exits on failure; report that through the future instead.
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def release_diarization_model():
+    """
+    Frees the memory held by the speaker segmentation model and the embedding
+    worker processes between runs.
+    """
+    speaker_tagger.release_segmenter()
+    speaker_embeddings.shutdown_pool()
+
+
+def merge_diarization(file_path, srt_content, remove_timestamps=False, progress_callback=None,
+                      diarization_segments=None, store=None):
     """
     Processes diarization on the provided audio file and merges speaker information into the given SRT content.
     
     Parameters:
         file_path (str): The path to the audio file.
-        srt_content (str): The SRT content generated from Whisper.
+        srt_content (str): The SRT content generated from Whisper. Ignored when `store` is given.
         remove_timestamps (bool): If True, the final output will not include the original segment numbers or timestamp lines.
                                   If False, the original SRT formatting (segment numbers and timestamps) is preserved.
         progress_callback (callable, optional): A function to report progress updates. It should accept two parameters:
             progress (int) and message (str).
+        diarization_segments (list, optional): Segments previously returned by diarize_file() for this file
+            (e.g. from the result cache). When given, diarization is not run again.
+        store (SegmentStore, optional): The transcription's segments. When given, no SRT is parsed; the
+            speakers are assigned in the store itself.
     
     Returns:
         str: The merged output with speaker labels.
     """
-    import time
-    import re
-    from pathlib import Path
-
     if progress_callback:
         progress_callback(0, "Starting diarization merge...")
     
     # Obtain diarization segments using the speaker tagger.
-    import speaker_tagger
-    tagger = speaker_tagger.SpeakerTagger()
-    diarization_segments = tagger.process_audio(Path(file_path))
+    if diarization_segments is None:
+        diarization_segments = diarize_file(file_path)
     if progress_callback:
         progress_callback(30, "Diarization segmentation complete.")
     
-    # Parse the SRT content into entries.
-    srt_entries = parse_srt(srt_content)
-    if progress_callback:
-        progress_callback(50, "Parsed SRT entries.")
-    
-    # For each SRT entry, determine the corresponding speaker segment and prepend the speaker label.
-    merged_entries = []
-    for entry in srt_entries:
-        speaker_label = "[Speaker Unknown]: "
-        # Each diarization segment is expected to be a tuple:
-        # (start, end, speaker_number, gender, orig_label)
-        for seg in diarization_segments:
-            seg_start, seg_end, speaker_num, gender, orig_label = seg
-            if seg_start <= entry['start'] < seg_end:
-                speaker_label = f"[Speaker {speaker_num}]: "
-                break
-        new_text = f"{speaker_label}{entry['text']}"
-        # Only include timestamps if remove_timestamps is False.
-        timestamp_line = f"{entry['start_str']} --> {entry['end_str']}" if not remove_timestamps else ""
-        merged_entries.append({
-            'index': entry['index'],
-            'timestamp': timestamp_line,
-            'text': new_text
-        })
+    if store is None:
+        # Parse the SRT content into entries.
+        store = SegmentStore.from_srt_entries(parse_srt(srt_content))
+        if progress_callback:
+            progress_callback(50, "Parsed SRT entries.")
     
+    # Label each segment with the speaker whose segments overlap it the longest in total.
+    store.assign_speakers(diarization_segments)
     if progress_callback:
         progress_callback(80, "Merged speaker labels with SRT entries.")
     
-    # Rebuild the output.
-    srt_lines = []
-    for entry in merged_entries:
-        # Only include segment numbers and timestamps if subtitles are enabled.
-        if not remove_timestamps:
-            srt_lines.append(entry['index'])
-            if entry['timestamp']:
-                srt_lines.append(entry['timestamp'])
-        srt_lines.append(entry['text'])
-        srt_lines.append("")  # Blank line between entries.
-    
-    merged_text = "\n".join(srt_lines)
+    # Only include segment numbers and timestamps if subtitles are enabled.
+    merged_text = store.to_diarized(timestamps=not remove_timestamps)
     
     if progress_callback:
         progress_callback(100, "Diarization merge complete.")
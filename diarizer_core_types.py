@@ -19,10 +19,8 @@ video data and its associated metadata are managed efficiently and reliably.
 """
 
 from pathlib import Path
-import cv2
 import hashlib
 import re
-from pyannote.audio import Pipeline
 
 # Core types for PerfectTranscribe
 
@@ -23,8 +23,9 @@ def export_transcription(app):
     If SRT and diarization are both enabled, export the already-processed diarized text.
     Otherwise, export plain text.
     """
-    # Update current_text from the transcription textbox.
-    if hasattr(app, 'transcription_box'):
+    # current_text is the view rendered from the transcription's segments; only
+    # read the textbox back when the user has edited it.
+    if hasattr(app, 'transcription_box') and (not app.current_text or app.transcription_box.edit_modified()):
         app.current_text = app.transcription_box.get("1.0", tk.END).strip()
 
     if not app.current_text:
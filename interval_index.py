@@ -0,0 +1,88 @@
+"""
+interval_index.py
+
+Sorted index over time intervals, used to look up which diarization segment
+(speaker) a subtitle belongs to.
+
+Intervals are sorted by start time, and a running maximum of their end times is
+kept alongside. For a query [start, end], the intervals that may overlap it are
+the ones starting before `end` (found by bisecting the starts) and not lying
+entirely before `start` (found by bisecting the running maximum, which never
+decreases). A lookup therefore costs O(log M + k) for M intervals, k of them in
+the query window, instead of a scan over all intervals.
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+class IntervalIndex:
+    """
+    Immutable index of (start, end, value) intervals.
+    """
+    def __init__(self, intervals):
+        items = sorted((float(start), float(end), value) for start, end, value in intervals)
+        self.starts = [item[0] for item in items]
+        self.ends = [item[1] for item in items]
+        self.values = [item[2] for item in items]
+        # max_ends[i] is the largest end among the first i + 1 intervals.
+        self.max_ends = []
+        running = float("-inf")
+        for end in self.ends:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _window(self, start, end):
+        # Intervals before `lo` all end at or before `start`; those from `hi` on start at or after `end`.
+        lo = bisect_right(self.max_ends, start)
+        hi = bisect_left(self.starts, end)
+        return lo, hi
+
+    def overlapping(self, start, end):
+        """
+        Returns the (start, end, value) intervals that overlap [start, end] by a
+        positive amount, in order of start time.
+        """
+        if end <= start:
+            return []
+        lo, hi = self._window(start, end)
+        return [(self.starts[i], self.ends[i], self.values[i])
+                for i in range(lo, hi) if self.ends[i] > start]
+
+    def containing(self, point):
+        """
+        Returns the value of the first interval with start <= point < end, or None.
+        """
+        hi = bisect_right(self.starts, point)
+        for i in range(bisect_right(self.max_ends, point), hi):
+            if self.ends[i] > point:
+                return self.values[i]
+        return None
+
+    def best_overlap(self, start, end, default=None):
+        """
+        Returns the value whose intervals overlap [start, end] the most in total,
+        so a speaker split over several short segments still beats a single
+        longer one. Ties go to the value with the earliest overlapping interval.
+        A query without any overlap (e.g. of zero length) falls back to the
+        interval containing `start`, then `default`.
+        """
+        # Insertion order is the order of each value's first overlapping interval.
+        totals = {}
+        lo, hi = self._window(start, end)
+        for i in range(lo, hi):
+            overlap = min(self.ends[i], end) - max(self.starts[i], start)
+            if overlap > 0.0:
+                totals[self.values[i]] = totals.get(self.values[i], 0.0) + overlap
+        best_value = None
+        best_overlap = 0.0
+        for value, overlap in totals.items():
+            if overlap > best_overlap:
+                best_overlap = overlap
+                best_value = value
+        if best_overlap > 0.0:
+            return best_value
+        value = self.containing(start)
+        return default if value is None else value
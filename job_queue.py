@@ -0,0 +1,208 @@
+"""
+job_queue.py
+
+Queue of transcription jobs run in the background with a concurrency limit.
+
+Each Job is one file with a snapshot of the options it was queued with. The
+JobScheduler starts queued jobs in order on worker threads, never running more
+than `max_concurrent` at once, and reports every change of a job (status,
+progress, message) as an event dict on a queue.Queue, which the GUI polls
+together with its other queues. The work itself is done by a `run_job`
+callable supplied by the caller, so this module does not depend on the GUI.
+"""
+
+import itertools
+import threading
+import time
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+_job_ids = itertools.count(1)
+
+
+def _log(message: str):
+    print(f"[DEBUG JobQueue] {message}")
+
+
+class Job:
+    """
+    One queued transcription.
+
+    Attributes:
+        id (int): Unique job number.
+        file_path (str): Input file.
+        options (dict): Options the job runs with (copied when queued).
+        status (str): One of QUEUED, RUNNING, DONE, FAILED, CANCELLED.
+        progress (float): 0 to 100.
+        message (str): Last status message.
+        result: Whatever run_job returned, once DONE.
+        error (str): Error message, once FAILED.
+        stop_event (threading.Event): Set to cancel the job.
+    """
+    def __init__(self, file_path, options):
+        self.id = next(_job_ids)
+        self.file_path = file_path
+        self.options = dict(options)
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self.stop_event = threading.Event()
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+
+class JobScheduler:
+    """
+    Runs jobs with at most `max_concurrent` of them at the same time.
+
+    Parameters:
+        run_job (callable): Called on a worker thread as run_job(job, report), where
+            report(progress, message) updates the job's progress. Returns the job's
+            result; raising marks the job FAILED. A job whose stop_event is set when
+            run_job returns is marked CANCELLED.
+        event_queue (queue.Queue, optional): Receives {'type': 'job', 'job': Job}
+            events whenever a job changes.
+        max_concurrent (int): Concurrency limit.
+    """
+    def __init__(self, run_job, event_queue=None, max_concurrent=1):
+        self.run_job = run_job
+        self.event_queue = event_queue
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._jobs = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def get(self, job_id):
+        with self._lock:
+            return next((job for job in self._jobs if job.id == job_id), None)
+
+    def submit(self, file_path, options):
+        """
+        Queues a file and returns its Job.
+        """
+        job = Job(file_path, options)
+        with self._lock:
+            self._jobs.append(job)
+        _log(f"Queued job {job.id}: {file_path}")
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def set_max_concurrent(self, max_concurrent):
+        with self._lock:
+            self.max_concurrent = max(1, int(max_concurrent))
+        self._dispatch()
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued job immediately, or asks a running job to stop.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return
+        job.stop_event.set()
+        with self._lock:
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED, "Cancelled")
+            else:
+                job.message = "Cancelling..."
+        self._notify(job)
+
+    def remove_finished(self):
+        """
+        Forgets finished jobs and returns them.
+        """
+        with self._lock:
+            removed = [job for job in self._jobs if job.finished]
+            self._jobs = [job for job in self._jobs if not job.finished]
+        return removed
+
+    def shutdown(self):
+        """
+        Cancels every job that has not finished; running jobs are asked to stop.
+        """
+        with self._lock:
+            self._closed = True
+            pending = [job for job in self._jobs if not job.finished]
+        for job in pending:
+            self.cancel(job.id)
+
+    def running_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs if job.status == RUNNING)
+
+    # --- Internals ---
+    def _dispatch(self):
+        started = []
+        with self._lock:
+            if self._closed:
+                return
+            running = sum(1 for job in self._jobs if job.status == RUNNING)
+            for job in self._jobs:
+                if running >= self.max_concurrent:
+                    break
+                if job.status == QUEUED:
+                    job.status = RUNNING
+                    job.message = "Starting..."
+                    job.started_at = time.time()
+                    running += 1
+                    started.append(job)
+        for job in started:
+            self._notify(job)
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        def report(progress, message=None):
+            if job.stop_event.is_set():
+                return
+            job.progress = progress
+            if message:
+                job.message = message
+            self._notify(job)
+
+        _log(f"Starting job {job.id}: {job.file_path}")
+        try:
+            result = self.run_job(job, report)
+        except Exception as e:
+            _log(f"[ERROR] Job {job.id} failed: {e}")
+            with self._lock:
+                job.error = str(e)
+                self._finish(job, FAILED, f"Failed: {e}")
+        else:
+            with self._lock:
+                if job.stop_event.is_set():
+                    self._finish(job, CANCELLED, "Cancelled")
+                else:
+                    job.result = result
+                    job.progress = 100.0
+                    self._finish(job, DONE, "Done")
+        _log(f"Job {job.id} {job.status}.")
+        self._notify(job)
+        self._dispatch()
+
+    def _finish(self, job, status, message):
+        # Called with self._lock held.
+        job.status = status
+        job.message = message
+        job.finished_at = time.time()
+
+    def _notify(self, job):
+        if self.event_queue is not None:
+            self.event_queue.put({'type': 'job', 'job': job})
@@ -0,0 +1,188 @@
+"""
+job_queue_gui.py
+
+Window for queueing many files at once and following them while they run.
+
+Files added here are queued as jobs (see job_queue.py) with a snapshot of the
+options currently selected in the main window. Each job shows its status and
+progress, can be cancelled, and its transcription can be shown in the main
+window or exported on its own.
+"""
+
+import os
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from diarization_gui import merge_diarization
+from segment_store import store_from_result
+import job_queue
+
+MEDIA_FILETYPES = [("Audio/Video Files", "*.wav *.mp3 *.m4a *.flac *.ogg *.wma *.mp4 *.mov *.avi *.mkv"),
+                   ("All Files", "*.*")]
+
+
+def render_job_output(result, options, diarization_segments=None):
+    """
+    Returns the text of a finished transcription as the options ask for it:
+    SRT or plain text, with speaker labels when diarization segments are given.
+    """
+    store = store_from_result(result)
+    if diarization_segments is not None:
+        return merge_diarization(None, None,
+                                 remove_timestamps=not options.get('generate_srt'),
+                                 diarization_segments=diarization_segments, store=store)
+    if options.get('generate_srt'):
+        return store.to_srt()
+    return result.get('text', '')
+
+
+class JobQueueWindow:
+    """
+    Toplevel listing the jobs of a job_queue.JobScheduler.
+
+    Parameters:
+        app: The SoftWhisper instance (provides collect_options(), the scheduler
+            and the main window's display methods).
+    """
+    COLUMNS = (("file", "File", 300), ("options", "Options", 170), ("status", "Status", 90),
+               ("progress", "Progress", 70), ("message", "Message", 260))
+
+    def __init__(self, app):
+        self.app = app
+        self.scheduler = app.job_scheduler
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Job Queue")
+        self.window.geometry("920x400")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        toolbar = tk.Frame(self.window)
+        toolbar.pack(fill="x", padx=10, pady=5)
+        tk.Button(toolbar, text="Add Files...", command=self.add_files, font=("Arial", 10)).pack(side="left", padx=2)
+        tk.Button(toolbar, text="Cancel Selected", command=self.cancel_selected, font=("Arial", 10)).pack(side="left", padx=2)
+        tk.Button(toolbar, text="Show Selected", command=self.show_selected, font=("Arial", 10)).pack(side="left", padx=2)
+        tk.Button(toolbar, text="Export Selected...", command=self.export_selected, font=("Arial", 10)).pack(side="left", padx=2)
+        tk.Button(toolbar, text="Clear Finished", command=self.clear_finished, font=("Arial", 10)).pack(side="left", padx=2)
+
+        self.concurrency_var = tk.IntVar(value=self.scheduler.max_concurrent)
+        tk.Spinbox(toolbar, from_=1, to=16, width=4, textvariable=self.concurrency_var,
+                   command=self.on_concurrency_change, font=("Arial", 10)).pack(side="right", padx=2)
+        tk.Label(toolbar, text="Concurrent jobs:", font=("Arial", 10)).pack(side="right")
+
+        tree_frame = tk.Frame(self.window)
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.tree = ttk.Treeview(tree_frame, columns=[c[0] for c in self.COLUMNS], show="headings",
+                                 selectmode="extended")
+        for name, heading, width in self.COLUMNS:
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, anchor="w")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<Double-1>", lambda e: self.show_selected())
+
+        for job in self.scheduler.jobs():
+            self.update_job(job)
+
+    # --- Scheduler events ---
+    def update_job(self, job):
+        """
+        Inserts or refreshes the row of a job.
+        """
+        options = job.options
+        summary = f"{options.get('model_name')}, {options.get('language')}"
+        if options.get('generate_srt'):
+            summary += ", SRT"
+        if options.get('diarization'):
+            summary += ", speakers"
+        values = (os.path.basename(job.file_path), summary, job.status, f"{job.progress:.0f}%", job.message)
+        item = str(job.id)
+        if self.tree.exists(item):
+            self.tree.item(item, values=values)
+        else:
+            self.tree.insert("", tk.END, iid=item, values=values)
+
+    # --- Actions ---
+    def add_files(self):
+        file_paths = filedialog.askopenfilenames(title="Add Files to the Queue", initialdir=self.app.last_dir,
+                                                 filetypes=MEDIA_FILETYPES, parent=self.window)
+        if not file_paths:
+            return
+        self.app.last_dir = os.path.dirname(file_paths[0])
+        options = self.app.collect_options()
+        for file_path in file_paths:
+            self.scheduler.submit(os.path.abspath(file_path), options)
+
+    def _selected_jobs(self):
+        jobs = (self.scheduler.get(int(item)) for item in self.tree.selection())
+        return [job for job in jobs if job is not None]
+
+    def cancel_selected(self):
+        for job in self._selected_jobs():
+            self.scheduler.cancel(job.id)
+
+    def clear_finished(self):
+        for job in self.scheduler.remove_finished():
+            if self.tree.exists(str(job.id)):
+                self.tree.delete(str(job.id))
+
+    def on_concurrency_change(self):
+        try:
+            value = max(1, int(self.concurrency_var.get()))
+        except (tk.TclError, ValueError):
+            return
+        self.scheduler.set_max_concurrent(value)
+        self.app.advanced_settings['job_concurrency'] = value
+        self.app.save_config()
+
+    def _finished_selection(self):
+        jobs = [job for job in self._selected_jobs() if job.status == job_queue.DONE]
+        if not jobs:
+            messagebox.showinfo("Job Queue", "Select one or more finished jobs.", parent=self.window)
+        return jobs
+
+    def show_selected(self):
+        jobs = self._finished_selection()
+        if jobs:
+            self.app.show_job_result(jobs[0])
+
+    def export_selected(self):
+        jobs = self._finished_selection()
+        if not jobs:
+            return
+        if len(jobs) == 1:
+            job = jobs[0]
+            extension = ".srt" if job.options.get('generate_srt') else ".txt"
+            save_path = filedialog.asksaveasfilename(
+                title="Export Transcription",
+                defaultextension=extension,
+                initialfile=os.path.splitext(os.path.basename(job.file_path))[0] + extension,
+                initialdir=os.path.dirname(job.file_path),
+                filetypes=[('SRT File', '*.srt'), ('Text File', '*.txt'), ('All Files', '*.*')],
+                parent=self.window
+            )
+            if save_path:
+                self._write(job, save_path)
+            return
+        # Several jobs: export each next to the others in one folder, named after its input.
+        folder = filedialog.askdirectory(title="Export Transcriptions To", parent=self.window)
+        if not folder:
+            return
+        for job in jobs:
+            extension = ".srt" if job.options.get('generate_srt') else ".txt"
+            self._write(job, os.path.join(folder, os.path.splitext(os.path.basename(job.file_path))[0] + extension))
+
+    def _write(self, job, save_path):
+        try:
+            with open(save_path, 'w', encoding='utf-8') as out_f:
+                out_f.write(job.result['text'])
+            self.app.update_status(f"Saved {save_path}", "green")
+        except Exception as e:
+            msg = f"Error saving {save_path}: {e}"
+            self.app.update_status(msg, "red")
+            messagebox.showerror("Export Error", msg, parent=self.window)
+
+    def close(self):
+        # Jobs keep running; the window can be reopened from the main window.
+        self.app.job_window = None
+        self.window.destroy()
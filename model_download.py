@@ -0,0 +1,254 @@
+"""
+model_download.py
+
+Resumable, verified downloads of ggml Whisper models.
+
+A model is downloaded into "<model>.part" next to its final path and only
+renamed into place once it is complete and its SHA256 digest, when known,
+matches. An interrupted download is resumed from the end of the partial file
+with an HTTP Range request. Models can also be taken from a local mirror directory (e.g. a
+network share) instead of the internet.
+
+The expected digest comes, in order of preference, from the caller, from a
+"SHA256SUMS" manifest (sha256sum format) in the models or mirror directory, or
+from the X-Linked-Etag header that Hugging Face sends for files stored with Git
+LFS, which is the file's SHA256. Without any of these only the size announced
+by the server is checked.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+DEFAULT_BASE_URL = "https://huggingface.co/ggerganov/whisper.cpp/resolve/main"
+MANIFEST_NAME = "SHA256SUMS"
+BLOCK_SIZE = 1024 * 1024
+TIMEOUT = 60
+# Attempts per download; each one resumes where the previous one stopped.
+RETRIES = 3
+
+_SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# One lock per model file, so concurrent jobs needing the same model download it once.
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+def _log(message: str):
+    print(f"[DEBUG ModelDownload] {message}")
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+def read_manifest(folder):
+    """
+    Reads a sha256sum-style manifest ("<digest>  <filename>" per line) from
+    `folder`. Returns {filename: digest}, empty when there is no manifest.
+    """
+    digests = {}
+    try:
+        with open(Path(folder) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split()
+                if len(parts) == 2 and _SHA256_PATTERN.match(parts[0].lower()):
+                    digests[parts[1].lstrip("*")] = parts[0].lower()
+    except OSError:
+        pass
+    return digests
+
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class _RedirectRecorder(urllib.request.HTTPRedirectHandler):
+    # Hugging Face answers /resolve/ with a redirect to its CDN; the LFS digest is
+    # only in the headers of that redirect.
+    def __init__(self):
+        self.linked_etag = None
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        etag = (headers.get("X-Linked-Etag") or "").strip('"').lower()
+        if _SHA256_PATTERN.match(etag):
+            self.linked_etag = etag
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def _linked_etag(headers):
+    etag = (headers.get("X-Linked-Etag") or "").strip('"').lower()
+    return etag if _SHA256_PATTERN.match(etag) else None
+
+
+def _range_total(headers):
+    # The complete size from a "Content-Range: bytes 0-99/1234" or "bytes */1234" header.
+    total = (headers.get("Content-Range") or "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def download_model(filename, dest_folder, base_url=DEFAULT_BASE_URL, mirror_dir=None, expected_sha256=None,
+                   progress_callback=None, stop_event=None):
+    """
+    Downloads (or copies from `mirror_dir`) a model file into `dest_folder`.
+
+    Parameters:
+        filename (str): e.g. "ggml-base.bin".
+        progress_callback (callable, optional): Called with (percentage, message).
+        stop_event (threading.Event, optional): Aborts the download; the partial
+            file is kept so the next attempt resumes.
+
+    Returns:
+        str: The path of the verified model file.
+
+    Raises:
+        DownloadCancelled, ChecksumMismatch, urllib.error.URLError, OSError
+    """
+    dest_folder = Path(dest_folder)
+    dest_folder.mkdir(parents=True, exist_ok=True)
+    final_path = dest_folder / filename
+    with _file_locks_guard:
+        lock = _file_locks.setdefault(str(final_path.resolve()), threading.Lock())
+    with lock:
+        if final_path.exists():
+            return str(final_path)
+        return _fetch(filename, dest_folder, final_path, base_url, mirror_dir, expected_sha256,
+                      progress_callback, stop_event)
+
+
+def _fetch(filename, dest_folder, final_path, base_url, mirror_dir, expected_sha256, progress_callback, stop_event):
+    part_path = dest_folder / (filename + ".part")
+
+    expected = (expected_sha256 or read_manifest(dest_folder).get(filename)
+                or (read_manifest(mirror_dir).get(filename) if mirror_dir else None))
+
+    def report(done, total):
+        if progress_callback:
+            percentage = int(done / total * 100) if total else 0
+            progress_callback(percentage, f"Downloading {filename}: {percentage}%")
+
+    mirrored = Path(mirror_dir) / filename if mirror_dir else None
+    if mirrored is not None and mirrored.is_file():
+        _log(f"Copying {filename} from mirror {mirror_dir}")
+        total = _copy_from_mirror(mirrored, part_path, report, stop_event)
+    else:
+        url = f"{base_url.rstrip('/')}/{filename}"
+        for attempt in range(1, RETRIES + 1):
+            try:
+                total, linked = _download(url, part_path, report, stop_event)
+            except DownloadCancelled:
+                raise
+            except OSError as e:
+                # Covers URLError and dropped connections
+                if attempt == RETRIES:
+                    raise
+                _log(f"[WARN] Download attempt {attempt} failed: {e}")
+                continue
+            if total is None or part_path.stat().st_size >= total or attempt == RETRIES:
+                break
+            _log(f"[WARN] Download attempt {attempt} ended early; resuming.")
+        expected = expected or linked
+
+    size = part_path.stat().st_size
+    if total is not None and size != total:
+        raise OSError(f"Download of {filename} is incomplete ({size} of {total} bytes); it will resume on retry.")
+
+    if expected:
+        if progress_callback:
+            progress_callback(100, f"Verifying {filename}...")
+        digest = file_sha256(part_path)
+        if digest != expected:
+            part_path.unlink()
+            raise ChecksumMismatch(f"{filename}: SHA256 {digest} does not match the expected {expected}.")
+        _log(f"{filename} verified (SHA256 {digest}).")
+    else:
+        _log(f"[WARN] No known SHA256 for {filename}; only its size was checked.")
+
+    os.replace(part_path, final_path)
+    if progress_callback:
+        progress_callback(100, f"Download of {filename} complete")
+    return str(final_path)
+
+
+def _copy_from_mirror(source, part_path, report, stop_event):
+    total = source.stat().st_size
+    done = part_path.stat().st_size if part_path.exists() else 0
+    if done > total:
+        done = 0
+    with open(source, 'rb') as src, open(part_path, 'ab' if done else 'wb') as dst:
+        src.seek(done)
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                raise DownloadCancelled(f"Copy of {source.name} cancelled.")
+            block = src.read(BLOCK_SIZE)
+            if not block:
+                break
+            dst.write(block)
+            done += len(block)
+            report(done, total)
+    return total
+
+
+def _download(url, part_path, report, stop_event):
+    """
+    Downloads `url` into `part_path`, resuming a partial file. Returns
+    (total size or None, SHA256 from X-Linked-Etag or None).
+    """
+    done = part_path.stat().st_size if part_path.exists() else 0
+    recorder = _RedirectRecorder()
+    opener = urllib.request.build_opener(recorder)
+    request = urllib.request.Request(url)
+    if done:
+        request.add_header("Range", f"bytes={done}-")
+        _log(f"Resuming {url} at byte {done}")
+    else:
+        _log(f"Downloading {url}")
+
+    try:
+        response = opener.open(request, timeout=TIMEOUT)
+    except urllib.error.HTTPError as e:
+        if e.code != 416 or not done:
+            raise
+        total = _range_total(e.headers)
+        if total == done:
+            # Nothing left to fetch: the partial file already holds the whole file.
+            return total, recorder.linked_etag or _linked_etag(e.headers)
+        # The partial file does not match the file on the server; start over.
+        _log(f"[WARN] Server rejected resuming at byte {done} (file size {total}); restarting the download.")
+        part_path.unlink()
+        return _download(url, part_path, report, stop_event)
+
+    with response:
+        linked = recorder.linked_etag or _linked_etag(response.headers)
+        length = response.headers.get("Content-Length")
+        if response.status == 206:
+            total = _range_total(response.headers)
+            mode = 'ab'
+        else:
+            # The server ignored the Range header: start over.
+            done = 0
+            total = int(length) if length else None
+            mode = 'wb'
+        with open(part_path, mode) as f:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    raise DownloadCancelled(f"Download of {url} cancelled.")
+                block = response.read(BLOCK_SIZE)
+                if not block:
+                    break
+                f.write(block)
+                done += len(block)
+                report(done, total)
+    return total, linked
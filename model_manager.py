@@ -0,0 +1,253 @@
+"""
+model_manager.py
+
+Bookkeeping for the ggml Whisper model files in models/whisper.
+
+The manager lists the available models with their sizes, computes (and
+remembers) their SHA256 checksums, and can warm a model into the operating
+system's page cache in the background by memory-mapping it and touching every
+page, so the first transcription does not pay for reading a multi-gigabyte file
+from disk. It also reports how much of each model is currently in RAM: in the
+page cache (Linux) and mapped by this process and its children, such as
+whisper-cli runs or resident whisper.cpp servers.
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+from pathlib import Path
+
+import psutil
+
+MODELS_FOLDER = Path("models") / "whisper"
+CHECKSUM_INDEX = "checksums.json"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def _log(message: str):
+    print(f"[DEBUG ModelManager] {message}")
+
+
+def model_filename(model_name):
+    return f"ggml-{model_name}.bin"
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def page_cache_bytes(path):
+    """
+    Returns how many bytes of a file are resident in the page cache, or None
+    where this cannot be determined (only Linux is supported).
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    page_size = mmap.PAGESIZE
+    pages = (size + page_size - 1) // page_size
+    vector = (ctypes.c_ubyte * pages)()
+    with open(path, 'rb') as f:
+        # A private (copy-on-write) mapping shares the file's cached pages until written,
+        # and unlike a read-only one exposes its address to ctypes.
+        mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_COPY)
+        start = ctypes.c_char.from_buffer(mapped)
+        try:
+            result = libc.mincore(ctypes.c_void_p(ctypes.addressof(start)), ctypes.c_size_t(size), vector)
+            if result != 0:
+                return None
+            resident = sum(byte & 1 for byte in vector)
+        finally:
+            # The buffer export must be released before the mapping can be closed.
+            del start
+            mapped.close()
+    return min(size, resident * page_size)
+
+
+def process_resident_bytes(path):
+    """
+    Returns the resident memory (RSS) of the mappings of `path` in this process
+    and its child processes.
+    """
+    path = os.path.realpath(path)
+    me = psutil.Process()
+    total = 0
+    for process in [me] + me.children(recursive=True):
+        try:
+            for mapping in process.memory_maps(grouped=True):
+                if mapping.path and os.path.realpath(mapping.path) == path:
+                    total += mapping.rss
+        except (psutil.Error, OSError, AttributeError):
+            continue
+    return total
+
+
+class ModelManager:
+    """
+    Available models, their checksums, warm-up and memory use.
+    """
+    def __init__(self, folder=MODELS_FOLDER):
+        self.folder = Path(folder)
+        self._lock = threading.Lock()
+        self._checksums = None
+        self._warming = {}
+
+    def path(self, model_name):
+        return self.folder / model_filename(model_name)
+
+    def models(self):
+        """
+        Returns the model files present, as dicts with 'name', 'path', 'size' and
+        'sha256' (None until checksum() has been computed for the current file).
+        """
+        found = []
+        if not self.folder.is_dir():
+            return found
+        for path in sorted(self.folder.glob("ggml-*.bin")):
+            stat = path.stat()
+            name = path.name[len("ggml-"):-len(".bin")]
+            found.append({
+                'name': name,
+                'path': str(path),
+                'size': stat.st_size,
+                'sha256': self._known_checksum(path, stat),
+            })
+        return found
+
+    # --- Checksums ---
+    def _load_checksums(self):
+        if self._checksums is None:
+            try:
+                with open(self.folder / CHECKSUM_INDEX, 'r', encoding='utf-8') as f:
+                    self._checksums = json.load(f)
+            except (OSError, ValueError):
+                self._checksums = {}
+        return self._checksums
+
+    def _known_checksum(self, path, stat):
+        with self._lock:
+            known = self._load_checksums().get(path.name)
+        if known and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return known[2]
+        return None
+
+    def checksum(self, model_name):
+        """
+        Returns the SHA256 hex digest of a model file, reusing the stored digest
+        while the file's size and modification time are unchanged.
+        """
+        path = self.path(model_name)
+        stat = path.stat()
+        known = self._known_checksum(path, stat)
+        if known:
+            return known
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with self._lock:
+            checksums = self._load_checksums()
+            checksums[path.name] = [stat.st_size, stat.st_mtime_ns, digest]
+            tmp_path = self.folder / (CHECKSUM_INDEX + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(checksums, f, indent=2)
+            os.replace(tmp_path, self.folder / CHECKSUM_INDEX)
+        return digest
+
+    # --- Warm-up ---
+    def warm(self, model_name, stop_event=None, done_callback=None):
+        """
+        Reads a model into the page cache on a background thread by memory-mapping
+        it and touching every page, then computes its checksum (see checksum())
+        while the pages are hot. Returns the thread, or None if the model is
+        missing or already being warmed.
+
+        done_callback, if given, is called with the model name when done.
+        """
+        path = self.path(model_name)
+        if not path.exists():
+            return None
+        with self._lock:
+            running = self._warming.get(model_name)
+            if running is not None and running.is_alive():
+                return None
+            thread = threading.Thread(target=self._warm, args=(model_name, path, stop_event, done_callback),
+                                      daemon=True)
+            self._warming[model_name] = thread
+        thread.start()
+        return thread
+
+    def _warm(self, model_name, path, stop_event, done_callback):
+        size = path.stat().st_size
+        if size == 0:
+            return
+        _log(f"Warming {path.name} ({format_bytes(size)}) into the page cache...")
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+                    # Let the kernel start reading ahead while the pages are touched.
+                    mapped.madvise(mmap.MADV_WILLNEED)
+                page = mmap.PAGESIZE
+                # Touch one byte per page, in slices so cancellation stays responsive.
+                step = page * 4096
+                for offset in range(0, size, step):
+                    if stop_event is not None and stop_event.is_set():
+                        _log(f"Warm-up of {path.name} cancelled.")
+                        return
+                    sum(mapped[offset:min(offset + step, size):page])
+            finally:
+                mapped.close()
+        _log(f"{path.name} is warm.")
+        try:
+            _log(f"{path.name} SHA256: {self.checksum(model_name)}")
+        except OSError as e:
+            _log(f"[WARN] Could not checksum {path.name}: {e}")
+        if done_callback:
+            done_callback(model_name)
+
+    # --- Memory ---
+    def memory_report(self):
+        """
+        Returns, for every available model, a dict with 'name', 'size', 'sha256'
+        (None until computed), 'page_cache' (bytes in the page cache, or None if
+        unknown) and 'mapped' (resident bytes mapped by this process and its children).
+        """
+        report = []
+        for model in self.models():
+            try:
+                cached = page_cache_bytes(model['path'])
+            except (OSError, ValueError, AttributeError):
+                cached = None
+            report.append({
+                'name': model['name'],
+                'size': model['size'],
+                'sha256': model['sha256'],
+                'page_cache': cached,
+                'mapped': process_resident_bytes(model['path']),
+            })
+        return report
+
+    def describe_memory(self):
+        """
+        Returns memory_report() as readable lines.
+        """
+        lines = []
+        for entry in self.memory_report():
+            cached = "unknown" if entry['page_cache'] is None else format_bytes(entry['page_cache'])
+            checksum = entry['sha256'][:16] if entry['sha256'] else "not computed yet"
+            lines.append(f"{entry['name']}: {format_bytes(entry['size'])} on disk, {cached} in page cache, "
+                         f"{format_bytes(entry['mapped'])} mapped by running processes, SHA256 {checksum}")
+        return lines
@@ -0,0 +1,250 @@
+"""
+result_cache.py
+
+Content-addressed on-disk cache for transcription and diarization results.
+
+Entries are keyed by the SHA256 of the audio file's content plus the options
+that change Whisper's output (model, language, beam size, task and time
+range), so renaming or moving a file still hits, while editing it does not.
+Each entry is one JSON file; the total size of the folder is capped and the
+least recently used entries are evicted first.
+
+Hashing a large file costs a full read, so digests are remembered per
+(path, size, modification time) in a small index inside the cache folder.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from segment_store import SegmentStore
+from whisper_server import is_server_url
+
+CACHE_FOLDER = Path("./transcription_cache")
+
+# Default size cap of the cache folder (bytes).
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Options that change the transcription and therefore belong in the cache key.
+KEY_OPTIONS = ('model_name', 'language', 'beam_size', 'task', 'start_time', 'end_time')
+# Added to the key only when silence skipping is on, so existing entries stay valid.
+VAD_KEY_OPTIONS = ('vad_min_silence',)
+# Likewise added only when set: -ojf output carries segment confidences.
+FLAG_KEY_OPTIONS = ('whisper_full_json',)
+# Result fields that are not worth keeping.
+SKIPPED_FIELDS = ('cancelled',)
+
+DIGEST_INDEX = "digests.json"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+# One TranscriptionCache per folder, shared by every job of the process.
+_shared_caches = {}
+_shared_caches_lock = threading.Lock()
+
+
+def _log(message: str):
+    print(f"[DEBUG ResultCache] {message}")
+
+
+def shared_cache(folder=CACHE_FOLDER, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Returns the process-wide TranscriptionCache of `folder`, so concurrent jobs
+    share its lock and digest index instead of overwriting each other's files.
+    The size cap is updated to `max_bytes`.
+    """
+    folder = Path(folder).resolve()
+    with _shared_caches_lock:
+        cache = _shared_caches.get(folder)
+        if cache is None:
+            cache = _shared_caches[folder] = TranscriptionCache(folder, max_bytes)
+        cache.max_bytes = max_bytes
+        return cache
+
+
+def evict_lru(folder, max_bytes, pattern="*", keep=()):
+    """
+    Deletes the least recently used files matching `pattern` in `folder` until
+    their total size is at most `max_bytes`. Files whose names are in `keep`
+    count towards the total but are never deleted, and files that cannot be
+    deleted (e.g. open in another process on Windows) are skipped. Returns the
+    number of deleted files.
+    """
+    entries = []
+    total = 0
+    for path in Path(folder).glob(pattern):
+        if not path.is_file():
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        total += stat.st_size
+        if path.name not in keep:
+            entries.append((stat.st_mtime, stat.st_size, path))
+    deleted = 0
+    for _, size, path in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            _log(f"[WARN] Could not evict {path}: {e}")
+            continue
+        else:
+            deleted += 1
+        total -= size
+    return deleted
+
+
+class TranscriptionCache:
+    """
+    Cache of transcribe_audio() results and diarization segments.
+    """
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._digests = None
+
+    # --- Content digests ---
+    def file_digest(self, file_path):
+        """
+        Returns the SHA256 hex digest of a file, reusing the stored digest when the
+        file's size and modification time have not changed.
+        """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            digests = self._load_digests()
+            known = digests.get(file_path)
+            if known and known[:2] == stamp:
+                return known[2]
+
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+
+        with self._lock:
+            digests[file_path] = stamp + [digest]
+            self._try_write_json(self.folder / DIGEST_INDEX, digests)
+        return digest
+
+    def _load_digests(self):
+        if self._digests is None:
+            self._digests = self._read_json(self.folder / DIGEST_INDEX) or {}
+        return self._digests
+
+    # --- Keys ---
+    def key(self, file_path, options):
+        """
+        Returns the cache key of a transcription of `file_path` with `options`.
+        """
+        relevant = {name: str(options.get(name, '')).strip() for name in KEY_OPTIONS}
+        if options.get('vad'):
+            relevant['vad'] = {name: str(options.get(name, '')).strip() for name in VAD_KEY_OPTIONS}
+        for name in FLAG_KEY_OPTIONS:
+            if options.get(name):
+                relevant[name] = True
+        # A remote server transcribes with its own model, whatever model_name says.
+        executable = str(options.get('whisper_executable', '')).strip()
+        if is_server_url(executable):
+            relevant['server_url'] = executable
+        material = self.file_digest(file_path) + json.dumps(relevant, sort_keys=True)
+        return "tr-" + hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def diarization_key(self, file_path):
+        return "dz-" + self.file_digest(file_path)
+
+    # --- Transcription results ---
+    def get(self, key):
+        """
+        Returns the cached result for `key`, or None.
+        """
+        result = self._get_entry(key)
+        if result is not None and result.get('store') is not None:
+            result['store'] = SegmentStore.from_dict(result['store'])
+        return result
+
+    def put(self, key, result):
+        entry = {k: v for k, v in result.items() if k not in SKIPPED_FIELDS}
+        if isinstance(entry.get('store'), SegmentStore):
+            entry['store'] = entry['store'].to_dict()
+        self._put_entry(key, entry)
+
+    # --- Diarization segments ---
+    def get_diarization(self, file_path):
+        """
+        Returns the cached diarization segments of `file_path` as a list of
+        (start, end, speaker_number, gender, orig_label) tuples, or None.
+        """
+        entry = self._get_entry(self.diarization_key(file_path))
+        if entry is None:
+            return None
+        return [tuple(seg) for seg in entry['segments']]
+
+    def put_diarization(self, file_path, segments):
+        self._put_entry(self.diarization_key(file_path), {'segments': [list(seg) for seg in segments]})
+
+    # --- Storage ---
+    def _entry_path(self, key):
+        return self.folder / f"{key}.json"
+
+    def _get_entry(self, key):
+        path = self._entry_path(key)
+        entry = self._read_json(path)
+        if entry is not None:
+            # Refresh the modification time so eviction sees this entry as recently used.
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            _log(f"Cache hit: {key}")
+        return entry
+
+    def _put_entry(self, key, entry):
+        with self._lock:
+            self._try_write_json(self._entry_path(key), entry)
+            deleted = evict_lru(self.folder, self.max_bytes, "*.json", keep=(DIGEST_INDEX,))
+        if deleted:
+            _log(f"Evicted {deleted} least recently used cache entries.")
+
+    def _read_json(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            _log(f"[WARN] Ignoring unreadable cache file {path}: {e}")
+            return None
+
+    def _try_write_json(self, path, data):
+        # A cache that cannot be written must not fail the transcription.
+        try:
+            self._write_json(path, data)
+        except OSError as e:
+            _log(f"[WARN] Could not write cache file {path}: {e}")
+
+    def _write_json(self, path, data):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        # A unique temporary name, so concurrent writers never share one.
+        fd, tmp_path = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=self.folder)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
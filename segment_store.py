@@ -0,0 +1,245 @@
+"""
+segment_store.py
+
+Structured storage of the segments of one transcription.
+
+Whisper.cpp output is parsed once into a SegmentStore, which keeps every field
+in its own compact column: start and end times as integer milliseconds in
+arrays, the texts in a list, speaker numbers in an int array (UNKNOWN_SPEAKER
+when not identified) and confidences in a float array (NaN when Whisper.cpp
+did not report one). The plain text, SRT and diarized views, exports and the
+JSON output are all rendered from the store, so a long transcript is never
+converted to text and parsed back again. to_dict()/from_dict() turn a store
+into plain lists for the result cache.
+"""
+
+import math
+from array import array
+
+from interval_index import IntervalIndex
+from whisper_runner import SEGMENT_LINE_PATTERN
+
+UNKNOWN_SPEAKER = -1
+
+
+def _timestamp_ms(timestamp):
+    # "hh:mm:ss.mmm" (or "hh:mm:ss,mmm") to integer milliseconds.
+    return (int(timestamp[0:2]) * 3600000 + int(timestamp[3:5]) * 60000
+            + int(timestamp[6:8]) * 1000 + int(timestamp[9:12]))
+
+
+def format_timestamp(ms, separator=","):
+    """
+    Formats integer milliseconds as "hh:mm:ss,mmm" (SRT) or, with separator=".",
+    as Whisper.cpp does.
+    """
+    hours, rest = divmod(max(0, ms), 3600000)
+    minutes, rest = divmod(rest, 60000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{millis:03d}"
+
+
+class Segment:
+    """
+    One segment read from a SegmentStore.
+    """
+    __slots__ = ('start_ms', 'end_ms', 'text', 'speaker', 'confidence')
+
+    def __init__(self, start_ms, end_ms, text, speaker=UNKNOWN_SPEAKER, confidence=math.nan):
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.text = text
+        self.speaker = speaker
+        self.confidence = confidence
+
+    @property
+    def start(self):
+        return self.start_ms / 1000.0
+
+    @property
+    def end(self):
+        return self.end_ms / 1000.0
+
+
+class SegmentStore:
+    """
+    Column-oriented store of transcription segments, in chronological order.
+    """
+    def __init__(self):
+        self.start_ms = array('q')
+        self.end_ms = array('q')
+        self.texts = []
+        self.speakers = array('i')
+        self.confidences = array('f')
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __getitem__(self, index):
+        return Segment(self.start_ms[index], self.end_ms[index], self.texts[index],
+                       self.speakers[index], self.confidences[index])
+
+    def __iter__(self):
+        for index in range(len(self.texts)):
+            yield self[index]
+
+    def append(self, start_ms, end_ms, text, speaker=UNKNOWN_SPEAKER, confidence=math.nan):
+        self.start_ms.append(int(start_ms))
+        self.end_ms.append(int(end_ms))
+        self.texts.append(text)
+        self.speakers.append(UNKNOWN_SPEAKER if speaker is None else int(speaker))
+        self.confidences.append(math.nan if confidence is None else confidence)
+
+    def shift(self, offset_ms):
+        """
+        Moves every segment by `offset_ms` milliseconds.
+        """
+        if offset_ms:
+            self.start_ms = array('q', (t + offset_ms for t in self.start_ms))
+            self.end_ms = array('q', (t + offset_ms for t in self.end_ms))
+        return self
+
+    def extend(self, other):
+        """
+        Appends the segments of another store.
+        """
+        self.start_ms.extend(other.start_ms)
+        self.end_ms.extend(other.end_ms)
+        self.texts.extend(other.texts)
+        self.speakers.extend(other.speakers)
+        self.confidences.extend(other.confidences)
+        return self
+
+    # --- Building ---
+    def add_whisper_line(self, line):
+        """
+        Adds a "[hh:mm:ss.mmm --> hh:mm:ss.mmm] text" line printed by Whisper.cpp.
+        Returns False, adding nothing, for lines without timestamps.
+        """
+        line = line.strip()
+        match = SEGMENT_LINE_PATTERN.match(line)
+        if not match:
+            return False
+        self.append(_timestamp_ms(match.group(1)), _timestamp_ms(match.group(2)), line[match.end():].strip())
+        return True
+
+    @classmethod
+    def from_whisper_output(cls, raw):
+        """
+        Returns a store of the segment lines of Whisper.cpp output (a string or
+        a sequence of lines).
+        """
+        store = cls()
+        for line in (raw.splitlines() if isinstance(raw, str) else raw):
+            store.add_whisper_line(line)
+        return store
+
+    @classmethod
+    def from_srt_entries(cls, entries):
+        """
+        Returns a store of entries as returned by diarization_gui.parse_srt().
+        """
+        store = cls()
+        for entry in entries:
+            store.append(_timestamp_ms(entry['start_str']), _timestamp_ms(entry['end_str']), entry['text'])
+        return store
+
+    def assign_speakers(self, diarization_segments):
+        """
+        Sets the speaker of every segment to the speaker whose diarization
+        segments overlap it the longest in total. Each diarization segment is a tuple
+        (start, end, speaker_number, gender, orig_label) in seconds.
+        """
+        speakers = IntervalIndex((seg[0], seg[1], seg[2]) for seg in diarization_segments)
+        for index in range(len(self.texts)):
+            speaker = speakers.best_overlap(self.start_ms[index] / 1000.0, self.end_ms[index] / 1000.0)
+            self.speakers[index] = UNKNOWN_SPEAKER if speaker is None else int(speaker)
+        return self
+
+    # --- Views ---
+    def to_plain(self):
+        """
+        Returns the texts of all segments joined by spaces.
+        """
+        return " ".join(self.texts)
+
+    def srt_entry(self, index, counter=None):
+        """
+        Returns one SRT entry, with its trailing blank line.
+        """
+        return (f"{index + 1 if counter is None else counter}\n"
+                f"{format_timestamp(self.start_ms[index])} --> {format_timestamp(self.end_ms[index])}\n"
+                f"{self.texts[index]}\n\n")
+
+    def to_srt(self):
+        """
+        Returns the segments as SRT subtitles.
+        """
+        # Entries are separated by blank lines; the last one ends with a single newline.
+        return "".join(self.srt_entry(index) for index in range(len(self.texts)))[:-1]
+
+    def speaker_label(self, index):
+        speaker = self.speakers[index]
+        return f"[Speaker {speaker}]: " if speaker != UNKNOWN_SPEAKER else "[Speaker Unknown]: "
+
+    def to_diarized(self, timestamps=True):
+        """
+        Returns the segments prefixed with their speakers, as SRT subtitles or,
+        with timestamps=False, as one paragraph per segment.
+        """
+        parts = []
+        for index in range(len(self.texts)):
+            text = self.speaker_label(index) + self.texts[index]
+            if timestamps:
+                parts.append(f"{index + 1}\n{format_timestamp(self.start_ms[index])} --> "
+                             f"{format_timestamp(self.end_ms[index])}\n{text}\n")
+            else:
+                parts.append(f"{text}\n")
+        return "\n".join(parts)
+
+    def to_records(self):
+        """
+        Returns the segments as dicts with start/end in seconds, for JSON output.
+        Speaker and confidence are only included when known.
+        """
+        records = []
+        for segment in self:
+            record = {'start': segment.start, 'end': segment.end, 'text': segment.text}
+            if segment.speaker != UNKNOWN_SPEAKER:
+                record['speaker'] = segment.speaker
+            if not math.isnan(segment.confidence):
+                record['confidence'] = round(segment.confidence, 4)
+            records.append(record)
+        return records
+
+    # --- Serialization ---
+    def to_dict(self):
+        return {
+            'start_ms': self.start_ms.tolist(),
+            'end_ms': self.end_ms.tolist(),
+            'text': list(self.texts),
+            'speaker': self.speakers.tolist(),
+            'confidence': [None if math.isnan(c) else c for c in self.confidences],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        store = cls()
+        store.start_ms = array('q', data['start_ms'])
+        store.end_ms = array('q', data['end_ms'])
+        store.texts = list(data['text'])
+        store.speakers = array('i', data['speaker'])
+        store.confidences = array('f', (math.nan if c is None else c for c in data['confidence']))
+        return store
+
+
+def store_from_result(result):
+    """
+    Returns the SegmentStore of a transcription result, building it from the raw
+    Whisper.cpp output for results that have none (e.g. older cache entries).
+    """
+    store = result.get('store')
+    if store is None:
+        store = SegmentStore.from_whisper_output(result.get('raw', ''))
+        result['store'] = store
+    return store
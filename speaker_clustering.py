@@ -0,0 +1,115 @@
+"""
+speaker_clustering.py
+
+Speaker clustering of segment embeddings that scales to long recordings.
+
+Average-linkage agglomerative clustering needs the full pairwise distance
+matrix, which is O(n^2) in memory. Up to `exact_limit` segments the embeddings
+are clustered exactly that way. Beyond that, clustering runs in two stages:
+consecutive windows of segments are clustered on their own, and the
+centroids of those local clusters are then merged. The merge uses the same
+agglomerative clustering when the centroids are few enough, otherwise online
+assignment of each centroid to the nearest global centroid within the cosine
+distance threshold. Memory stays bounded by the window size.
+"""
+
+import numpy as np
+from sklearn.cluster import AgglomerativeClustering
+
+# Cosine distance below which segments are merged into one speaker.
+DISTANCE_THRESHOLD = 0.05
+
+# Largest number of segments clustered exactly; more switch to two-stage clustering.
+EXACT_LIMIT = 2000
+
+# Number of consecutive segments clustered together in the first stage.
+WINDOW_SIZE = 1000
+
+
+def _log(message: str):
+    print(f"[DEBUG SpeakerClustering] {message}")
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def agglomerative_labels(embeddings, threshold=DISTANCE_THRESHOLD):
+    """
+    Exact average-linkage cosine clustering. Returns one integer label per row.
+    """
+    if len(embeddings) < 2:
+        # AgglomerativeClustering needs at least two samples.
+        return np.zeros(len(embeddings), dtype=int)
+    clustering = AgglomerativeClustering(metric='cosine',
+                                         linkage='average',
+                                         distance_threshold=threshold,
+                                         n_clusters=None)
+    return clustering.fit_predict(embeddings)
+
+
+def online_labels(vectors, threshold=DISTANCE_THRESHOLD, weights=None):
+    """
+    Assigns each vector, in order, to the nearest running centroid within the
+    cosine distance threshold, or starts a new centroid. Centroids are the
+    (weighted) means of their members.
+    """
+    vectors = _normalize(np.asarray(vectors, dtype=np.float64))
+    weights = np.ones(len(vectors)) if weights is None else np.asarray(weights, dtype=np.float64)
+    sums = []
+    counts = []
+    centroids = np.empty((0, vectors.shape[1]))
+    labels = np.empty(len(vectors), dtype=int)
+    for i, vector in enumerate(vectors):
+        if len(centroids):
+            distances = 1.0 - centroids @ vector
+            best = int(np.argmin(distances))
+            if distances[best] <= threshold:
+                labels[i] = best
+                sums[best] += vector * weights[i]
+                counts[best] += weights[i]
+                centroids[best] = sums[best] / max(np.linalg.norm(sums[best]), 1e-12)
+                continue
+        labels[i] = len(sums)
+        sums.append(vector * weights[i])
+        counts.append(weights[i])
+        centroids = np.vstack([centroids, vector])
+    return labels
+
+
+def cluster_embeddings(embeddings, threshold=DISTANCE_THRESHOLD, exact_limit=EXACT_LIMIT,
+                       window_size=WINDOW_SIZE):
+    """
+    Clusters chronologically ordered segment embeddings into speakers.
+
+    Returns:
+        np.ndarray: One integer cluster label per embedding.
+    """
+    embeddings = np.asarray(embeddings)
+    count = len(embeddings)
+    if count <= exact_limit:
+        return agglomerative_labels(embeddings, threshold)
+
+    # Stage 1: cluster consecutive windows of segments on their own.
+    local_labels = np.empty(count, dtype=int)
+    centroids = []
+    sizes = []
+    for first in range(0, count, window_size):
+        window = embeddings[first:first + window_size]
+        labels = agglomerative_labels(window, threshold)
+        for label in np.unique(labels):
+            members = window[labels == label]
+            local_labels[first:first + window_size][labels == label] = len(centroids)
+            centroids.append(members.mean(axis=0))
+            sizes.append(len(members))
+    centroids = _normalize(np.array(centroids))
+    _log(f"Two-stage clustering of {count} segments: {len(centroids)} local clusters "
+         f"in windows of {window_size}.")
+
+    # Stage 2: merge the local clusters across windows.
+    if len(centroids) <= exact_limit:
+        centroid_labels = agglomerative_labels(centroids, threshold)
+    else:
+        centroid_labels = online_labels(centroids, threshold, weights=sizes)
+    return centroid_labels[local_labels]
@@ -0,0 +1,287 @@
+"""
+speaker_embeddings.py
+
+Batched MFCC speaker embeddings for diarization.
+
+speaker_tagger.get_embeddings() computes MFCCs and their deltas separately for
+every segment. Here segments are grouped into blocks of nearby audio; MFCCs,
+deltas and delta-deltas are computed once per block in one vectorized pass, and
+the per-segment means and standard deviations are read off cumulative sums over
+each segment's frame range.
+
+The embeddings have the same 240-dimensional layout as get_embeddings()
+(mean and std of 40 MFCCs, deltas and delta-deltas, L2-normalized) and follow
+the same rules for short segments. Frames near a segment's edges see the
+neighbouring audio instead of padding, so values differ slightly from the
+per-segment path there.
+
+compute_embeddings_parallel() shards the segments across a pool of worker
+processes that read the audio from shared memory. The pool is created once at
+the configured size and kept across files. Spawned workers re-import the
+parent's __main__ module (e.g. SoftWhisper.py and, through it, speaker_tagger),
+so neither this module nor speaker_tagger imports TensorFlow at module level.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import librosa
+
+SAMPLE_RATE = 16000
+N_MFCC = 40
+N_FFT = 2048
+HOP_LENGTH = 512
+
+# Longest stretch of audio (seconds) whose features are computed in one pass;
+# bounds the memory used by the STFT.
+BLOCK_SECONDS = 600.0
+
+# Same thresholds as speaker_tagger.get_embeddings().
+MIN_SEGMENT_DURATION = 0.05
+MIN_FRAMES_FOR_DELTA = 7
+
+
+def _log(message: str):
+    print(f"[DEBUG SpeakerEmbeddings] {message}")
+
+
+def zero_embedding(n_mfcc=N_MFCC):
+    embedding = np.zeros(n_mfcc * 3 * 2) + 1e-6
+    return embedding / np.linalg.norm(embedding)
+
+
+def plan_blocks(times, block_seconds=BLOCK_SECONDS):
+    """
+    Groups segments into blocks of audio processed together.
+
+    Parameters:
+        times (sequence): (start, end) pairs in seconds.
+
+    Returns:
+        list: (block_start, block_end, [segment indices]) tuples. A segment longer
+        than block_seconds gets a block of its own.
+    """
+    order = sorted(range(len(times)), key=lambda i: times[i][0])
+    blocks = []
+    current = None
+    for i in order:
+        start, end = times[i]
+        if current is not None and max(current[1], end) - current[0] <= block_seconds:
+            current[1] = max(current[1], end)
+            current[2].append(i)
+        else:
+            current = [start, end, [i]]
+            blocks.append(current)
+    return [tuple(block) for block in blocks]
+
+
+def _sample_range(samples, sr, start, end):
+    # Same sample arithmetic as librosa.load(offset=start, duration=end - start).
+    first = max(0, int(start * sr))
+    last = min(len(samples), first + max(0, int((end - start) * sr)))
+    return first, max(first, last)
+
+
+def _block_samples(samples, sr, start, end):
+    first, last = _sample_range(samples, sr, start, end)
+    y = samples[first:last]
+    if y.dtype == np.int16:
+        y = y.astype(np.float32) / 32768.0
+    return first, y
+
+
+def compute_embeddings(samples, times, sr=SAMPLE_RATE, n_mfcc=N_MFCC, block_seconds=BLOCK_SECONDS):
+    """
+    Computes the speaker embeddings of many segments of one audio buffer.
+
+    Parameters:
+        samples (np.ndarray): Mono audio, float32 in [-1, 1] or int16 (see
+            speaker_tagger.load_audio_buffer).
+        times (sequence): (start, end) pairs in seconds, one per segment.
+
+    Returns:
+        np.ndarray: Array of shape (len(times), n_mfcc * 6) of normalized embeddings.
+    """
+    embedding_dim = n_mfcc * 3 * 2
+    embeddings = np.tile(zero_embedding(n_mfcc), (len(times), 1))
+    short = 0
+
+    for block_start, block_end, indices in plan_blocks(times, block_seconds):
+        offset, y = _block_samples(samples, sr, block_start, block_end)
+        if len(y) < N_FFT:
+            short += len(indices)
+            continue
+
+        # Frame t of the block is centered on sample offset + t * HOP_LENGTH.
+        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc, n_fft=N_FFT, hop_length=HOP_LENGTH)
+        total_frames = mfcc.shape[1]
+        if total_frames >= MIN_FRAMES_FOR_DELTA:
+            features = np.vstack([mfcc, librosa.feature.delta(mfcc), librosa.feature.delta(mfcc, order=2)])
+        else:
+            features = mfcc
+        features = features.astype(np.float64)
+
+        # Prefix sums of the features and their squares: column k holds the sum of frames [0, k).
+        sums = np.zeros((features.shape[0], total_frames + 1))
+        squares = np.zeros_like(sums)
+        np.cumsum(features, axis=1, out=sums[:, 1:])
+        np.cumsum(features * features, axis=1, out=squares[:, 1:])
+
+        for i in indices:
+            start, end = times[i]
+            if end - start < MIN_SEGMENT_DURATION:
+                short += 1
+                continue
+            first, last = _sample_range(samples, sr, start, end)
+            length = last - first
+            if length < N_FFT:
+                short += 1
+                continue
+            # A segment analysed on its own yields 1 + length // HOP_LENGTH frames.
+            frame_count = 1 + length // HOP_LENGTH
+            f0 = min(int(round((first - offset) / HOP_LENGTH)), total_frames - 1)
+            f1 = min(f0 + frame_count, total_frames)
+            n = f1 - f0
+
+            mean = (sums[:, f1] - sums[:, f0]) / n
+            std = np.sqrt(np.maximum((squares[:, f1] - squares[:, f0]) / n - mean * mean, 0.0))
+            if frame_count < MIN_FRAMES_FOR_DELTA or features.shape[0] == n_mfcc:
+                # Too few frames for deltas: static statistics only, padded with zeros.
+                embedding = np.zeros(embedding_dim)
+                embedding[:n_mfcc] = mean[:n_mfcc]
+                embedding[n_mfcc:2 * n_mfcc] = std[:n_mfcc]
+            else:
+                embedding = np.empty(embedding_dim)
+                for k in range(3):
+                    rows = slice(k * n_mfcc, (k + 1) * n_mfcc)
+                    embedding[2 * k * n_mfcc:(2 * k + 1) * n_mfcc] = mean[rows]
+                    embedding[(2 * k + 1) * n_mfcc:(2 * k + 2) * n_mfcc] = std[rows]
+
+            norm = np.linalg.norm(embedding)
+            embeddings[i] = embedding / (norm if norm > 0 else 1e-6)
+
+    if short:
+        _log(f"[WARN] {short} segment(s) too short for a reliable embedding; using zero vectors.")
+    return embeddings
+
+
+# --- Parallel embedding ---
+# Shards shorter than this are not worth a round trip to a worker (seconds).
+MIN_SHARD_SECONDS = 30.0
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def default_worker_count():
+    """
+    Returns the default number of embedding processes: 80% of the logical cores,
+    the same rule used for Whisper.cpp threads.
+    """
+    return max(1, int((os.cpu_count() or 1) * 0.8))
+
+
+def _get_pool(workers):
+    # The pool is only replaced when the configured worker count changes.
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=True)
+            _pool = None
+        if _pool is None:
+            # "spawn" rather than fork: forking a process with TensorFlow or Tk
+            # threads running is unsafe. The workers re-import the parent's
+            # __main__, whose imports therefore load no TensorFlow (see get_segmenter).
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+            _log(f"Started {workers} embedding worker processes.")
+        return _pool
+
+
+def shutdown_pool():
+    """
+    Stops the embedding worker processes; they are started again when needed.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _log("Embedding worker processes stopped.")
+        _pool = None
+        _pool_workers = 0
+
+
+def _attach_shared_memory(name):
+    try:
+        # Only the creating process may unlink the block (Python 3.13+).
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _embed_shard(shm_name, shape, dtype, times, sr, n_mfcc):
+    # Runs in a worker process: view the shared audio buffer without copying it.
+    shm = _attach_shared_memory(shm_name)
+    try:
+        samples = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        embeddings = compute_embeddings(samples, times, sr, n_mfcc)
+        del samples
+        return embeddings
+    finally:
+        shm.close()
+
+
+def compute_embeddings_parallel(samples, times, sr=SAMPLE_RATE, n_mfcc=N_MFCC, workers=None):
+    """
+    Same as compute_embeddings(), with the segments sharded across a pool of
+    worker processes.
+
+    The audio buffer is copied once into shared memory, which the workers map
+    instead of receiving pickled copies. Falls back to compute_embeddings() in
+    this process for a single worker, a single shard, or if the pool fails.
+
+    Parameters:
+        workers (int, optional): Number of worker processes (default: default_worker_count()).
+    """
+    workers = workers or default_worker_count()
+    if workers <= 1 or len(times) < 2:
+        return compute_embeddings(samples, times, sr, n_mfcc)
+
+    span = max(end for _, end in times) - min(start for start, _ in times)
+    # Two shards per worker smooth out uneven shards.
+    shard_seconds = min(BLOCK_SECONDS, max(MIN_SHARD_SECONDS, span / (workers * 2)))
+    shards = [indices for _, _, indices in plan_blocks(times, shard_seconds)]
+    if len(shards) < 2:
+        return compute_embeddings(samples, times, sr, n_mfcc)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, samples.nbytes))
+    try:
+        shared = np.ndarray(samples.shape, dtype=samples.dtype, buffer=shm.buf)
+        shared[:] = samples
+        del shared
+
+        _log(f"Computing {len(times)} embeddings in {len(shards)} shards on "
+             f"{min(workers, len(shards))} of {workers} processes.")
+        pool = _get_pool(workers)
+        futures = [
+            pool.submit(_embed_shard, shm.name, samples.shape, samples.dtype.str,
+                        [times[i] for i in indices], sr, n_mfcc)
+            for indices in shards
+        ]
+        embeddings = np.empty((len(times), n_mfcc * 3 * 2))
+        for indices, future in zip(shards, futures):
+            embeddings[indices] = future.result()
+        return embeddings
+    except (BrokenProcessPool, OSError) as e:
+        _log(f"[WARN] Parallel embedding failed ({e}); computing in this process.")
+        shutdown_pool()
+        return compute_embeddings(samples, times, sr, n_mfcc)
+    finally:
+        shm.close()
+        shm.unlink()
@@ -18,46 +18,96 @@ Usage:
 ================================================================================
 """
 
+import gc
 import sys
 import subprocess
+import threading
 from pathlib import Path
 from typing import Optional
 import numpy as np
 import librosa
-from inaSpeechSegmenter import Segmenter
-from sklearn.cluster import AgglomerativeClustering
 from sklearn.metrics.pairwise import cosine_distances
 import diarizer_core_types
+import audio_cache
+from audio_decode import open_wav_pcm16
+from speaker_embeddings import compute_embeddings_parallel
+from speaker_clustering import cluster_embeddings, EXACT_LIMIT
 
 # --- Constants & Configuration ---
-AUDIO_CACHE_FOLDER = Path("./audio_cache")
+AUDIO_CACHE_FOLDER = audio_cache.AUDIO_CACHE_FOLDER
 FRAME_DURATION = 0.05  # seconds per frame
 
+# Process-wide inaSpeechSegmenter instance, created on first use (see get_segmenter).
+_segmenter = None
+_segmenter_lock = threading.Lock()
+
 # --- Logging Function ---
 def _log(message: str):
     print(f"[DEBUG SpeakerTagger] {message}")
 
+# --- Shared Segmenter ---
+def get_segmenter():
+    """
+    Returns the process-wide inaSpeechSegmenter instance, building it on first use.
+
+    Building the segmenter loads and warms up its Keras models, which takes
+    several seconds; the instance is therefore kept loaded across files until
+    release_segmenter() is called.
+    """
+    global _segmenter
+    with _segmenter_lock:
+        if _segmenter is None:
+            _log("Loading inaSpeechSegmenter models...")
+            # Imported here, not at module level: embedding worker processes import
+            # this module through the GUI's __main__ and must not load TensorFlow.
+            from inaSpeechSegmenter import Segmenter
+            _segmenter = Segmenter()
+            _log("inaSpeechSegmenter models loaded.")
+        return _segmenter
+
+def release_segmenter():
+    """
+    Unloads the shared segmenter to free its memory. The next diarization run
+    loads it again.
+    """
+    global _segmenter
+    with _segmenter_lock:
+        if _segmenter is None:
+            return
+        _segmenter = None
+        try:
+            from tensorflow.keras import backend
+            backend.clear_session()
+        except Exception as e:
+            _log(f"[WARN] Could not clear the Keras session: {e}")
+        gc.collect()
+        _log("inaSpeechSegmenter models released.")
+
+def segment_audio(audio_path: Path):
+    """
+    Runs speech segmentation on an audio file with the shared segmenter.
+    """
+    segmenter = get_segmenter()
+    # The Keras models are not safe to run from several threads at once.
+    with _segmenter_lock:
+        return segmenter(str(audio_path))
+
 # --- Audio Extraction Helper ---
-def extract_audio(file_path: Path) -> Path:
-    if file_path.suffix.lower() in ['.wav', '.mp3']:
-        _log(f"Input file {file_path} is already an audio file.")
+def extract_audio(file_path: Path, max_cache_bytes: int = audio_cache.DEFAULT_MAX_BYTES) -> Path:
+    """
+    Returns a 16 kHz mono 16-bit WAV version of `file_path`: the file itself when it
+    already is one, otherwise an entry of the decoded audio cache (see audio_cache.py),
+    which is only decoded by FFmpeg on a cache miss.
+    """
+    if file_path.suffix.lower() == '.wav' and open_wav_pcm16(str(file_path)) is not None:
+        _log(f"Input file {file_path} is already 16 kHz mono PCM.")
         return file_path
-    if not AUDIO_CACHE_FOLDER.exists():
-        AUDIO_CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
-    audio_output_path = AUDIO_CACHE_FOLDER / (file_path.stem + "_audio_16k.wav")
-    _log(f"Extracting audio from {file_path} to {audio_output_path}...")
-    command = [
-        "ffmpeg", "-y", "-i", str(file_path),
-        "-vn", "-acodec", "pcm_s16le", "-ac", "1", "-ar", "16000",
-        "-hide_banner", "-loglevel", "error", str(audio_output_path)
-    ]
-    result = subprocess.run(command, capture_output=True, text=True)
-    if result.returncode != 0:
-        _log(f"[ERROR] FFmpeg extraction failed with code {result.returncode}.")
-        if audio_output_path.exists():
-            audio_output_path.unlink()
+    try:
+        audio_output_path = audio_cache.cached_wav(file_path, AUDIO_CACHE_FOLDER, max_cache_bytes)
+    except RuntimeError as e:
+        _log(f"[ERROR] FFmpeg extraction failed: {e}")
         sys.exit(1)
-    _log(f"Audio extracted to {audio_output_path}.")
+    _log(f"Audio available at {audio_output_path}.")
     return audio_output_path
 
 # --- convert_to_mp4 function ---
@@ -105,6 +155,30 @@ def merge_segments(segments, gap_threshold=0.5):
               merged.append(seg)
     return merged
 
+# --- Whole-file audio buffer ---
+def load_audio_buffer(audio_path: Path, sr: int = 16000):
+    """
+    Decodes an audio file once into a mono sample buffer at `sr` Hz.
+
+    16-bit mono WAV files at the target rate (such as the ones extract_audio
+    writes) are memory-mapped instead of read, so only the pages touched by
+    segments are loaded. Anything else is decoded and resampled once by librosa.
+
+    Returns:
+        A 1-D numpy array (int16 memmap or float32) of samples.
+    """
+    samples = open_wav_pcm16(str(audio_path), sr)
+    if samples is not None:
+        _log(f"Memory-mapped {len(samples) / sr:.1f}s of audio from {audio_path}.")
+        return samples
+    samples, _ = librosa.load(str(audio_path), sr=sr, mono=True)
+    _log(f"Decoded {len(samples) / sr:.1f}s of audio from {audio_path}.")
+    return samples
+
+def _zero_embedding(embedding_dim):
+    embedding = np.zeros(embedding_dim) + 1e-6
+    return embedding / np.linalg.norm(embedding)
+
 # --- Function to compute speaker embedding using MFCC mean and std ---
 def get_embeddings(audio_path: Path, start: float, end: float, orig_label: str = "", n_mfcc=40):
     """
@@ -125,29 +199,35 @@ def get_embeddings(audio_path: Path, start: float, end: float, orig_label: str =
         A normalized numpy array representing the speaker embedding.
         Returns a normalized zero-like vector if computation fails or segment is too short.
     """
-    # Calculate the expected dimension: (static + delta + delta-delta) * (mean + std) * n_mfcc
     embedding_dim = n_mfcc * 3 * 2
-
+    duration = end - start
+    if duration < 0.05:
+        _log(f"[WARN] Segment duration ({duration:.3f}s) too short for reliable embedding: "
+             f"{orig_label}-{start:.2f}-{end:.2f}. Returning zero vector.")
+        return _zero_embedding(embedding_dim)
     try:
-        duration = end - start
-        # Add a check for minimum duration, e.g., 50ms, as very short clips are problematic
-        min_duration = 0.05 # 50 milliseconds
-        if duration < min_duration:
-            _log(f"[WARN] Segment duration ({duration:.3f}s) too short for reliable embedding: "
-                 f"{orig_label}-{start:.2f}-{end:.2f}. Returning zero vector.")
-            embedding = np.zeros(embedding_dim) + 1e-6
-            return embedding / np.linalg.norm(embedding)
-
         # Load the specific audio segment
         y, sr = librosa.load(str(audio_path), sr=16000, offset=start, duration=duration)
+    except Exception as e:
+        _log(f"[ERROR] Failed to compute embedding for segment {orig_label}-{start:.2f}-{end:.2f}: {e}")
+        return _zero_embedding(embedding_dim)
+    return embedding_from_samples(y, sr, start, end, orig_label, n_mfcc)
 
+def embedding_from_samples(y, sr: int, start: float, end: float, orig_label: str = "", n_mfcc=40):
+    """
+    Computes the speaker embedding of the samples `y` of one segment (see get_embeddings).
+    `start`, `end` and `orig_label` are only used for logging.
+    """
+    # Calculate the expected dimension: (static + delta + delta-delta) * (mean + std) * n_mfcc
+    embedding_dim = n_mfcc * 3 * 2
+
+    try:
         # Check if loaded audio is substantial enough
         # n_fft default is 2048, hop_length default is 512. Need at least n_fft samples.
         if len(y) < 2048:
              _log(f"[WARN] Not enough audio samples ({len(y)}) loaded for segment "
                   f"{orig_label}-{start:.2f}-{end:.2f}. Returning zero vector.")
-             embedding = np.zeros(embedding_dim) + 1e-6
-             return embedding / np.linalg.norm(embedding)
+             return _zero_embedding(embedding_dim)
 
         # 1. Compute static MFCC features
         mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
@@ -202,8 +282,7 @@ def get_embeddings(audio_path: Path, start: float, end: float, orig_label: str =
     except Exception as e:
         _log(f"[ERROR] Failed to compute embedding for segment {orig_label}-{start:.2f}-{end:.2f}: {e}")
         # Return a normalized zero-like vector matching the expected dimension in case of any error
-        embedding = np.zeros(embedding_dim) + 1e-6
-        embedding = embedding / np.linalg.norm(embedding) # Normalize the zero-like vector too
+        embedding = _zero_embedding(embedding_dim)
 
     return embedding
 
@@ -220,21 +299,46 @@ def get_gender(orig_label: str) -> str:
 
 # --- Speaker Tagger Class with Gender-aware Clustering and Chronological Labeling ---
 class SpeakerTagger:
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None, exact_clustering_limit: int = EXACT_LIMIT):
+        # Number of embedding processes; None or 0 uses 80% of the logical cores.
+        self.workers = workers or None
+        # Gender groups with more segments than this use two-stage clustering.
+        self.exact_clustering_limit = exact_clustering_limit
         _log("SpeakerTagger initialized in auto-detection mode.")
 
-    def process_audio(self, audio_path: Path):
+    def process_audio(self, audio_path: Path, progress_callback=None, workers: Optional[int] = None,
+                      exact_clustering_limit: Optional[int] = None):
+        """
+        Segments, embeds and clusters the speech of an audio file.
+
+        progress_callback, if given, is called as progress_callback(progress, message)
+        with progress from 0 to 100 at the start of each stage. workers and
+        exact_clustering_limit, if given, override the tagger's settings for this call.
+
+        Returns:
+            list: (start, end, speaker_number, gender, orig_label) tuples.
+        """
+        def report(progress, message):
+            if progress_callback:
+                progress_callback(progress, message)
+
+        workers = workers or self.workers
+        exact_clustering_limit = exact_clustering_limit or self.exact_clustering_limit
         _log(f"Processing audio: {audio_path}")
         try:
-            segmenter = Segmenter()
-            segments = segmenter(str(audio_path))
+            report(0, "Detecting speech...")
+            segments = segment_audio(audio_path)
             _log(f"Speech segmentation completed. {len(segments)} segments found.")
             segments = merge_segments(segments)
             _log(f"After merging, {len(segments)} segments remain.")
 
-            # For each valid segment, extract embedding and detected gender.
-            embeddings = []
+            # Decode the audio once; every segment is sliced out of this buffer.
+            report(40, "Computing speaker embeddings...")
+            samples = load_audio_buffer(audio_path)
+
+            # Collect the valid segments and their detected gender.
             valid_segments = []
+            times = []
             genders = []
             for seg in segments:
                 if len(seg) >= 3:
@@ -245,12 +349,13 @@ class SpeakerTagger:
                     except Exception as e:
                         _log(f"[ERROR] Could not convert start/end to float for segment {seg}: {e}")
                         continue
-                    emb = get_embeddings(audio_path, start, end, orig_label)
-                    embeddings.append(emb)
                     valid_segments.append(seg)
+                    times.append((start, end))
                     genders.append(get_gender(orig_label))
-            embeddings = np.array(embeddings)
+            # Compute all embeddings in batched passes over the audio, sharded across processes.
+            embeddings = compute_embeddings_parallel(samples, times, workers=workers).reshape(len(times), -1)
             _log(f"Computed embeddings for segments, resulting in shape {embeddings.shape}.")
+            report(80, "Clustering speakers...")
 
             # Group segments by gender and perform clustering for each group separately.
             groups = {}
@@ -267,11 +372,8 @@ class SpeakerTagger:
                 group_segs = data["segments"]
                 if len(group_emb) == 0:
                     continue
-                clustering = AgglomerativeClustering(metric='cosine',
-                                                     linkage='average',
-                                                     distance_threshold=0.05, 
-                                                     n_clusters=None)
-                group_labels = clustering.fit_predict(group_emb)
+                # Exact agglomerative clustering, or two-stage clustering for very many segments.
+                group_labels = cluster_embeddings(group_emb, exact_limit=exact_clustering_limit)
                 _log(f"Gender group '{gender}' produced {len(set(group_labels))} clusters.")
                 # Add composite label (gender, original cluster) to each segment.
                 for seg, clabel in zip(group_segs, group_labels):
@@ -300,6 +402,7 @@ class SpeakerTagger:
                 final_segments.append(new_seg)
 
             _log(f"Chronologically assigned {next_speaker_number} unique speakers.")
+            report(100, f"Found {next_speaker_number} speakers.")
             return final_segments
 
         except Exception as e:
@@ -3,38 +3,16 @@ Minimal function to transform Whisper's bracketed output to SRT format
 """
 
 import os
-import re
 import tkinter.filedialog as filedialog
 import tkinter.messagebox as messagebox
 
+from segment_store import SegmentStore
+
 def whisper_to_srt(whisper_output):
     """
     Convert Whisper output to SRT format with minimal changes.
     """
-    # Split into lines and process each line
-    lines = whisper_output.strip().split('\n')
-    srt_parts = []
-    
-    counter = 1
-    for line in lines:
-        # Match the timestamp pattern
-        match = re.match(r'\[(\d{2}:\d{2}:\d{2}\.\d{3}) --> (\d{2}:\d{2}:\d{2}\.\d{3})\] (.*)', line.strip())
-        if match:
-            start_time, end_time, text = match.groups()
-            
-            # Convert dots to commas
-            start_time = start_time.replace('.', ',')
-            end_time = end_time.replace('.', ',')
-            
-            # Format as SRT entry
-            srt_parts.append(f"{counter}")
-            srt_parts.append(f"{start_time} --> {end_time}")
-            srt_parts.append(f"{text.strip()}")
-            srt_parts.append("")  # Empty line
-            
-            counter += 1
-    
-    return "\n".join(srt_parts)
+    return SegmentStore.from_whisper_output(whisper_output).to_srt()
 
 def save_whisper_as_srt(whisper_output, original_file_path, parent_window=None, status_callback=None):
     """Save Whisper output as SRT with minimal conversion."""
@@ -0,0 +1,38 @@
+import os
+
+from audio_cache import ENTRY_SUFFIX, entry_name, find_cached_wav
+
+
+def test_entry_name_is_stable_for_an_unchanged_file(tmp_path):
+    media = tmp_path / "interview.mp3"
+    media.write_bytes(b"audio" * 100)
+    name = entry_name(media)
+    assert name == entry_name(str(media))
+    assert name.startswith("interview-") and name.endswith(ENTRY_SUFFIX)
+
+
+def test_entry_name_changes_with_size_or_mtime(tmp_path):
+    media = tmp_path / "interview.mp3"
+    media.write_bytes(b"audio" * 100)
+    os.utime(media, ns=(1_000_000_000, 1_000_000_000))
+    original = entry_name(media)
+
+    os.utime(media, ns=(2_000_000_000, 2_000_000_000))
+    touched = entry_name(media)
+    assert touched != original
+
+    media.write_bytes(b"audio" * 101)
+    os.utime(media, ns=(2_000_000_000, 2_000_000_000))
+    assert entry_name(media) not in (original, touched)
+
+
+def test_changed_file_no_longer_finds_its_old_entry(tmp_path):
+    media = tmp_path / "interview.mp3"
+    media.write_bytes(b"audio" * 100)
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    (cache / entry_name(media)).write_bytes(b"RIFF")
+    assert find_cached_wav(media, cache) == cache / entry_name(media)
+
+    media.write_bytes(b"edited audio" * 100)
+    assert find_cached_wav(media, cache) is None
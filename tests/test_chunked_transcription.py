@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from chunked_transcription import plan_chunks, quietest_time
+
+
+def test_chunks_are_cut_at_max_length_without_quiet_points():
+    assert plan_chunks(0.0, 300.0) == [(0.0, 120.0), (120.0, 240.0), (240.0, 300.0)]
+    assert plan_chunks(30.0, 100.0) == [(30.0, 100.0)]
+
+
+def test_chunk_boundaries_snap_to_quiet_points():
+    windows = []
+
+    def quiet_point(window_start, window_end):
+        windows.append((window_start, window_end))
+        return window_end - 4.0
+
+    chunks = plan_chunks(10.0, 300.0, quiet_point, max_chunk=120.0, search_window=15.0)
+    assert chunks == [(10.0, 126.0), (126.0, 242.0), (242.0, 300.0)]
+    assert windows == [(115.0, 130.0), (231.0, 246.0)]
+
+
+def test_search_window_never_reaches_the_first_half_of_a_chunk():
+    windows = []
+    plan_chunks(0.0, 50.0, lambda start, end: windows.append((start, end)) or end, max_chunk=20.0,
+                search_window=15.0)
+    assert windows[0] == (10.0, 20.0)
+
+
+@pytest.mark.parametrize("split", [0.0, -5.0, 121.0])
+def test_quiet_points_outside_the_chunk_are_ignored(split):
+    assert plan_chunks(0.0, 200.0, lambda start, end: split) == [(0.0, 120.0), (120.0, 200.0)]
+
+
+def test_quietest_time_finds_the_silent_frame():
+    rate = 16000
+    samples = np.random.default_rng(0).uniform(-8000, 8000, rate * 2).astype(np.int16)
+    samples[int(1.2 * rate):int(1.3 * rate)] = 0
+    assert 101.2 <= quietest_time(samples, rate, 100.0) <= 101.3
+    assert quietest_time(samples[:10], rate, 100.0) is None
@@ -0,0 +1,17 @@
+from interval_index import IntervalIndex
+
+
+def test_best_overlap_sums_split_segments_per_speaker():
+    # Speaker A talks 0.4 s + 0.4 s around speaker B's single 0.6 s turn.
+    index = IntervalIndex([(0.0, 0.4, "A"), (0.4, 1.0, "B"), (1.0, 1.4, "A")])
+    assert index.best_overlap(0.0, 1.4) == "A"
+
+
+def test_best_overlap_tie_goes_to_earliest_segment():
+    index = IntervalIndex([(0.0, 0.5, "A"), (0.5, 1.0, "B")])
+    assert index.best_overlap(0.0, 1.0) == "A"
+
+
+def test_best_overlap_without_overlap_falls_back_to_default():
+    index = IntervalIndex([(0.0, 1.0, "A")])
+    assert index.best_overlap(2.0, 3.0, default="none") == "none"
@@ -0,0 +1,94 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from model_download import ChecksumMismatch, download_model
+
+CONTENT = bytes(range(256)) * 4096
+
+
+class ModelHandler(BaseHTTPRequestHandler):
+    # Set per test: whether Range headers are honoured, and the Range headers seen.
+    honour_range = True
+    ranges = []
+
+    def do_GET(self):
+        requested = self.headers.get("Range")
+        ModelHandler.ranges.append(requested)
+        if requested and self.honour_range:
+            start = int(requested.split("=")[1].rstrip("-"))
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(CONTENT)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}")
+            body = CONTENT[start:]
+        else:
+            self.send_response(200)
+            body = CONTENT
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    ModelHandler.honour_range = True
+    ModelHandler.ranges = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ModelHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_partial_download_is_resumed(tmp_path, base_url):
+    (tmp_path / "ggml-test.bin.part").write_bytes(CONTENT[:1000])
+    path = download_model("ggml-test.bin", tmp_path, base_url=base_url)
+    assert ModelHandler.ranges == ["bytes=1000-"]
+    assert open(path, 'rb').read() == CONTENT
+    assert not (tmp_path / "ggml-test.bin.part").exists()
+
+
+def test_server_ignoring_range_restarts_the_file(tmp_path, base_url):
+    ModelHandler.honour_range = False
+    (tmp_path / "ggml-test.bin.part").write_bytes(b"stale" * 100)
+    path = download_model("ggml-test.bin", tmp_path, base_url=base_url)
+    assert open(path, 'rb').read() == CONTENT
+
+
+def test_complete_partial_file_is_used_after_416(tmp_path, base_url):
+    (tmp_path / "ggml-test.bin.part").write_bytes(CONTENT)
+    path = download_model("ggml-test.bin", tmp_path, base_url=base_url)
+    assert ModelHandler.ranges == [f"bytes={len(CONTENT)}-"]
+    assert open(path, 'rb').read() == CONTENT
+
+
+def test_oversized_partial_file_is_downloaded_again_after_416(tmp_path, base_url):
+    (tmp_path / "ggml-test.bin.part").write_bytes(CONTENT + b"garbage")
+    path = download_model("ggml-test.bin", tmp_path, base_url=base_url)
+    assert ModelHandler.ranges == [f"bytes={len(CONTENT) + 7}-", None]
+    assert open(path, 'rb').read() == CONTENT
+
+
+def test_digest_mismatch_discards_the_download(tmp_path, base_url):
+    with pytest.raises(ChecksumMismatch):
+        download_model("ggml-test.bin", tmp_path, base_url=base_url, expected_sha256="0" * 64)
+    assert not (tmp_path / "ggml-test.bin").exists()
+    assert not (tmp_path / "ggml-test.bin.part").exists()
+
+
+def test_manifest_digest_is_checked(tmp_path, base_url):
+    digest = hashlib.sha256(CONTENT).hexdigest()
+    (tmp_path / "SHA256SUMS").write_text(f"{digest}  ggml-test.bin\n", encoding='utf-8')
+    path = download_model("ggml-test.bin", tmp_path, base_url=base_url)
+    assert open(path, 'rb').read() == CONTENT
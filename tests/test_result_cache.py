@@ -0,0 +1,89 @@
+import hashlib
+import os
+from pathlib import Path
+
+from result_cache import TranscriptionCache, evict_lru
+from segment_store import SegmentStore
+
+OPTIONS = {'model_name': 'base', 'language': 'auto', 'beam_size': 5, 'task': 'transcribe',
+           'start_time': '00:00:00', 'end_time': ''}
+
+
+def write_entry(folder, name, size, mtime):
+    path = folder / name
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_evict_lru_deletes_oldest_entries_first(tmp_path):
+    oldest = write_entry(tmp_path, "a.json", 100, 1000)
+    middle = write_entry(tmp_path, "b.json", 100, 2000)
+    newest = write_entry(tmp_path, "c.json", 100, 3000)
+    assert evict_lru(tmp_path, 150, "*.json") == 2
+    assert not oldest.exists() and not middle.exists() and newest.exists()
+
+
+def test_evict_lru_skips_files_it_cannot_delete(tmp_path, monkeypatch):
+    locked = write_entry(tmp_path, "a.json", 100, 1000)
+    other = write_entry(tmp_path, "b.json", 100, 2000)
+    newest = write_entry(tmp_path, "c.json", 100, 3000)
+    unlink = Path.unlink
+
+    def failing_unlink(path, *args, **kwargs):
+        if path.name == locked.name:
+            raise PermissionError(13, "The process cannot access the file", str(path))
+        unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "unlink", failing_unlink)
+    # The locked file still takes up space, so newer entries go instead.
+    assert evict_lru(tmp_path, 150, "*.json") == 2
+    assert locked.exists() and not other.exists() and not newest.exists()
+
+
+def test_key_depends_on_content_and_relevant_options(tmp_path):
+    cache = TranscriptionCache(tmp_path / "cache")
+    media = tmp_path / "a.wav"
+    media.write_bytes(b"audio")
+    copy = tmp_path / "b.wav"
+    copy.write_bytes(b"audio")
+
+    key = cache.key(media, OPTIONS)
+    assert cache.key(copy, OPTIONS) == key
+    assert cache.key(media, dict(OPTIONS, output_format='srt')) == key
+    assert cache.key(media, dict(OPTIONS, beam_size=1)) != key
+    assert cache.key(media, dict(OPTIONS, vad=True)) != key
+    assert cache.key(media, dict(OPTIONS, whisper_full_json=True)) != key
+
+
+def test_digest_is_reused_until_size_or_mtime_changes(tmp_path):
+    cache = TranscriptionCache(tmp_path / "cache")
+    media = tmp_path / "a.wav"
+    media.write_bytes(b"first")
+    os.utime(media, ns=(1_000_000_000, 1_000_000_000))
+    first = cache.file_digest(media)
+
+    # Same size and mtime: the stored digest is trusted without rereading.
+    media.write_bytes(b"other")
+    os.utime(media, ns=(1_000_000_000, 1_000_000_000))
+    assert cache.file_digest(media) == first
+    assert TranscriptionCache(tmp_path / "cache").file_digest(media) == first
+
+    os.utime(media, ns=(2_000_000_000, 2_000_000_000))
+    assert cache.file_digest(media) == hashlib.sha256(b"other").hexdigest()
+
+    media.write_bytes(b"longer content")
+    os.utime(media, ns=(2_000_000_000, 2_000_000_000))
+    assert cache.file_digest(media) == hashlib.sha256(b"longer content").hexdigest()
+
+
+def test_results_round_trip_with_their_segments(tmp_path):
+    cache = TranscriptionCache(tmp_path / "cache")
+    store = SegmentStore()
+    store.append(0, 1500, "Hello")
+    cache.put("tr-test", {'raw': "[00:00:00.000 --> 00:00:01.500]  Hello\n", 'store': store, 'cancelled': False})
+
+    result = cache.get("tr-test")
+    assert 'cancelled' not in result
+    assert [(segment.start, segment.end, segment.text) for segment in result['store']] == [(0.0, 1.5, "Hello")]
+    assert cache.get("tr-missing") is None
@@ -0,0 +1,45 @@
+import json
+import math
+
+from diarization_gui import parse_srt
+from segment_store import UNKNOWN_SPEAKER, SegmentStore
+
+
+def sample_store():
+    store = SegmentStore()
+    store.append(0, 1500, "Hello there.", speaker=1, confidence=0.875)
+    store.append(1500, 3250, "Grüße, «world»!")
+    store.append(3600250, 3601000, "An hour in.", speaker=2)
+    return store
+
+
+def columns(store):
+    return [(s.start_ms, s.end_ms, s.text, s.speaker,
+             None if math.isnan(s.confidence) else s.confidence) for s in store]
+
+
+def test_dict_round_trip_survives_json():
+    store = sample_store()
+    restored = SegmentStore.from_dict(json.loads(json.dumps(store.to_dict())))
+    assert columns(restored) == columns(store)
+    assert restored[1].speaker == UNKNOWN_SPEAKER
+    assert math.isnan(restored[1].confidence)
+
+
+def test_srt_round_trip():
+    store = sample_store()
+    srt = store.to_srt()
+    assert srt.startswith("1\n00:00:00,000 --> 00:00:01,500\nHello there.\n\n2\n")
+    assert "3\n01:00:00,250 --> 01:00:01,000\nAn hour in.\n" in srt
+
+    restored = SegmentStore.from_srt_entries(parse_srt(srt))
+    assert [(s.start_ms, s.end_ms, s.text) for s in restored] == [(s.start_ms, s.end_ms, s.text) for s in store]
+    assert restored.to_srt() == srt
+
+
+def test_whisper_lines_are_parsed_and_others_skipped():
+    store = SegmentStore.from_whisper_output(
+        "whisper_init_from_file: loading model\n"
+        "[00:00:01.000 --> 00:00:02.500]   Hello.\n"
+        "[00:00:02.500 --> 00:00:04.000]  World.\n")
+    assert [(s.start, s.end, s.text) for s in store] == [(1.0, 2.5, "Hello."), (2.5, 4.0, "World.")]
@@ -0,0 +1,41 @@
+from segment_store import SegmentStore
+from vad import SpeechMap
+
+
+def speech_map():
+    # 10 s of speech at 10-20 s and 5 s at 50-55 s, compacted to 0-10 s and 10-15 s.
+    return SpeechMap([(10.0, 20.0), (50.0, 55.0)])
+
+
+def test_times_map_back_into_their_region():
+    remap = speech_map()
+    assert remap.compact_length == 15.0
+    assert remap.to_original(0.0) == 10.0
+    assert remap.to_original(5.0) == 15.0
+    assert remap.to_original(12.0) == 52.0
+
+
+def test_junction_belongs_to_the_next_region_unless_it_is_an_end():
+    remap = speech_map()
+    assert remap.to_original(10.0) == 50.0
+    assert remap.to_original(10.0, is_end=True) == 20.0
+
+
+def test_times_past_the_end_are_clamped_to_the_last_region():
+    assert speech_map().to_original(30.0) == 55.0
+
+
+def test_empty_map_leaves_times_unchanged():
+    assert SpeechMap([]).to_original(42.5) == 42.5
+
+
+def test_remap_line_and_store():
+    remap = speech_map()
+    assert remap.remap_line("[00:00:09.000 --> 00:00:12.500]  Hello\n") == "[00:00:19.000 --> 00:00:52.500]  Hello\n"
+    assert remap.remap_line("whisper_print_timings: total time\n") == "whisper_print_timings: total time\n"
+
+    store = SegmentStore()
+    store.append(2000, 10000, "first")
+    store.append(10000, 14000, "second")
+    remap.remap_store(store)
+    assert [(segment.start, segment.end) for segment in store] == [(12.0, 20.0), (50.0, 54.0)]
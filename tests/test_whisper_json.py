@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from whisper_json import iter_segments, read_store
+
+DOCUMENT = {
+    "systeminfo": "AVX = 1 | NEON = 0 | {not: [json]}",
+    "model": {"type": "base", "multilingual": True, "vocab": 51865},
+    "params": {"model": "models/ggml-base.bin", "language": "auto", "translate": False},
+    "result": {"language": "en"},
+    "transcription": [
+        {"timestamps": {"from": "00:00:00,000", "to": "00:00:02,000"},
+         "offsets": {"from": 0, "to": 2000}, "text": " Hello, {world} [x]."},
+        {"timestamps": {"from": "00:00:02,000", "to": "00:00:04,500"},
+         "offsets": {"from": 2000, "to": 4500}, "text": " Escapes: \"quoted\", back\\slash, é中.",
+         "tokens": [{"text": "[_BEG_]", "p": 0.1}, {"text": " Esc", "p": 0.5}, {"text": "apes", "p": 1.0}]},
+        {"timestamps": {"from": "00:00:04,500", "to": "00:00:05,000"},
+         "offsets": {"from": 4500, "to": 5000}, "text": ""},
+    ],
+}
+
+
+def write_document(tmp_path, text):
+    path = tmp_path / "out.json"
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 3, 7, 16, 64 * 1024])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_segments_match_json_load_for_any_block_size(tmp_path, block_size, indent):
+    path = write_document(tmp_path, json.dumps(DOCUMENT, indent=indent, ensure_ascii=False))
+    assert list(iter_segments(path, block_size=block_size)) == DOCUMENT["transcription"]
+
+
+def test_missing_transcription_yields_nothing(tmp_path):
+    path = write_document(tmp_path, json.dumps({"result": {"language": "en"}}))
+    assert list(iter_segments(path, block_size=4)) == []
+
+
+def test_truncated_file_raises_value_error(tmp_path):
+    text = json.dumps(DOCUMENT)
+    path = write_document(tmp_path, text[:text.index("Escapes")])
+    with pytest.raises(ValueError):
+        list(iter_segments(path, block_size=5))
+
+
+def test_read_store_takes_offsets_and_token_confidence(tmp_path):
+    store = read_store(write_document(tmp_path, json.dumps(DOCUMENT)))
+    assert [(s.start_ms, s.end_ms, s.text) for s in store][:2] == [
+        (0, 2000, "Hello, {world} [x]."), (2000, 4500, 'Escapes: "quoted", back\\slash, é中.')]
+    assert store[1].confidence == pytest.approx(0.75)
@@ -0,0 +1,116 @@
+import socket
+import subprocess
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+
+import pytest
+
+import whisper_server
+from whisper_server import WhisperServerClient, _free_port, get_server_client, shutdown_servers
+
+DUMMY_SERVER = str(Path(__file__).resolve().parent.parent / "tools" / "dummy_whisper_server.py")
+
+
+@pytest.fixture(autouse=True)
+def stop_servers():
+    yield
+    shutdown_servers()
+
+
+def write_wav(path, seconds):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\0\0" * int(16000 * seconds))
+    return str(path)
+
+
+def test_transcribe_uploads_file_and_parses_verbose_json(tmp_path):
+    wav_path = write_wav(tmp_path / "audio.wav", 12)
+    client = get_server_client(DUMMY_SERVER, "model-a.bin")
+    segments = []
+    try:
+        output = client.transcribe(wav_path, segment_callback=segments.append)
+    finally:
+        client.close()
+
+    assert output["returncode"] == 0
+    assert output["stdout_lines"] == [
+        "[00:00:00.000 --> 00:00:05.000]  Dummy segment 1.\n",
+        "[00:00:05.000 --> 00:00:10.000]  Dummy segment 2.\n",
+        "[00:00:10.000 --> 00:00:12.000]  Dummy segment 3.\n",
+    ]
+    assert segments == output["stdout_lines"]
+
+
+def test_transcribe_returns_promptly_when_cancelled(tmp_path):
+    wav_path = write_wav(tmp_path / "audio.wav", 1)
+    port = _free_port("127.0.0.1")
+    process = subprocess.Popen([sys.executable, DUMMY_SERVER, "--port", str(port), "--inference-delay", "30"],
+                               stdout=subprocess.DEVNULL)
+    try:
+        _wait_for_port(port)
+        client = WhisperServerClient(f"http://127.0.0.1:{port}")
+        stop_event = threading.Event()
+        threading.Timer(0.3, stop_event.set).start()
+        started = time.time()
+        output = client.transcribe(wav_path, stop_event=stop_event)
+        assert output["returncode"] is None
+        assert output["stdout_lines"] == []
+        assert time.time() - started < 5
+    finally:
+        process.kill()
+        process.wait()
+
+
+def _wait_for_port(port):
+    deadline = time.time() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def test_server_is_restarted_after_it_exits(tmp_path):
+    wav_path = write_wav(tmp_path / "audio.wav", 1)
+    client = get_server_client(DUMMY_SERVER, "model-a.bin")
+    client.close()
+    server = whisper_server._servers[(DUMMY_SERVER, "model-a.bin")]
+    server.process.kill()
+    server.process.wait()
+
+    client = get_server_client(DUMMY_SERVER, "model-a.bin")
+    try:
+        assert whisper_server._servers[(DUMMY_SERVER, "model-a.bin")] is not server
+        assert client.transcribe(wav_path)["returncode"] == 0
+    finally:
+        client.close()
+
+
+def test_switching_models_stops_the_previous_server_once_released():
+    first = get_server_client(DUMMY_SERVER, "model-a.bin")
+    old_server = first.server
+    second = get_server_client(DUMMY_SERVER, "model-b.bin")
+    try:
+        # Still in use by the first client, so only retired.
+        assert list(whisper_server._servers) == [(DUMMY_SERVER, "model-b.bin")]
+        assert old_server.is_running()
+        first.close()
+        assert not old_server.is_running()
+
+        third = get_server_client(DUMMY_SERVER, "model-a.bin")
+        third.close()
+        assert list(whisper_server._servers) == [(DUMMY_SERVER, "model-a.bin")]
+        assert second.server.is_running()
+    finally:
+        new_server = second.server
+        second.close()
+    assert not new_server.is_running()
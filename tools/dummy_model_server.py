@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+dummy_model_server.py
+
+Stand-in for the Hugging Face model host, for trying out model downloads
+without the internet. It serves the files of a folder under
+/resolve/main/<file> the way huggingface.co does: with a redirect that carries
+the file's SHA256 in an X-Linked-Etag header, and with support for HTTP Range
+requests. --drop-after cuts every response short after that many bytes, to
+imitate an interrupted connection; retries then resume where the last one
+stopped.
+
+Usage:
+    python tools/dummy_model_server.py --folder /path/to/models --port 8081 --drop-after 1000000
+    (then use base_url="http://127.0.0.1:8081/resolve/main" with model_download.download_model)
+"""
+
+import argparse
+import hashlib
+import os
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "/resolve/main/"
+FILE_PREFIX = "/files/"
+
+
+class DummyModelHandler(BaseHTTPRequestHandler):
+    folder = "."
+    drop_after = None
+    send_etag = True
+    _digests = {}
+
+    def _file(self, name):
+        path = os.path.join(self.folder, os.path.basename(name))
+        return path if os.path.isfile(path) else None
+
+    def _digest(self, path):
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        if key not in self._digests:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    sha.update(block)
+            DummyModelHandler._digests[key] = sha.hexdigest()
+        return self._digests[key]
+
+    def do_GET(self):
+        if self.path.startswith(PREFIX):
+            path = self._file(self.path[len(PREFIX):])
+            if path is None:
+                self._error(404)
+                return
+            self.send_response(302)
+            self.send_header("Location", FILE_PREFIX + os.path.basename(path))
+            if self.send_etag:
+                self.send_header("X-Linked-Etag", f'"{self._digest(path)}"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if not self.path.startswith(FILE_PREFIX):
+            self._error(404)
+            return
+        path = self._file(self.path[len(FILE_PREFIX):])
+        if path is None:
+            self._error(404)
+            return
+
+        size = os.path.getsize(path)
+        start = 0
+        match = re.match(r'bytes=(\d+)-$', self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size - start))
+        self.end_headers()
+
+        remaining = size - start
+        if self.drop_after is not None:
+            remaining = min(remaining, self.drop_after)
+        with open(path, 'rb') as f:
+            f.seek(start)
+            while remaining > 0:
+                block = f.read(min(remaining, 64 * 1024))
+                if not block:
+                    break
+                self.wfile.write(block)
+                remaining -= len(block)
+        if self.drop_after is not None:
+            # Close without sending the rest, like a dropped connection.
+            self.close_connection = True
+
+    def _error(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dummy model download server")
+    parser.add_argument("--folder", default=".", help="Folder with the files to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--drop-after", type=int, default=None,
+                        help="Cut every response short after this many bytes")
+    parser.add_argument("--no-etag", action="store_true", help="Do not send X-Linked-Etag")
+    args = parser.parse_args()
+
+    DummyModelHandler.folder = args.folder
+    DummyModelHandler.drop_after = args.drop_after
+    DummyModelHandler.send_etag = not args.no_etag
+    server = ThreadingHTTPServer((args.host, args.port), DummyModelHandler)
+    print(f"Dummy model server serving {args.folder} on http://{args.host}:{args.port}{PREFIX}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+dummy_whisper_server.py
+
+Stand-in for the whisper.cpp server, for trying out the resident backend
+without a real model. It accepts the same command line options as
+whisper-server (-m, --host, --port, -t), answers POST /inference with one fake
+5-second segment per 5 seconds of the uploaded WAV file, and accepts
+POST /load to switch models.
+
+Usage:
+    python tools/dummy_whisper_server.py -m models/whisper/ggml-base.bin --port 8080
+"""
+
+import argparse
+import email.parser
+import email.policy
+import io
+import json
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SEGMENT_LENGTH = 5.0
+
+
+def _parse_form(headers, body):
+    # Parse a multipart/form-data body into {name: bytes}.
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode('utf-8') + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        fields[name] = part.get_payload(decode=True)
+    return fields
+
+
+class DummyWhisperHandler(BaseHTTPRequestHandler):
+    model = ""
+    inference_delay = 0.0
+
+    def do_GET(self):
+        self._reply(200, "text/html", b"<html><body>Dummy whisper.cpp server</body></html>")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        fields = _parse_form(self.headers, body)
+        if self.path == "/load":
+            DummyWhisperHandler.model = fields.get('model', b"").decode('utf-8')
+            self._reply(200, "application/json", json.dumps({"status": "ok"}).encode('utf-8'))
+            return
+        if self.path != "/inference" or 'file' not in fields:
+            self._reply(400, "application/json", json.dumps({"error": "bad request"}).encode('utf-8'))
+            return
+
+        time.sleep(DummyWhisperHandler.inference_delay)
+        with wave.open(io.BytesIO(fields['file'])) as wav:
+            duration = wav.getnframes() / float(wav.getframerate())
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + SEGMENT_LENGTH)
+            segments.append({"id": len(segments), "start": round(start, 3), "end": round(end, 3),
+                             "text": f" Dummy segment {len(segments) + 1}."})
+            start = end
+        language = fields.get('language', b"en").decode('utf-8')
+        response = {
+            "task": "translate" if fields.get('translate') == b"true" else "transcribe",
+            "language": "en" if language == "auto" else language,
+            "duration": duration,
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+        }
+        self._reply(200, "application/json", json.dumps(response).encode('utf-8'))
+
+    def _reply(self, status, content_type, payload):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dummy whisper.cpp server")
+    parser.add_argument("-m", "--model", default="")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-t", "--threads", type=int, default=4)
+    parser.add_argument("--load-delay", type=float, default=0.0,
+                        help="Seconds to wait before listening, to imitate loading a model")
+    parser.add_argument("--inference-delay", type=float, default=0.0,
+                        help="Seconds to wait before answering /inference, to imitate transcribing")
+    args = parser.parse_args()
+
+    DummyWhisperHandler.model = args.model
+    DummyWhisperHandler.inference_delay = args.inference_delay
+    time.sleep(args.load_delay)
+    server = ThreadingHTTPServer((args.host, args.port), DummyWhisperHandler)
+    print(f"Dummy whisper server listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+transcriber.py
+
+GUI-independent transcription core of SoftWhisper.
+
+transcribe_audio() turns one audio/video file into Whisper.cpp output. It is
+used by the Tk interface in SoftWhisper.py as well as by the headless batch
+command line in batch_transcribe.py, so this module must not import tkinter or
+any other GUI dependency.
+"""
+
+import os
+import tempfile
+import uuid
+
+import psutil
+from pydub import AudioSegment
+
+# Whisper.cpp process handling and parallel chunked transcription
+from whisper_runner import build_whisper_command, run_whisper, has_segments, PIPE_UNSUPPORTED_EXECUTABLES
+from chunked_transcription import (MAX_CHUNK_DURATION, plan_chunks, find_quiet_point,
+                                   find_quiet_point_in_file, choose_worker_count, transcribe_chunks)
+
+# Resident whisper.cpp server backend
+from whisper_server import is_server_backend, is_server_url, get_server_client
+
+# Streaming FFmpeg decoding of only the requested time range
+from audio_decode import ffmpeg_available, probe_duration, export_wav_range, pipe_wav_range, default_temp_dir
+
+# Content-addressed cache of finished transcriptions
+from result_cache import shared_cache
+
+# Whole-file 16 kHz WAV copies shared with diarization
+from audio_cache import cached_wav, find_cached_wav
+
+# Energy-based skipping of long silences
+from vad import compact_speech
+
+# Structured segments every view is rendered from
+from segment_store import SegmentStore
+
+# Incremental reading of whisper-cli's JSON output
+from whisper_json import consume as read_whisper_json
+
+
+def _log(message: str):
+    print(f"[DEBUG Transcriber] {message}")
+
+
+class TranscriptionError(RuntimeError):
+    """
+    Raised when Whisper.cpp fails without producing any segment.
+    """
+
+
+def get_default_whisper_cpp_path():
+    program_dir = os.path.dirname(os.path.abspath(__file__))
+    if os.name == "nt":
+        # Default Windows path: a directory; we'll later append the executable name.
+        return os.path.join(program_dir, "Whisper_win-x64")
+    else:
+        return os.path.join(program_dir, "Whisper_lin-x64")
+
+
+def resolve_whisper_executable(path_value):
+    """
+    Returns the absolute path of the Whisper.cpp binary for a configured path,
+    which may also be the folder containing whisper-cli or a server URL.
+    """
+    exe_path = path_value
+    if is_server_url(exe_path):
+        # A running whisper.cpp server; nothing to resolve
+        return exe_path
+    if os.path.isdir(exe_path):
+        if os.name == "nt":
+            exe_path = os.path.join(exe_path, "whisper-cli.exe")
+        else:
+            exe_path = os.path.join(exe_path, "whisper-cli")
+    return os.path.abspath(exe_path)
+
+
+def get_model_path(model_name):
+    """
+    Returns the absolute path of the ggml file for a model name such as "base".
+    """
+    return os.path.abspath(os.path.join("models", "whisper", f"ggml-{model_name}.bin"))
+
+
+# Advanced settings stored in the 'advanced' section of config.json and passed
+# through to transcribe_audio() as options.
+DEFAULT_ADVANCED_SETTINGS = {
+    # Split long ranges into MAX_CHUNK_DURATION chunks transcribed in parallel
+    'chunked': False,
+    # Number of parallel whisper-cli workers in chunked mode (0 = automatic)
+    'chunk_workers': 0,
+    # "ffmpeg" decodes only the requested range; "pydub" loads the whole file
+    'decoder': 'ffmpeg',
+    # "pipe" feeds decoded audio to whisper-cli through stdin; "file" writes a temporary WAV
+    'audio_input': 'pipe',
+    # Directory for temporary WAV files (empty = RAM-backed /dev/shm when available)
+    'temp_dir': '',
+    # Reuse results of identical transcriptions (same audio content and options)
+    'result_cache': True,
+    # Size cap of the result cache folder in megabytes
+    'result_cache_max_mb': 512,
+    # Number of processes computing speaker embeddings (0 = 80% of the logical cores)
+    'diarization_workers': 0,
+    # Identify speakers while Whisper.cpp transcribes instead of afterwards
+    'diarization_pipeline': True,
+    # Segment count above which speakers are clustered in two stages (bounded memory)
+    'diarization_exact_limit': 2000,
+    # Decode whole files once into the 16 kHz WAV cache shared with diarization
+    # (existing cache entries are always reused)
+    'audio_cache': False,
+    # Size cap of the decoded audio cache folder in megabytes
+    'audio_cache_max_mb': 2048,
+    # Number of jobs of the job queue that run at the same time
+    'job_concurrency': 1,
+    # Read the selected model into the page cache in the background when it is chosen
+    'model_warmup': True,
+    # Folder with ggml model files to copy missing models from instead of downloading them
+    'model_mirror_dir': '',
+    # Skip long silences before running Whisper.cpp (FFmpeg decoder only)
+    'vad': False,
+    # Shortest silence that is skipped, in seconds
+    'vad_min_silence': 2.0,
+    # Ask whisper-cli for token-level JSON (-ojf) to fill in segment confidences
+    'whisper_full_json': False,
+}
+
+
+# The transcribe_audio function with built-in logic to parse timestamps from
+# Whisper.cpp JSON lines.
+def transcribe_audio(file_path, options, progress_callback=None, status_callback=None, stop_event=None,
+                     segment_callback=None):
+    file_path = os.path.abspath(file_path)
+    _log(f"transcribe_audio() => Processing file: {file_path}")
+    model_name = options.get('model_name', 'base')
+    model_path = get_model_path(model_name)
+    language = options.get('language', 'auto')
+    beam_size = min(int(options.get('beam_size', 5)), 8)
+    task = options.get('task', 'transcribe')
+
+    if options.get('decoder', 'ffmpeg') == 'ffmpeg' and ffmpeg_available():
+        # Decode from the 16 kHz copy in the audio cache when there is one (e.g. made
+        # by diarization): seeking in it is cheap and needs no resampling.
+        if options.get('audio_cache', False):
+            source_path = str(cached_wav(file_path, max_bytes=int(options.get('audio_cache_max_mb', 2048)) * 1024 * 1024))
+        else:
+            source_path = str(find_cached_wav(file_path) or file_path)
+        if source_path != file_path:
+            _log(f"Decoding from cached audio {source_path}")
+
+        # Probe the duration and decode only the requested range, so memory use
+        # does not depend on the length of the input.
+        audio_length = probe_duration(source_path)
+
+        def export_range(range_start, range_end, wav_path):
+            export_wav_range(source_path, range_start, range_end, wav_path)
+
+        def quiet_point(window_start, window_end):
+            return find_quiet_point_in_file(source_path, window_start, window_end)
+
+        def stream_range(range_start, range_end, pipe):
+            pipe_wav_range(source_path, range_start, range_end, pipe)
+    else:
+        audio = AudioSegment.from_file(file_path)
+        audio_length = len(audio) / 1000.0
+
+        def export_range(range_start, range_end, wav_path):
+            audio[int(range_start * 1000):int(range_end * 1000)].export(wav_path, format="wav")
+
+        def quiet_point(window_start, window_end):
+            return find_quiet_point(audio, window_start, window_end)
+
+        stream_range = None
+
+    # Parse start/end directly from options and clamp to audio duration
+    start_text = options.get('start_time', '').strip()
+    end_text = options.get('end_time', '').strip()
+
+    def _s_to_sec(txt):
+        # Minimal inline parser supporting "HH:MM:SS", "MM:SS", or "SS"
+        if not txt:
+            return None
+        parts = txt.split(':')
+        try:
+            if len(parts) == 3:
+                h, m, s = parts
+                return int(h) * 3600 + int(m) * 60 + float(s)
+            elif len(parts) == 2:
+                m, s = parts
+                return int(m) * 60 + float(s)
+            else:
+                return float(parts[0])
+        except Exception:
+            return None
+
+    start_override = _s_to_sec(start_text) or 0.0
+    end_override = _s_to_sec(end_text) if end_text else None
+    if end_override is None or end_override <= 0:
+        end_override = audio_length
+
+    start_sec = max(0.0, min(start_override, audio_length))
+    end_sec = max(start_sec, min(end_override, audio_length))
+
+    # Zero-length guard to avoid loops/hangs on empty intervals
+    if end_sec - start_sec <= 0.001:
+        return {
+            'raw': "",
+            'text': "",
+            'segments': [],
+            'store': SegmentStore(),
+            'audio_length': audio_length,
+            'stderr': "",
+            'cancelled': bool(stop_event and stop_event.is_set())
+        }
+
+    threads = int(options.get('threads') or 0) or None
+    executable = options['whisper_executable']
+    temp_dir = options.get('temp_dir') or default_temp_dir()
+    use_pipe = stream_range is not None and options.get('audio_input', 'pipe') == 'pipe'
+
+    full_json = bool(options.get('whisper_full_json', False))
+
+    def run_cli(audio_arg, range_start, range_end, range_threads, timestamp_callback, segment_callback,
+                stdin_writer=None):
+        # whisper-cli writes its JSON output to a known file, read into a SegmentStore afterwards
+        output_base = os.path.join(temp_dir, f"softwhisper-{uuid.uuid4().hex}")
+        cmd = build_whisper_command(
+            executable, model_path, audio_arg,
+            language=language, beam_size=beam_size, task=task, threads=range_threads,
+            output_base=output_base, full_json=full_json
+        )
+        _log(f"Running Whisper.cpp with command: {' '.join(cmd)}")
+        output = run_whisper(
+            cmd, timestamp_callback=timestamp_callback, stop_event=stop_event,
+            stdin_writer=stdin_writer, segment_callback=segment_callback,
+            duration=range_end - range_start
+        )
+        output['store'] = read_whisper_json(output_base + ".json")
+        return output
+
+    def transcribe_range(range_start, range_end, range_threads, timestamp_callback, segment_callback=None):
+        # Feed the decoder output straight into whisper-cli's stdin when possible
+        if server is None and use_pipe and executable not in PIPE_UNSUPPORTED_EXECUTABLES:
+            output = run_cli(
+                "-", range_start, range_end, range_threads, timestamp_callback, segment_callback,
+                stdin_writer=lambda pipe: stream_range(range_start, range_end, pipe)
+            )
+            if output['returncode'] == 0 or has_segments(output) or (stop_event and stop_event.is_set()):
+                return output
+            _log("Whisper.cpp could not read audio from stdin; falling back to a temporary WAV file.")
+            PIPE_UNSUPPORTED_EXECUTABLES.add(executable)
+
+        # Otherwise write a temporary WAV file, preferably to a RAM-backed directory
+        fd, wav_path = tempfile.mkstemp(suffix=".wav", dir=temp_dir)
+        os.close(fd)
+        try:
+            export_range(range_start, range_end, wav_path)
+            if server is not None:
+                _log(f"Sending {wav_path} to Whisper.cpp server at {server.base_url}")
+                return server.transcribe(
+                    wav_path, language=language, beam_size=beam_size, task=task,
+                    timestamp_callback=timestamp_callback, stop_event=stop_event,
+                    segment_callback=segment_callback
+                )
+            return run_cli(wav_path, range_start, range_end, range_threads, timestamp_callback,
+                           segment_callback)
+        finally:
+            try:
+                os.remove(wav_path)
+            except OSError:
+                pass
+
+    # Skip long silences: transcribe a compacted copy of the range and move the
+    # segment times back onto the original timeline afterwards
+    speech_map = None
+    compact_path = None
+    if options.get('vad', False) and stream_range is not None:
+        compacted = compact_speech(source_path, start_sec, end_sec, temp_dir,
+                                   float(options.get('vad_min_silence', 2.0)))
+        if compacted is not None:
+            compact_path, speech_map = compacted
+            source_path = compact_path
+            start_sec, end_sec = 0.0, speech_map.compact_length
+            if segment_callback:
+                original_segment_callback = segment_callback
+
+                def segment_callback(line):
+                    original_segment_callback(speech_map.remap_line(line))
+
+    # A whisper.cpp server keeps the model loaded between files; the client holds
+    # it until closed, so no other job stops it meanwhile
+    server = get_server_client(executable, model_path, threads) if is_server_backend(executable) else None
+    try:
+        if options.get('chunked') and end_sec - start_sec > MAX_CHUNK_DURATION:
+            chunks = plan_chunks(start_sec, end_sec, quiet_point=quiet_point)
+            _log(f"Chunked mode: {len(chunks)} chunks of up to {MAX_CHUNK_DURATION}s")
+            total_threads = threads or max(1, int(psutil.cpu_count(logical=True) * 0.8))
+            output = transcribe_chunks(
+                chunks, start_sec, transcribe_range,
+                # A single server handles one job at a time
+                workers=1 if server is not None else choose_worker_count(
+                    total_threads, len(chunks), model_path, options.get('chunk_workers')),
+                total_threads=total_threads,
+                progress_callback=progress_callback,
+                stop_event=stop_event,
+                segment_callback=segment_callback
+            )
+        else:
+            def timestamp_callback(current):
+                if progress_callback:
+                    den = max(0.001, (end_sec - start_sec))
+                    progress = int(max(0.0, min(100.0, (current / den) * 100)))
+                    progress_callback(progress, f"Transcribing: {progress}%")
+
+            output = transcribe_range(start_sec, end_sec, threads, timestamp_callback, segment_callback)
+    finally:
+        if server is not None:
+            server.close()
+        if compact_path is not None:
+            try:
+                os.remove(compact_path)
+            except OSError:
+                pass
+    if speech_map is not None:
+        output['stdout_lines'] = [speech_map.remap_line(line) for line in output['stdout_lines']]
+        if output.get('store') is not None:
+            speech_map.remap_store(output['store'])
+
+    stdout_lines = output['stdout_lines']
+    stderr_data = output['stderr']
+
+    if progress_callback:
+        progress_callback(100, "Transcribing: 100%")
+
+    raw = "".join(stdout_lines).strip()
+    # Segments come from whisper-cli's JSON output; the console lines are only
+    # parsed when there is none (cancelled runs, older binaries). Every view of
+    # the transcription is rendered from this store.
+    store = output.get('store')
+    if store is None:
+        store = SegmentStore.from_whisper_output(stdout_lines)
+    cancelled = bool(stop_event and stop_event.is_set())
+
+    # A failed run must not pass for an empty transcription (which callers would
+    # save, cache or treat as up to date).
+    returncode = output.get('returncode', 0)
+    if not cancelled and returncode not in (0, None) and len(store) == 0:
+        last_error = stderr_data.strip().splitlines()[-1:] or [""]
+        raise TranscriptionError(f"Whisper.cpp failed with exit code {returncode}: {last_error[0]}")
+
+    segments = store.to_records()
+    plain_text = store.to_plain()
+
+    result = {
+        'raw': raw,
+        'text': plain_text,
+        'segments': segments,
+        'store': store,
+        'audio_length': audio_length,
+        'stderr': stderr_data,
+        'cancelled': cancelled
+    }
+
+    return result
+
+
+def get_result_cache(options):
+    """
+    Returns the process-wide TranscriptionCache configured by `options`, or None
+    when disabled.
+    """
+    if not options.get('result_cache', True):
+        return None
+    return shared_cache(max_bytes=int(options.get('result_cache_max_mb', 512)) * 1024 * 1024)
+
+
+def transcribe_with_cache(file_path, options, cache=None, progress_callback=None, status_callback=None,
+                          stop_event=None, segment_callback=None):
+    """
+    Same as transcribe_audio(), but returns a cached result when the same audio
+    content was already transcribed with the same options, skipping decoding and
+    Whisper.cpp entirely. Finished (not cancelled) results are added to `cache`.
+
+    Cached results are returned whole with result['cached'] set, without going
+    through `segment_callback`.
+    """
+    if cache is None:
+        return transcribe_audio(file_path, options, progress_callback, status_callback, stop_event,
+                                segment_callback)
+
+    key = cache.key(file_path, options)
+    result = cache.get(key)
+    if result is not None:
+        _log(f"Using cached transcription for {file_path}")
+        result['cancelled'] = False
+        result['cached'] = True
+        if progress_callback:
+            progress_callback(100, "Transcribing: 100% (cached)")
+        return result
+
+    result = transcribe_audio(file_path, options, progress_callback, status_callback, stop_event,
+                              segment_callback)
+    if not result.get('cancelled') and result.get('raw'):
+        cache.put(key, result)
+    return result
@@ -0,0 +1,197 @@
+"""
+vad.py
+
+Energy-based voice activity detection, used to skip long silences before
+Whisper.cpp runs.
+
+The transcribed range is decoded once to a temporary 16 kHz WAV file, the
+loudness of short frames is measured, and stretches that stay near the noise
+floor for at least `min_silence` seconds are dropped. The remaining speech
+regions are concatenated into a compacted WAV file, and a SpeechMap records
+where each region came from so that segment timestamps produced on the
+compacted audio can be moved back onto the original timeline.
+
+Only silence and quiet background noise are detected; music and other loud
+non-speech sounds are kept.
+"""
+
+import bisect
+import os
+import tempfile
+
+import numpy as np
+
+from audio_decode import WHISPER_SAMPLE_RATE, export_wav_range, open_wav_pcm16, wav_header
+from whisper_runner import SEGMENT_LINE_PATTERN, timestamp_to_seconds, seconds_to_timestamp
+
+# Length of the analysis frames (milliseconds).
+FRAME_MS = 30
+
+# Silences shorter than this are kept, so pauses inside sentences stay intact (seconds).
+MIN_SILENCE = 2.0
+
+# Silence kept on each side of a speech region (seconds).
+PADDING = 0.3
+
+# A frame is speech when it is this much louder than the noise floor (dB)...
+MARGIN_DB = 10.0
+# ...and louder than this absolute level (dB relative to full scale).
+ABSOLUTE_FLOOR_DB = -60.0
+# The threshold never rises above this far below the loud parts, so recordings
+# without real silence are not cut into.
+HEADROOM_DB = 20.0
+
+# Compacting is skipped when it would remove less than this fraction of the range.
+MIN_SAVING = 0.05
+
+# Frames analysed per block, to bound the memory used for long files.
+BLOCK_FRAMES = 20000
+
+
+def _log(message: str):
+    print(f"[DEBUG VAD] {message}")
+
+
+def frame_levels(samples, sample_rate=WHISPER_SAMPLE_RATE, frame_ms=FRAME_MS):
+    """
+    Returns the level of every `frame_ms` frame of int16 `samples` in dB
+    relative to full scale.
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    frame_count = len(samples) // frame_len
+    levels = np.empty(frame_count, dtype=np.float32)
+    for first in range(0, frame_count, BLOCK_FRAMES):
+        last = min(frame_count, first + BLOCK_FRAMES)
+        block = np.asarray(samples[first * frame_len:last * frame_len], dtype=np.float32)
+        block = block.reshape(last - first, frame_len) / 32768.0
+        levels[first:last] = 10.0 * np.log10(np.mean(block * block, axis=1) + 1e-10)
+    return levels
+
+
+def speech_regions(levels, frame_ms=FRAME_MS, min_silence=MIN_SILENCE, padding=PADDING):
+    """
+    Returns the speech regions of a recording as (start, end) pairs in seconds,
+    given its frame levels from frame_levels().
+    """
+    if len(levels) == 0:
+        return []
+    floor = float(np.percentile(levels, 10))
+    loud = float(np.percentile(levels, 95))
+    threshold = min(max(floor + MARGIN_DB, ABSOLUTE_FLOOR_DB), loud - HEADROOM_DB)
+    voiced = levels > threshold
+
+    frame_sec = frame_ms / 1000.0
+    duration = len(levels) * frame_sec
+    # Indices where the voiced flag changes give the runs of voiced frames.
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+    regions = []
+    for first, last in zip(edges[::2], edges[1::2]):
+        start = max(0.0, first * frame_sec - padding)
+        end = min(duration, last * frame_sec + padding)
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+    return [(start, end) for start, end in regions]
+
+
+class SpeechMap:
+    """
+    Timestamp remap table between compacted audio and the original timeline.
+
+    Parameters:
+        regions (list): (start, end) pairs in seconds on the original timeline,
+            in the order they were concatenated.
+    """
+    def __init__(self, regions):
+        self.original_starts = []
+        self.compact_starts = []
+        self.lengths = []
+        position = 0.0
+        for start, end in regions:
+            self.original_starts.append(start)
+            self.compact_starts.append(position)
+            self.lengths.append(end - start)
+            position += end - start
+        self.compact_length = position
+
+    def to_original(self, t, is_end=False):
+        """
+        Maps a time on the compacted audio to the original timeline. An end time
+        that falls exactly on a junction belongs to the region before it.
+        """
+        if not self.compact_starts:
+            return t
+        index = bisect.bisect_right(self.compact_starts, t) - 1
+        if is_end and index > 0 and t <= self.compact_starts[index]:
+            index -= 1
+        index = max(0, index)
+        offset = min(max(0.0, t - self.compact_starts[index]), self.lengths[index])
+        return self.original_starts[index] + offset
+
+    def remap_store(self, store):
+        """
+        Moves the segments of a SegmentStore onto the original timeline, in place.
+        """
+        for index in range(len(store)):
+            start = self.to_original(store.start_ms[index] / 1000.0)
+            end = self.to_original(store.end_ms[index] / 1000.0, is_end=True)
+            store.start_ms[index] = int(round(start * 1000))
+            store.end_ms[index] = int(round(end * 1000))
+        return store
+
+    def remap_line(self, line):
+        """
+        Moves the timestamps of a whisper-cli segment line onto the original
+        timeline. Lines without a leading timestamp are returned unchanged.
+        """
+        match = SEGMENT_LINE_PATTERN.match(line)
+        if not match:
+            return line
+        start = seconds_to_timestamp(self.to_original(timestamp_to_seconds(match.group(1))))
+        end = seconds_to_timestamp(self.to_original(timestamp_to_seconds(match.group(2)), is_end=True))
+        return f"[{start} --> {end}]" + line[match.end():]
+
+
+def compact_speech(source_path, start_sec, end_sec, temp_dir=None, min_silence=MIN_SILENCE):
+    """
+    Writes the speech of [start_sec, end_sec] of a media file, without its long
+    silences, to a temporary WAV file.
+
+    Returns:
+        (wav_path, SpeechMap) with times relative to `start_sec`, or None when
+        nothing worth skipping was found. The caller deletes wav_path.
+    """
+    fd, range_path = tempfile.mkstemp(suffix=".wav", dir=temp_dir)
+    os.close(fd)
+    samples = None
+    try:
+        export_wav_range(source_path, start_sec, end_sec, range_path)
+        samples = open_wav_pcm16(range_path)
+        if samples is None:
+            return None
+        total = len(samples) / WHISPER_SAMPLE_RATE
+        regions = speech_regions(frame_levels(samples), min_silence=min_silence)
+        speech = sum(end - start for start, end in regions)
+        if not regions or total - speech < MIN_SAVING * total:
+            _log(f"Speech fills {speech:.1f}s of {total:.1f}s; not compacting.")
+            return None
+
+        fd, compact_path = tempfile.mkstemp(suffix=".wav", dir=temp_dir)
+        bounds = [(int(start * WHISPER_SAMPLE_RATE), int(end * WHISPER_SAMPLE_RATE)) for start, end in regions]
+        with os.fdopen(fd, 'wb') as out:
+            out.write(wav_header(sum(last - first for first, last in bounds)))
+            for first, last in bounds:
+                out.write(np.ascontiguousarray(samples[first:last]).tobytes())
+        speech_map = SpeechMap([(first / WHISPER_SAMPLE_RATE, last / WHISPER_SAMPLE_RATE)
+                                for first, last in bounds])
+        _log(f"Kept {speech_map.compact_length:.1f}s of speech in {len(regions)} regions out of {total:.1f}s "
+             f"({100.0 * (1 - speech_map.compact_length / max(total, 0.001)):.0f}% skipped).")
+        return compact_path, speech_map
+    finally:
+        # The mapping must be closed before the file can be removed on Windows.
+        samples = None
+        try:
+            os.remove(range_path)
+        except OSError:
+            pass
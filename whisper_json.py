@@ -0,0 +1,152 @@
+"""
+whisper_json.py
+
+Incremental reader for the JSON files whisper-cli writes with -oj / -ojf.
+
+whisper-cli writes its JSON output ("<base>.json" with "-of <base>") once the
+audio has been processed:
+
+    {"systeminfo": ..., "model": {...}, "params": {...}, "result": {...},
+     "transcription": [{"timestamps": {...}, "offsets": {"from": 0, "to": 5000},
+                        "text": " ...", "tokens": [...]}, ...]}
+
+"tokens" (with a probability "p" per token) is only present with -ojf, which
+makes the file many times larger than the transcript. The file is therefore
+read in blocks and the "transcription" array is decoded one segment at a time
+with json.JSONDecoder.raw_decode, so memory use does not depend on its size.
+"""
+
+import json
+import math
+import os
+
+from segment_store import SegmentStore
+
+BLOCK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+# whisper.cpp does not always escape control characters inside strings.
+_decoder = json.JSONDecoder(strict=False)
+
+
+def _log(message: str):
+    print(f"[DEBUG WhisperJSON] {message}")
+
+
+class _Reader:
+    # A growing window over a text file that JSON values are decoded from.
+    def __init__(self, f, block_size=BLOCK_SIZE):
+        self.f = f
+        self.block_size = block_size
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self):
+        if self.pos > self.block_size:
+            # Drop what has been consumed so the window stays small.
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        data = self.f.read(self.block_size)
+        if not data:
+            return False
+        self.buf += data
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character, or "" at the end of the file.
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in whisper JSON, found {found!r}")
+        self.pos += 1
+
+    def skip(self, char):
+        if self.peek() == char:
+            self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, self.pos = _decoder.raw_decode(self.buf, self.pos)
+                return value
+            except json.JSONDecodeError:
+                # Incomplete value: read more, unless the file is truncated.
+                if not self._fill():
+                    raise
+
+
+def iter_segments(path, block_size=BLOCK_SIZE):
+    """
+    Yields the entries of the "transcription" array of a whisper-cli JSON file
+    one at a time.
+
+    Raises ValueError (json.JSONDecodeError included) for malformed files.
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        reader = _Reader(f, block_size)
+        reader.expect('{')
+        while reader.peek() not in ('}', ''):
+            key = reader.value()
+            reader.expect(':')
+            if key != "transcription":
+                reader.value()
+            else:
+                reader.expect('[')
+                while reader.peek() not in (']', ''):
+                    yield reader.value()
+                    reader.skip(',')
+                reader.expect(']')
+            reader.skip(',')
+
+
+def segment_confidence(entry):
+    """
+    Returns the mean probability of the text tokens of a segment, or NaN when
+    the file has no token data (-oj without -ojf).
+    """
+    probabilities = [token['p'] for token in entry.get('tokens', ())
+                     if 'p' in token and not token.get('text', '').startswith('[_')]
+    return sum(probabilities) / len(probabilities) if probabilities else math.nan
+
+
+def read_store(path):
+    """
+    Reads a whisper-cli JSON file into a SegmentStore.
+    """
+    store = SegmentStore()
+    for entry in iter_segments(path):
+        offsets = entry.get('offsets', {})
+        store.append(offsets.get('from', 0), offsets.get('to', 0), entry.get('text', '').strip(),
+                     confidence=segment_confidence(entry))
+    return store
+
+
+def consume(path):
+    """
+    Reads and deletes a whisper-cli JSON file. Returns its SegmentStore, or None
+    when the file is missing (e.g. the run was cancelled) or malformed.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return read_store(path)
+    except (OSError, ValueError) as e:
+        _log(f"[WARN] Could not read {path}: {e}")
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,326 @@
+"""
+whisper_runner.py
+
+Helpers for driving the Whisper.cpp command line binary (whisper-cli).
+
+This module builds the whisper-cli command line, runs whisper-cli processes
+on a shared asyncio event loop that watches their output for progress, stalls
+and cancellation, and converts the bracketed "[hh:mm:ss.mmm --> hh:mm:ss.mmm]"
+timestamps that whisper-cli prints for every segment.
+"""
+
+import asyncio
+import os
+import re
+import subprocess
+import threading
+
+import psutil
+
+# Seconds without any output before a whisper-cli process is considered stalled.
+STALL_TIMEOUT = 60
+
+# Longest wait before a running process notices that its stop_event was set (seconds).
+STOP_POLL_INTERVAL = 0.05
+
+# Time left to a killed or finished process to flush its pipes and exit (seconds).
+DRAIN_TIMEOUT = 1.0
+
+# Longest line read from whisper-cli in one piece (bytes).
+LINE_LIMIT = 1024 * 1024
+
+# Initial prompt passed to every whisper-cli run.
+WHISPER_PROMPT = "Always use punctuation. Do not use dashes to indicate dialog. Do not censor any words."
+
+# whisper-cli binaries that failed to read audio from stdin ("-f -"); these get
+# a temporary WAV file instead for the rest of the session.
+PIPE_UNSUPPORTED_EXECUTABLES = set()
+
+# Matches the leading "[hh:mm:ss.mmm --> hh:mm:ss.mmm]" of a segment line.
+SEGMENT_LINE_PATTERN = re.compile(r'^\[(\d{2}:\d{2}:\d{2}\.\d{3}) --> (\d{2}:\d{2}:\d{2}\.\d{3})\]')
+
+
+def _log(message: str):
+    print(f"[DEBUG Whisper] {message}")
+
+
+def timestamp_to_seconds(timestamp):
+    """
+    Converts a Whisper.cpp timestamp of format "hh:mm:ss.mmm" to seconds.
+    """
+    h, m, s_ms = timestamp.split(':')
+    s, ms = s_ms.split('.')
+    return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0
+
+
+def seconds_to_timestamp(seconds):
+    """
+    Converts seconds to a Whisper.cpp timestamp of format "hh:mm:ss.mmm".
+    """
+    total_ms = int(round(max(0.0, seconds) * 1000))
+    hours, rest = divmod(total_ms, 3600000)
+    minutes, rest = divmod(rest, 60000)
+    secs, ms = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{ms:03d}"
+
+
+def shift_segment_line(line, offset):
+    """
+    Shifts the timestamps of a whisper-cli segment line by `offset` seconds.
+    Lines without a leading timestamp are returned unchanged.
+    """
+    match = SEGMENT_LINE_PATTERN.match(line)
+    if not match or not offset:
+        return line
+    start = seconds_to_timestamp(timestamp_to_seconds(match.group(1)) + offset)
+    end = seconds_to_timestamp(timestamp_to_seconds(match.group(2)) + offset)
+    return f"[{start} --> {end}]" + line[match.end():]
+
+
+def segment_start(line):
+    """
+    Returns the start time (in seconds) of a whisper-cli segment line, or None
+    for other lines. Checks the fixed-width "[hh:mm:ss.mmm --> " prefix directly,
+    which is cheaper than SEGMENT_LINE_PATTERN for every line of output.
+    """
+    if len(line) < 31 or line[0] != "[" or line[13:18] != " --> " or line[30] != "]":
+        return None
+    try:
+        return timestamp_to_seconds(line[1:13])
+    except ValueError:
+        return None
+
+
+def progress_percent(line):
+    """
+    Returns the percentage of a "whisper_print_progress_callback: progress = 42%"
+    line printed to stderr with -pp, or None for other lines.
+    """
+    marker = line.find("progress =")
+    if marker < 0:
+        return None
+    try:
+        return int(line[marker + len("progress ="):].strip().rstrip("%"))
+    except ValueError:
+        return None
+
+
+def has_segments(output):
+    """
+    Returns True when a run_whisper() result contains at least one segment line.
+    """
+    return any(SEGMENT_LINE_PATTERN.match(line) for line in output['stdout_lines'])
+
+
+def build_whisper_command(executable, model_path, audio_path, language="auto", beam_size=5,
+                          task="transcribe", threads=None, output_base=None, full_json=False):
+    """
+    Builds the whisper-cli command line for a single audio file.
+
+    With `output_base`, the JSON output is written to "<output_base>.json" (see
+    whisper_json.py); `full_json` adds token timestamps and probabilities (-ojf).
+    """
+    cmd = [
+        executable, "-m", model_path,
+        "-f", audio_path, "-bs", str(beam_size), "-pp",
+        "-l", language, "-oj", "--prompt", WHISPER_PROMPT
+    ]
+    if threads:
+        cmd.extend(["-t", str(threads)])
+    if task == "translate":
+        cmd.append("-translate")
+    if output_base:
+        cmd.extend(["-of", output_base])
+        if full_json:
+            cmd.append("-ojf")
+    return cmd
+
+
+async def supervise_whisper(cmd, timestamp_callback=None, stop_event=None, stall_timeout=STALL_TIMEOUT,
+                            stdin_writer=None, segment_callback=None, duration=None):
+    """
+    Coroutine that runs one whisper-cli process until it exits, stalls or is
+    cancelled. Takes the same arguments and returns the same dict as run_whisper().
+
+    stdout and stderr are read by the event loop, so the stall timeout is
+    measured from the last line on either stream and a set `stop_event` is
+    noticed within STOP_POLL_INTERVAL, even while whisper-cli prints nothing.
+    """
+    loop = asyncio.get_running_loop()
+    stdin_read = stdin_write = None
+    if stdin_writer:
+        stdin_read, stdin_write = os.pipe()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=stdin_read if stdin_writer else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=os.environ.copy(),
+            limit=LINE_LIMIT
+        )
+    except BaseException:
+        if stdin_writer:
+            os.close(stdin_write)
+        raise
+    finally:
+        if stdin_writer:
+            os.close(stdin_read)
+
+    if stdin_writer:
+        # The writer usually copies from another process (FFmpeg) with blocking writes.
+        threading.Thread(target=stdin_writer, args=(os.fdopen(stdin_write, 'wb'),), daemon=True).start()
+
+    stdout_lines = []
+    stderr_data = []
+    reached = [0.0]
+    last_output = [loop.time()]
+
+    def advance(position):
+        if timestamp_callback and position > reached[0]:
+            reached[0] = position
+            timestamp_callback(position)
+
+    def on_stdout(line):
+        stdout_lines.append(line)
+        start = segment_start(line)
+        if start is not None:
+            if segment_callback:
+                segment_callback(line)
+            advance(start)
+
+    def on_stderr(line):
+        stderr_data.append(line)
+        if duration:
+            percent = progress_percent(line)
+            if percent is not None:
+                advance(duration * percent / 100.0)
+
+    async def pump(stream, handle_line):
+        while True:
+            try:
+                data = await stream.readline()
+            except ValueError:
+                # A line longer than LINE_LIMIT: take what is buffered as one line.
+                data = await stream.read(LINE_LIMIT)
+            if not data:
+                return
+            last_output[0] = loop.time()
+            handle_line(data.decode('utf-8', errors='replace').replace("\r\n", "\n"))
+
+    readers = asyncio.gather(pump(process.stdout, on_stdout), pump(process.stderr, on_stderr))
+    # Time left to the process to exit once it has closed its output.
+    exit_timeout = stall_timeout
+    try:
+        while True:
+            timeout = last_output[0] + stall_timeout - loop.time()
+            if stop_event is not None:
+                timeout = min(timeout, STOP_POLL_INTERVAL)
+            done, _ = await asyncio.wait({readers}, timeout=max(0.0, timeout))
+            if done:
+                readers.result()
+                break
+            if stop_event is not None and stop_event.is_set():
+                _kill(process)
+                exit_timeout = DRAIN_TIMEOUT
+                break
+            if loop.time() - last_output[0] >= stall_timeout:
+                _log(f"[WARN] Whisper.cpp printed nothing for {stall_timeout} seconds; terminating it.")
+                _kill(process)
+                exit_timeout = DRAIN_TIMEOUT
+                break
+        # Collect whatever was still buffered when the process ended.
+        try:
+            await asyncio.wait_for(asyncio.shield(readers), DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            returncode = await asyncio.wait_for(process.wait(), exit_timeout)
+        except asyncio.TimeoutError:
+            returncode = process.returncode
+    finally:
+        if process.returncode is None:
+            _kill(process)
+        readers.cancel()
+
+    return {
+        'stdout_lines': stdout_lines,
+        'stderr': "".join(stderr_data),
+        'returncode': returncode
+    }
+
+
+class WhisperSupervisor:
+    """
+    An asyncio event loop on one background thread that supervises whisper-cli
+    processes started from any number of threads, e.g. the concurrent jobs of
+    batch_transcribe.py or the parallel chunks of chunked_transcription.py.
+
+    Callbacks passed to run() or submit() are called on the loop thread and
+    should return quickly.
+    """
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="whisper-supervisor", daemon=True).start()
+            return self._loop
+
+    def submit(self, cmd, **kwargs):
+        """
+        Starts supervise_whisper(cmd, **kwargs) on the loop and returns a
+        concurrent.futures.Future of its result.
+        """
+        return asyncio.run_coroutine_threadsafe(supervise_whisper(cmd, **kwargs), self._ensure_loop())
+
+    def run(self, cmd, **kwargs):
+        """
+        Runs supervise_whisper(cmd, **kwargs) on the loop and waits for its result.
+        """
+        return self.submit(cmd, **kwargs).result()
+
+
+_supervisor = WhisperSupervisor()
+
+
+def run_whisper(cmd, timestamp_callback=None, stop_event=None, stall_timeout=STALL_TIMEOUT,
+                stdin_writer=None, segment_callback=None, duration=None):
+    """
+    Runs one whisper-cli process until it exits, stalls or is cancelled.
+
+    The process is supervised by the shared WhisperSupervisor loop, so concurrent
+    calls from several threads need no reader threads of their own.
+
+    Parameters:
+        cmd (list): The whisper-cli command line.
+        timestamp_callback (callable, optional): Called with the position reached (in seconds,
+            relative to the processed audio): the start of every segment line printed by
+            whisper-cli and, when `duration` is given, the -pp progress percentages
+            converted to seconds. Positions only ever increase.
+        stop_event (threading.Event, optional): When set, the process is killed.
+        stall_timeout (float): Seconds without output before the process is killed.
+        stdin_writer (callable, optional): Called from a background thread with the
+            binary stdin pipe of the process, for runs that read the audio from
+            stdin ("-f -"). It is responsible for closing the pipe.
+        segment_callback (callable, optional): Called with every segment line as soon
+            as whisper-cli prints it.
+        duration (float, optional): Length of the processed audio in seconds.
+
+    Returns:
+        dict: 'stdout_lines' (list of str), 'stderr' (str) and 'returncode' (int or None).
+    """
+    return _supervisor.run(
+        cmd, timestamp_callback=timestamp_callback, stop_event=stop_event, stall_timeout=stall_timeout,
+        stdin_writer=stdin_writer, segment_callback=segment_callback, duration=duration
+    )
+
+
+def _kill(process):
+    try:
+        psutil.Process(process.pid).kill()
+    except Exception:
+        pass
@@ -0,0 +1,327 @@
+"""
+whisper_server.py
+
+Resident Whisper.cpp backend.
+
+Running whisper-cli once per file reloads the ggml model every time. This module
+instead keeps a single whisper.cpp server (the "whisper-server" example binary, or
+any server speaking its HTTP API) running with the model already loaded, and
+sends it one job per audio file through its /inference endpoint.
+
+The backend is selected through options['whisper_executable']:
+  - an http:// or https:// URL uses a server that is already running there;
+  - an executable whose name ends in "server" (e.g. whisper-server) is started
+    once per model and kept running until the program exits;
+  - anything else is treated as whisper-cli and run once per file.
+"""
+
+import atexit
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+
+from whisper_runner import WHISPER_PROMPT, seconds_to_timestamp
+
+# Seconds to wait for a freshly started server to load its model and listen.
+SERVER_START_TIMEOUT = 300
+
+# Size of the blocks used to upload audio files (bytes).
+UPLOAD_BLOCK_SIZE = 64 * 1024
+
+# Resident servers kept running at once. Starting one for another model stops
+# the least recently used ones beyond this, once no client holds them.
+MAX_RESIDENT_SERVERS = 1
+
+# Resident servers by (executable, model path), and servers being started (by
+# the same key) with an Event set once they are published or have failed.
+_servers = {}
+_starting = {}
+# Servers over the limit that are stopped when their last client is closed.
+_retired = set()
+_servers_lock = threading.Lock()
+
+# Server URLs already warned about (see get_server_client()).
+_warned_urls = set()
+
+
+def _log(message: str):
+    print(f"[DEBUG WhisperServer] {message}")
+
+
+def is_server_url(executable):
+    return executable.startswith(("http://", "https://"))
+
+
+def is_server_backend(executable):
+    """
+    Returns True when `executable` selects the resident server backend.
+    """
+    if is_server_url(executable):
+        return True
+    name = os.path.splitext(os.path.basename(executable))[0].lower()
+    return name.endswith("server")
+
+
+class WhisperServerClient:
+    """
+    Minimal client for the whisper.cpp server HTTP API.
+
+    A client returned by get_server_client() for a resident server keeps that
+    server running until close() is called.
+    """
+    def __init__(self, base_url, server=None):
+        self.base_url = base_url.rstrip("/")
+        self.server = server
+
+    def close(self):
+        if self.server is not None:
+            _release_server(self.server)
+            self.server = None
+
+    def transcribe(self, wav_path, language="auto", beam_size=5, task="transcribe",
+                   timestamp_callback=None, stop_event=None, segment_callback=None):
+        """
+        Uploads a WAV file to /inference and waits for its segments.
+
+        Returns the same dict as whisper_runner.run_whisper(), with the segments
+        rendered as whisper-cli style "[hh:mm:ss.mmm --> hh:mm:ss.mmm] text" lines.
+        """
+        fields = {
+            'response_format': 'verbose_json',
+            'language': language,
+            'beam_size': str(beam_size),
+            'translate': 'true' if task == 'translate' else 'false',
+            'prompt': WHISPER_PROMPT,
+        }
+        outcome = {}
+
+        def request():
+            try:
+                outcome['response'] = self._post_file("/inference", fields, wav_path)
+            except Exception as e:
+                outcome['error'] = e
+
+        worker = threading.Thread(target=request, daemon=True)
+        worker.start()
+        while worker.is_alive():
+            if stop_event and stop_event.is_set():
+                # The server finishes the job on its own; the result is simply discarded.
+                return {'stdout_lines': [], 'stderr': "Cancelled.\n", 'returncode': None}
+            worker.join(0.1)
+
+        if 'error' in outcome:
+            _log(f"[ERROR] Inference request failed: {outcome['error']}")
+            return {'stdout_lines': [], 'stderr': f"{outcome['error']}\n", 'returncode': 1}
+
+        data = json.loads(outcome['response'])
+        if 'error' in data:
+            return {'stdout_lines': [], 'stderr': f"{data['error']}\n", 'returncode': 1}
+
+        stdout_lines = []
+        for segment in data.get('segments', []):
+            start = float(segment.get('start', 0.0))
+            end = float(segment.get('end', start))
+            text = segment.get('text', '').strip()
+            line = f"[{seconds_to_timestamp(start)} --> {seconds_to_timestamp(end)}]  {text}\n"
+            stdout_lines.append(line)
+            if segment_callback:
+                segment_callback(line)
+            if timestamp_callback:
+                timestamp_callback(start)
+        return {'stdout_lines': stdout_lines, 'stderr': "", 'returncode': 0}
+
+    def _post_file(self, path, fields, file_path):
+        # Stream the multipart body so large files are never held in memory.
+        boundary = uuid.uuid4().hex
+        head = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+            for name, value in fields.items()
+        )
+        head += (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+                 f'filename="{os.path.basename(file_path)}"\r\n'
+                 f'Content-Type: audio/wav\r\n\r\n').encode('utf-8')
+        tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        length = len(head) + os.path.getsize(file_path) + len(tail)
+
+        def body():
+            yield head
+            with open(file_path, 'rb') as f:
+                while True:
+                    block = f.read(UPLOAD_BLOCK_SIZE)
+                    if not block:
+                        break
+                    yield block
+            yield tail
+
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=body(),
+            method="POST",
+            headers={
+                'Content-Type': f'multipart/form-data; boundary={boundary}',
+                'Content-Length': str(length),
+            }
+        )
+        with urllib.request.urlopen(req) as response:
+            return response.read().decode('utf-8', errors='replace')
+
+
+class ResidentWhisperServer:
+    """
+    A whisper.cpp server process started with one model and kept running.
+    """
+    def __init__(self, executable, model_path, threads=None, host="127.0.0.1"):
+        self.executable = executable
+        self.model_path = model_path
+        self.threads = threads
+        self.host = host
+        self.port = None
+        self.process = None
+        self.url = None
+        # Open clients (see get_server_client()) and the last time one was handed out.
+        self.clients = 0
+        self.last_used = 0.0
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.port = _free_port(self.host)
+        cmd = [self.executable, "-m", self.model_path, "--host", self.host, "--port", str(self.port)]
+        if self.threads:
+            cmd.extend(["-t", str(self.threads)])
+        if self.executable.endswith(".py"):
+            cmd.insert(0, sys.executable)
+        _log(f"Starting resident server: {' '.join(cmd)}")
+        self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        deadline = time.time() + SERVER_START_TIMEOUT
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Whisper server exited with code {self.process.returncode} while starting.")
+            try:
+                with socket.create_connection((self.host, self.port), timeout=1):
+                    break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            self.stop()
+            raise RuntimeError("Whisper server did not start listening in time.")
+
+        self.url = f"http://{self.host}:{self.port}"
+        _log(f"Resident server ready on port {self.port}.")
+
+    def stop(self):
+        if self.is_running():
+            _log(f"Stopping resident server on port {self.port}.")
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+        self.url = None
+
+
+def get_server_client(executable, model_path, threads=None):
+    """
+    Returns a WhisperServerClient for the backend selected by `executable`,
+    starting a resident server for `model_path` if none is running yet.
+
+    A remote server (a URL) transcribes with whatever model it was started
+    with; `model_path` is ignored for it.
+    """
+    if is_server_url(executable):
+        if executable not in _warned_urls:
+            _warned_urls.add(executable)
+            _log(f"[WARN] {executable} uses the model it was started with, not "
+                 f"{os.path.basename(model_path)}.")
+        return WhisperServerClient(executable)
+    key = (executable, model_path)
+    while True:
+        with _servers_lock:
+            server = _servers.get(key)
+            if server is not None and server.is_running():
+                return _lease(server)
+            starting = _starting.get(key)
+            if starting is None:
+                _servers.pop(key, None)
+                starting = _starting[key] = threading.Event()
+                break
+        # Another job is starting this server; use it once it is up.
+        starting.wait()
+
+    # Started outside the lock: loading a model can take minutes.
+    server = ResidentWhisperServer(executable, model_path, threads)
+    try:
+        server.start()
+    finally:
+        with _servers_lock:
+            if server.is_running():
+                _servers[key] = server
+            _starting.pop(key).set()
+    with _servers_lock:
+        client = _lease(server)
+        idle = _retire_servers(keep=key)
+    for other in idle:
+        other.stop()
+    return client
+
+
+def _lease(server):
+    # Called with _servers_lock held.
+    server.clients += 1
+    server.last_used = time.time()
+    return WhisperServerClient(server.url, server)
+
+
+def _release_server(server):
+    with _servers_lock:
+        server.clients -= 1
+        stop = server in _retired and server.clients == 0
+        if stop:
+            _retired.discard(server)
+    if stop:
+        server.stop()
+
+
+def _retire_servers(keep):
+    # Called with _servers_lock held. Removes the least recently used servers
+    # beyond MAX_RESIDENT_SERVERS and returns the idle ones, to be stopped by
+    # the caller; servers still in use are stopped when released.
+    idle = []
+    others = sorted((server.last_used, key) for key, server in _servers.items() if key != keep)
+    for _, key in others[:max(0, len(_servers) - MAX_RESIDENT_SERVERS)]:
+        server = _servers.pop(key)
+        if server.clients:
+            _retired.add(server)
+        else:
+            idle.append(server)
+    return idle
+
+
+def shutdown_servers():
+    """
+    Stops every resident server started by this process.
+    """
+    with _servers_lock:
+        servers = list(_servers.values()) + list(_retired)
+        _servers.clear()
+        _retired.clear()
+    for server in servers:
+        server.stop()
+
+
+def _free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+atexit.register(shutdown_servers)